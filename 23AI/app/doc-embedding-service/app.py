@@ -14,6 +14,7 @@ Web service para upload de documentos, geração de chunks e embeddings
 import os
 import time
 import json
+import atexit
 from flask import Flask, request, jsonify, abort
 from werkzeug.utils import secure_filename
 from dotenv import load_dotenv
@@ -21,8 +22,15 @@ from dotenv import load_dotenv
 # Importa módulos locais
 from auth import initialize_auth, get_http_auth
 from document_processor import create_document_processor
-from embedding_service import initialize_embedding_service, get_embedding_service
-from database import initialize_database, get_database
+from embedding_service import (
+    initialize_embedding_service, get_embedding_service,
+    initialize_model_registry, get_model_registry
+)
+from database import initialize_database, get_database, ChunksChangedError
+from page_extraction import close_page_extractor
+from extraction_cache import get_extraction_cache, get_ocr_cache
+from ingest_pipeline import create_ingest_pipeline, streaming_enabled
+from upload_spool import spool_stream
 
 # Carrega variáveis de ambiente
 load_dotenv()
@@ -81,19 +89,34 @@ def initialize_services():
     print("[init] Inicializando serviço de embeddings...")
     embedding_service = initialize_embedding_service(
         model_name=os.environ.get('EMBEDDING_MODEL'),
-        device=os.environ.get('EMBEDDING_DEVICE', 'cpu')
+        device=os.environ.get('EMBEDDING_DEVICE', 'cpu'),
+        backend=os.environ.get('EMBEDDING_BACKEND'),
+        server_url=os.environ.get('EMBEDDING_SERVER_URL')
     )
     
     embedding_dim = embedding_service.get_dimension()
     print(f"[init] Dimensão dos embeddings: {embedding_dim}")
     
+    # Registro de modelos (modelos adicionais carregados sob demanda)
+    model_registry = initialize_model_registry(embedding_service)
+    if model_registry.multi_model:
+        print(f"[init] Modelos disponíveis: {', '.join(sorted(model_registry.models))}")
+    
+    # Persiste o cache de queries e encerra workers ao finalizar
+    # (atexit executa em ordem inversa: close() roda antes de save())
+    atexit.register(embedding_service.query_cache.save)
+    atexit.register(model_registry.close)
+    atexit.register(close_page_extractor)
+    
     # Database
     print("[init] Inicializando banco de dados...")
     db = initialize_database(
         user=os.environ.get('DB_USER'),
         password=os.environ.get('DB_PASSWORD'),
         dsn=os.environ.get('DB_DSN'),
-        embedding_dimension=embedding_dim
+        embedding_dimension=embedding_dim,
+        flexible_dimension=model_registry.multi_model,
+        default_embedding_model=embedding_service.model_name
     )
     
     print("\n" + "="*60)
@@ -139,7 +162,11 @@ def upload_document():
     
     Aceita: multipart/form-data
     - file: arquivo (obrigatório)
-    - metadata: JSON com metadados (opcional)
+    - metadata: JSON com metadados (opcional); "language" indica o idioma do
+      documento para o OCR ("pt", "en", "pt+en"...), sem detecção automática
+    - language: idioma do documento para o OCR (opcional; mesmo que metadata.language)
+    - collection: coleção do documento (opcional; define o modelo de embedding)
+    - model: modelo de embedding (opcional; alias ou nome em EMBEDDING_MODELS)
     
     Retorna: informações do documento e chunks criados
     """
@@ -162,18 +189,32 @@ def upload_document():
         except json.JSONDecodeError:
             return jsonify({"error": "Metadados inválidos (JSON esperado)"}), 400
     
+    collection = request.form.get('collection') or None
+    model = request.form.get('model') or None
+    language = request.form.get('language') or (
+        metadata.get('language') if isinstance(metadata, dict) else None
+    )
+    
+    spooled = None
     try:
-        # Lê conteúdo do arquivo
+        # Grava o arquivo em UPLOAD_FOLDER em blocos (SHA-256 calculado na cópia)
         filename = secure_filename(file.filename)
-        file_content = file.read()
-        file_size = len(file_content)
+        spooled = spool_stream(
+            file.stream,
+            app.config['UPLOAD_FOLDER'],
+            suffix=os.path.splitext(filename)[1]
+        )
+        file_size = spooled.size
         file_type = file.content_type or 'application/octet-stream'
         
         print(f"\n[upload] Processando arquivo: {filename}")
         print(f"[upload] Tipo: {file_type}, Tamanho: {file_size} bytes")
         
+        # Modelo de embedding da coleção/requisição (também usado no chunking por tokens)
+        embedding_service = get_model_registry().get(model=model, collection=collection)
+        
         # Processa documento
-        doc_processor = create_document_processor()
+        doc_processor = create_document_processor(tokenizer=embedding_service, language=language)
         
         if not doc_processor.is_supported_file(filename, file_type):
             return jsonify({
@@ -181,31 +222,59 @@ def upload_document():
                 "supported_types": doc_processor.SUPPORTED_EXTENSIONS
             }), 400
         
-        # Extrai texto e cria chunks
-        process_result = doc_processor.process_document(
-            content=file_content,
-            filename=filename,
-            mime_type=file_type
-        )
-        
-        # Gera embeddings
-        embedding_service = get_embedding_service()
-        chunks_with_embeddings = embedding_service.encode_chunks(process_result['chunks'])
-        
-        # Salva no banco de dados
+        # Dimensão reduzida da coleção (Matryoshka), se configurada
+        model_registry = get_model_registry()
+        short_dimension = model_registry.dimension_for(collection)
         db = get_database()
         
-        # Insere documento
-        document_id = db.insert_document(
-            filename=filename,
-            file_type=file_type,
-            file_size=file_size,
-            content_hash=process_result['content_hash'],
-            metadata=metadata
-        )
-        
-        # Insere chunks
-        chunks_inserted = db.insert_chunks(document_id, chunks_with_embeddings)
+        if streaming_enabled():
+            # Extração, chunking, embeddings e inserção em estágios com filas limitadas
+            process_result = create_ingest_pipeline(
+                doc_processor,
+                embedding_service,
+                db,
+                short_dimension=short_dimension,
+                keep_full=model_registry.keep_full
+            ).run(
+                content=spooled,
+                filename=filename,
+                file_type=file_type,
+                metadata=metadata,
+                collection=collection
+            )
+            document_id = process_result['document_id']
+            chunks_inserted = process_result['chunks_inserted']
+        else:
+            # Extrai texto e cria chunks
+            process_result = doc_processor.process_document(
+                content=spooled,
+                filename=filename,
+                mime_type=file_type
+            )
+            
+            # Gera embeddings (e vetores reduzidos, se a coleção usar Matryoshka)
+            chunks_with_embeddings = embedding_service.encode_chunks(
+                process_result['chunks'],
+                short_dimension=short_dimension,
+                keep_full=model_registry.keep_full
+            )
+            
+            # Insere documento
+            document_id = db.insert_document(
+                filename=filename,
+                file_type=file_type,
+                file_size=file_size,
+                content_hash=process_result['content_hash'],
+                metadata=metadata,
+                collection=collection
+            )
+            
+            # Insere chunks
+            chunks_inserted = db.insert_chunks(
+                document_id,
+                chunks_with_embeddings,
+                embedding_model=embedding_service.model_name
+            )
         
         processing_time = time.time() - start_time
         
@@ -218,7 +287,12 @@ def upload_document():
             "file_size": file_size,
             "text_length": process_result['text_length'],
             "chunks_created": chunks_inserted,
+            "chunking": process_result['chunking'],
+            "extraction": process_result['extraction'],
+            "collection": collection,
+            "embedding_model": embedding_service.model_name,
             "embedding_dimension": embedding_service.get_dimension(),
+            "embedding_short_dimension": short_dimension,
             "processing_time": round(processing_time, 2)
         }), 201
         
@@ -229,6 +303,9 @@ def upload_document():
     except Exception as e:
         print(f"[upload] Erro inesperado: {e}")
         return jsonify({"error": f"Erro ao processar documento: {str(e)}"}), 500
+    finally:
+        if spooled is not None:
+            spooled.remove()
 
 @app.route("/api/v1/documents", methods=["GET"])
 def list_documents():
@@ -308,6 +385,183 @@ def delete_document(document_id):
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
+def _chunking_options(body: dict) -> dict:
+    """Parâmetros de chunking do corpo da requisição (os ausentes vêm do ambiente)"""
+    options = {}
+    
+    for key in ('chunk_size', 'chunk_overlap', 'chunk_tokens', 'chunk_overlap_tokens'):
+        if body.get(key) is not None:
+            try:
+                options[key] = int(body[key])
+            except (TypeError, ValueError):
+                raise ValueError(f"Parâmetro inválido: {key}")
+    
+    if body.get('chunk_unit'):
+        options['chunk_unit'] = str(body['chunk_unit'])
+    
+    return options
+
+def _check_rechunk_model(collection: str = None, model: str = None) -> None:
+    """
+    Rejeita um modelo diferente do modelo da coleção
+    
+    O rechunk substitui os chunks de documentos já indexados; com outro
+    modelo, a coleção passaria a misturar vetores de modelos diferentes.
+    """
+    if not model:
+        return
+    
+    model_registry = get_model_registry()
+    collection_model = model_registry.resolve(collection=collection)
+    if model_registry.resolve(model=model) != collection_model:
+        raise ValueError(
+            f"O rechunk usa o modelo da coleção ({collection_model}); "
+            f"modelo solicitado: {model_registry.resolve(model=model)}"
+        )
+
+def _rechunk(document: dict, options: dict, model: str = None):
+    """
+    Refaz o chunking de um documento com o texto do cache de extração
+    
+    Returns:
+        Resultado de IngestPipeline.rechunk ou None se o texto extraído
+        não estiver no cache
+    """
+    model_registry = get_model_registry()
+    collection = document.get('collection')
+    _check_rechunk_model(collection, model)
+    embedding_service = model_registry.get(collection=collection)
+    
+    doc_processor = create_document_processor(tokenizer=embedding_service, **options)
+    pages = doc_processor.cached_pages(document['content_hash'])
+    
+    if pages is None:
+        return None
+    
+    return create_ingest_pipeline(
+        doc_processor,
+        embedding_service,
+        get_database(),
+        short_dimension=model_registry.dimension_for(collection),
+        keep_full=model_registry.keep_full
+    ).rechunk(document, pages)
+
+@app.route("/api/v1/documents/<document_id>/rechunk", methods=["POST"])
+def rechunk_document(document_id):
+    """
+    Refaz o chunking de um documento sem novo upload
+    
+    Usa o texto do cache de extração (EXTRACTION_CACHE_DIR); apenas os
+    chunks com texto novo geram embeddings, e o novo conjunto substitui o
+    anterior atomicamente.
+    
+    Path params:
+    - document_id: ID do documento
+    
+    Body (JSON, todos opcionais; os ausentes vêm do ambiente):
+    - chunk_size, chunk_overlap, chunk_unit, chunk_tokens, chunk_overlap_tokens
+    - model: modelo de embedding; apenas o modelo da coleção do documento é aceito
+    """
+    start_time = time.time()
+    body = request.get_json(silent=True) or {}
+    
+    try:
+        options = _chunking_options(body)
+        
+        document = get_database().get_document(document_id)
+        if not document:
+            return jsonify({"error": "Documento não encontrado"}), 404
+        
+        result = _rechunk(document, options, model=body.get('model') or None)
+        
+        if result is None:
+            return jsonify({
+                "error": "Texto extraído do documento não está no cache de extração; "
+                         "reenvie o arquivo para refazer o chunking"
+            }), 409
+        
+        result['processing_time'] = round(time.time() - start_time, 2)
+        return jsonify(result)
+        
+    except ChunksChangedError as e:
+        return jsonify({"error": str(e)}), 409
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    except RuntimeError as e:
+        return jsonify({"error": str(e)}), 500
+    except Exception as e:
+        print(f"[rechunk] Erro inesperado: {e}")
+        return jsonify({"error": f"Erro ao refazer chunking: {str(e)}"}), 500
+
+@app.route("/api/v1/collections/<collection>/rechunk", methods=["POST"])
+def rechunk_collection(collection):
+    """
+    Refaz o chunking de todos os documentos de uma coleção
+    
+    Path params:
+    - collection: nome da coleção
+    
+    Body (JSON): mesmos parâmetros de /api/v1/documents/<id>/rechunk
+    
+    Documentos sem texto no cache de extração são ignorados (skipped).
+    """
+    start_time = time.time()
+    body = request.get_json(silent=True) or {}
+    
+    try:
+        options = _chunking_options(body)
+        model = body.get('model') or None
+        db = get_database()
+        
+        # Valida os parâmetros antes de percorrer a coleção
+        create_document_processor(**options)
+        _check_rechunk_model(collection, model)
+        
+        results = []
+        offset = 0
+        
+        while True:
+            documents = db.list_documents(limit=1000, offset=offset, collection=collection)
+            
+            for document in documents:
+                entry = {"document_id": document['id'], "filename": document['filename']}
+                try:
+                    result = _rechunk(document, options, model=model)
+                    if result is None:
+                        entry['status'] = "skipped"
+                    else:
+                        entry.update(status="rechunked", chunks=result['chunks'],
+                                     chunks_reused=result['chunks_reused'],
+                                     chunks_embedded=result['chunks_embedded'],
+                                     chunks_removed=result['chunks_removed'])
+                except Exception as e:
+                    print(f"[rechunk] Falha no documento {document['id']}: {e}")
+                    entry.update(status="error", error=str(e))
+                results.append(entry)
+            
+            if len(documents) < 1000:
+                break
+            offset += len(documents)
+        
+        def count(status):
+            return sum(1 for entry in results if entry['status'] == status)
+        
+        return jsonify({
+            "collection": collection,
+            "documents": results,
+            "rechunked": count("rechunked"),
+            "skipped": count("skipped"),
+            "failed": count("error"),
+            "chunks_embedded": sum(entry.get('chunks_embedded', 0) for entry in results),
+            "chunks_reused": sum(entry.get('chunks_reused', 0) for entry in results),
+            "processing_time": round(time.time() - start_time, 2)
+        })
+        
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
 @app.route("/api/v1/search", methods=["POST"])
 def search_documents():
     """
@@ -317,6 +571,11 @@ def search_documents():
     - query: texto de busca (obrigatório)
     - top_k: número de resultados (padrão: 5)
     - threshold: threshold mínimo de similaridade 0-1 (padrão: 0.0)
+    - collection: restringe a busca a uma coleção (opcional)
+    - model: modelo de embedding (opcional; padrão: modelo da coleção ou padrão)
+    - rescore: em coleções com dimensão reduzida, reordena os candidatos
+      pelos vetores completos (padrão: true)
+    - candidates: candidatos do primeiro estágio (padrão: top_k x EMBEDDING_RESCORE_CANDIDATES)
     """
     try:
         body = request.get_json(force=True, silent=False) or {}
@@ -327,6 +586,10 @@ def search_documents():
         
         top_k = body.get('top_k', 5)
         threshold = body.get('threshold', 0.0)
+        collection = body.get('collection') or None
+        model = body.get('model') or None
+        rescore = body.get('rescore', True)
+        candidates = body.get('candidates')
         
         # Valida parâmetros
         if not isinstance(top_k, int) or top_k < 1 or top_k > 100:
@@ -335,19 +598,43 @@ def search_documents():
         if not isinstance(threshold, (int, float)) or threshold < 0 or threshold > 1:
             return jsonify({"error": "threshold deve estar entre 0 e 1"}), 400
         
+        if not isinstance(rescore, bool):
+            return jsonify({"error": "rescore deve ser booleano"}), 400
+        
+        if candidates is not None and (not isinstance(candidates, int) or candidates < top_k or candidates > 1000):
+            return jsonify({"error": "candidates deve estar entre top_k e 1000"}), 400
+        
         print(f"\n[search] Query: {query[:100]}...")
         print(f"[search] top_k={top_k}, threshold={threshold}")
         
-        # Gera embedding da query
-        embedding_service = get_embedding_service()
-        query_embedding = embedding_service.encode_text(query)
+        # Gera embedding da query com o mesmo modelo dos chunks consultados
+        model_registry = get_model_registry()
+        embedding_service = model_registry.get(model=model, collection=collection)
+        
+        # Modo database: o embedding da query é calculado no próprio SELECT
+        query_embedding = None if embedding_service.in_database \
+            else embedding_service.encode_text(query)
+        
+        # Coleções com dimensão reduzida: busca em dois estágios
+        short_dimension = model_registry.dimension_for(collection) if query_embedding is not None else None
+        short_embedding = embedding_service.reduce_dimension(query_embedding, short_dimension) \
+            if short_dimension else None
+        
+        if short_dimension and candidates is None:
+            candidates = top_k * model_registry.rescore_factor
         
         # Busca no banco de dados
         db = get_database()
         results = db.search_similar_chunks(
             query_embedding=query_embedding,
             top_k=top_k,
-            threshold=threshold
+            threshold=threshold,
+            embedding_model=embedding_service.model_name,
+            collection=collection,
+            short_embedding=short_embedding,
+            rescore=rescore,
+            candidates=candidates,
+            query_text=query
         )
         
         print(f"[search] Encontrados {len(results)} resultados")
@@ -357,7 +644,11 @@ def search_documents():
             "query": query,
             "total_results": len(results),
             "top_k": top_k,
-            "threshold": threshold
+            "threshold": threshold,
+            "collection": collection,
+            "embedding_model": embedding_service.model_name,
+            "embedding_short_dimension": short_dimension,
+            "rescored": bool(short_dimension and rescore)
         })
         
     except ValueError as e:
@@ -380,13 +671,22 @@ def get_stats():
         total_size = sum(doc.get('file_size', 0) for doc in documents)
         
         embedding_service = get_embedding_service()
+        extraction_cache = get_extraction_cache()
+        ocr_cache = get_ocr_cache()
         
         return jsonify({
             "total_documents": total_documents,
             "total_chunks": total_chunks,
             "total_size_bytes": total_size,
             "embedding_model": embedding_service.model_name,
-            "embedding_dimension": embedding_service.get_dimension()
+            "embedding_backend": embedding_service.backend,
+            "embedding_dimension": embedding_service.get_dimension(),
+            "query_cache": embedding_service.query_cache.stats(),
+            "extraction_cache": extraction_cache.stats() if extraction_cache else None,
+            # Hits e misses apenas deste processo (OCR nos workers do pool não entra)
+            "ocr_cache": ocr_cache.stats() if ocr_cache else None,
+            "micro_batching": embedding_service.batcher.stats() if embedding_service.batcher else None,
+            "models": get_model_registry().stats()
         })
         
     except Exception as e:
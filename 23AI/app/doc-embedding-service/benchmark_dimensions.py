@@ -0,0 +1,188 @@
+"""
+Disclaimer:
+
+Este código é fornecido como um exemplo open-source de contribuição comunitária para implementação de soluções utilizando a plataforma Oracle.
+É distribuído "AS IS" (como está), sem garantias, responsabilidades ou suporte de qualquer natureza.
+A Oracle Corporation não assume qualquer responsabilidade pelo conteúdo, precisão, funcionalidade ou forma deste material.
+"""
+
+"""
+benchmark_dimensions.py - Benchmark de Recall vs Latência para Dimensões Reduzidas
+Compara busca com vetores completos, apenas vetores reduzidos (Matryoshka) e
+busca em dois estágios (candidatos reduzidos + reranqueamento completo)
+"""
+
+import os
+import re
+import sys
+import json
+import time
+import argparse
+import numpy as np
+from typing import List, Dict, Any
+
+from embedding_service import create_embedding_service
+from document_processor import create_document_processor
+from vector_store import normalize_rows, exact_top_k
+
+
+def load_corpus(paths: List[str]) -> List[str]:
+    """
+    Carrega arquivos de texto e divide em chunks com o processador padrão
+    
+    Args:
+        paths: Arquivos de texto (.txt, .md)
+    
+    Returns:
+        Lista de chunks de texto
+    """
+    processor = create_document_processor()
+    chunks = []
+    
+    for path in paths:
+        with open(path, encoding="utf-8", errors="ignore") as f:
+            text = f.read()
+        chunks.extend(chunk['text'] for chunk in processor.create_chunks(text))
+    
+    return chunks
+
+
+def make_queries(chunks: List[str], count: int, seed: int) -> List[str]:
+    """Usa uma frase de chunks sorteados como query (simula perguntas sobre o corpus)"""
+    rng = np.random.default_rng(seed)
+    queries = []
+    
+    for index in rng.choice(len(chunks), size=min(count, len(chunks)), replace=False):
+        sentences = [s for s in re.split(r'(?<=[.!?])\s+', chunks[index]) if len(s) > 20]
+        queries.append(sentences[rng.integers(len(sentences))] if sentences else chunks[index][:200])
+    
+    return queries
+
+
+def timed_search(queries: np.ndarray, matrix: np.ndarray, k: int) -> tuple:
+    """Executa a busca exata e retorna (índices, ms por query)"""
+    start = time.perf_counter()
+    _, indices = exact_top_k(queries, matrix, k)
+    elapsed = time.perf_counter() - start
+    return indices, elapsed * 1000 / len(queries)
+
+
+def recall(found: np.ndarray, truth: np.ndarray) -> float:
+    """Recall@k médio em relação ao resultado com vetores completos"""
+    hits = [len(set(f) & set(t)) / len(t) for f, t in zip(found.tolist(), truth.tolist())]
+    return float(np.mean(hits))
+
+
+def run_benchmark(service, chunks: List[str], queries: List[str], top_k: int,
+                  dimensions: List[int], factors: List[int], repeat: int) -> Dict[str, Any]:
+    """
+    Mede recall@k e latência para cada dimensão reduzida
+    
+    A latência é a da busca exata em memória (proxy do custo de
+    VECTOR_DISTANCE por linha, proporcional à dimensão).
+    """
+    full_dimension = service.get_dimension()
+    dimensions = [d for d in dimensions if d < full_dimension]
+    
+    matrix = normalize_rows(service.encode_batch(chunks))
+    query_matrix = normalize_rows(service.encode_batch(queries))
+    
+    def best_of(fn):
+        results = [fn() for _ in range(repeat)]
+        return results[0][0], min(r[1] for r in results)
+    
+    truth, full_ms = best_of(lambda: timed_search(query_matrix, matrix, top_k))
+    
+    report = {
+        'model': service.model_name,
+        'backend': service.backend,
+        'chunks': len(chunks),
+        'queries': len(queries),
+        'top_k': top_k,
+        'full': {'dimension': full_dimension, 'recall': 1.0, 'ms_per_query': round(full_ms, 4)},
+        'reduced': []
+    }
+    
+    for dimension in dimensions:
+        short_matrix = service.reduce_dimension(matrix, dimension)
+        short_queries = service.reduce_dimension(query_matrix, dimension)
+        
+        found, short_ms = best_of(lambda: timed_search(short_queries, short_matrix, top_k))
+        entry = {
+            'dimension': dimension,
+            'storage_ratio': round(dimension / full_dimension, 3),
+            'short_only': {'recall': round(recall(found, truth), 4), 'ms_per_query': round(short_ms, 4)},
+            'two_stage': []
+        }
+        
+        for factor in factors:
+            candidates = top_k * factor
+            
+            def two_stage():
+                start = time.perf_counter()
+                _, candidate_indices = exact_top_k(short_queries, short_matrix, candidates)
+                rescored = []
+                for query, row in zip(query_matrix, candidate_indices):
+                    scores = matrix[row] @ query
+                    rescored.append(row[np.argsort(-scores, kind="stable")[:top_k]])
+                elapsed = time.perf_counter() - start
+                return np.array(rescored), elapsed * 1000 / len(queries)
+            
+            found, stage_ms = best_of(two_stage)
+            entry['two_stage'].append({
+                'candidates': candidates,
+                'recall': round(recall(found, truth), 4),
+                'ms_per_query': round(stage_ms, 4)
+            })
+        
+        report['reduced'].append(entry)
+        print(f"[benchmark] dim={dimension}: recall {entry['short_only']['recall']:.3f} "
+              f"({short_ms:.3f} ms/query), dois estágios: "
+              + ", ".join(f"{s['candidates']}→{s['recall']:.3f}" for s in entry['two_stage']))
+    
+    return report
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Benchmark de dimensões reduzidas (Matryoshka)")
+    parser.add_argument("corpus", nargs="+", help="Arquivos de texto usados como corpus")
+    parser.add_argument("--model", default=os.environ.get("EMBEDDING_MODEL"))
+    parser.add_argument("--backend", default=os.environ.get("EMBEDDING_BACKEND"))
+    parser.add_argument("--dimensions", default="64,128,256,512")
+    parser.add_argument("--factors", default="2,4,8", help="Candidatos por resultado no 1º estágio")
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--top-k", type=int, default=10)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", help="Arquivo JSON de saída (padrão: stdout)")
+    args = parser.parse_args()
+    
+    chunks = load_corpus(args.corpus)
+    if len(chunks) <= args.top_k:
+        print(f"[benchmark] Corpus pequeno demais: {len(chunks)} chunks")
+        return 1
+    
+    service = create_embedding_service(model_name=args.model, backend=args.backend)
+    report = run_benchmark(
+        service,
+        chunks,
+        make_queries(chunks, args.queries, args.seed),
+        top_k=args.top_k,
+        dimensions=[int(d) for d in args.dimensions.split(",")],
+        factors=[int(f) for f in args.factors.split(",")],
+        repeat=args.repeat
+    )
+    service.close()
+    
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(output)
+    else:
+        print(output)
+    
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,335 @@
+"""
+Disclaimer:
+
+Este código é fornecido como um exemplo open-source de contribuição comunitária para implementação de soluções utilizando a plataforma Oracle.
+É distribuído "AS IS" (como está), sem garantias, responsabilidades ou suporte de qualquer natureza.
+A Oracle Corporation não assume qualquer responsabilidade pelo conteúdo, precisão, funcionalidade ou forma deste material.
+"""
+
+"""
+benchmark_embeddings.py - Benchmark de Throughput do EmbeddingService
+Mede encode_text, encode_batch e encode_chunks variando backend, threads,
+tamanho de batch e tamanho de texto, com saída JSON comparável entre commits
+"""
+
+import os
+import sys
+import json
+import time
+import platform
+import argparse
+import resource
+import subprocess
+import tempfile
+import numpy as np
+from datetime import datetime
+from typing import List, Dict, Any, Optional
+
+# Vocabulário do corpus sintético (texto plausível para o tokenizer)
+WORDS = (
+    "contrato prestação serviços cláusula parte valor pagamento prazo documento "
+    "empresa cliente relatório vendas produto região trimestre análise dados "
+    "database vector search embedding model query oracle cloud autonomous "
+    "the of and to in is for on with as by at from this that which"
+).split()
+
+
+def synthetic_corpus(count: int, length: int, seed: int) -> List[str]:
+    """
+    Gera textos sintéticos determinísticos com aproximadamente `length` caracteres
+    
+    Args:
+        count: Número de textos
+        length: Tamanho aproximado em caracteres
+        seed: Semente (mesmos textos entre execuções)
+    
+    Returns:
+        Lista de textos
+    """
+    rng = np.random.default_rng(seed + length)
+    texts = []
+    
+    for _ in range(count):
+        words = []
+        size = 0
+        while size < length:
+            word = WORDS[rng.integers(len(WORDS))]
+            words.append(word)
+            size += len(word) + 1
+        texts.append(" ".join(words)[:length])
+    
+    return texts
+
+
+def document_corpus(paths: List[str]) -> List[str]:
+    """
+    Extrai e divide documentos reais em chunks (mesmo pipeline do upload)
+    
+    Args:
+        paths: Arquivos suportados pelo DocumentProcessor
+    
+    Returns:
+        Lista de textos dos chunks
+    """
+    from document_processor import create_document_processor
+    
+    processor = create_document_processor()
+    texts = []
+    
+    for path in paths:
+        with open(path, "rb") as f:
+            result = processor.process_document(f.read(), os.path.basename(path))
+        texts.extend(chunk['text'] for chunk in result['chunks'])
+    
+    return texts
+
+
+def peak_rss_mb() -> float:
+    """Pico de memória residente do processo em MB"""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reporta KB; macOS reporta bytes
+    return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+
+def summarize(latencies: List[float], texts_per_run: int) -> Dict[str, Any]:
+    """
+    Resume latências (segundos) em p50/p95 (ms) e textos/s
+    
+    Args:
+        latencies: Duração de cada execução
+        texts_per_run: Textos processados por execução
+    
+    Returns:
+        Dicionário com as métricas
+    """
+    values = np.asarray(latencies)
+    return {
+        'runs': len(latencies),
+        'p50_ms': round(float(np.percentile(values, 50)) * 1000, 3),
+        'p95_ms': round(float(np.percentile(values, 95)) * 1000, 3),
+        'texts_per_s': round(texts_per_run * len(latencies) / float(values.sum()), 2),
+        'peak_rss_mb': peak_rss_mb()
+    }
+
+
+def set_threads(backend: str, threads: int) -> None:
+    """Limita as threads de inferência do backend (antes de carregar o modelo)"""
+    os.environ["EMBEDDING_ONNX_THREADS"] = str(threads)
+    os.environ["OMP_NUM_THREADS"] = str(threads)
+    
+    if backend in ("sentence-transformers", "pytorch", "torch"):
+        try:
+            import torch
+            torch.set_num_threads(threads)
+        except ImportError:
+            pass
+
+
+def run_case(backend: str, threads: int, corpora: Dict[str, List[str]],
+             batch_sizes: List[int], repeat: int, query_count: int,
+             model_name: str = None) -> Dict[str, Any]:
+    """
+    Executa todas as medições para um backend e número de threads
+    
+    Returns:
+        Dicionário com carga do modelo e resultados por operação
+    """
+    set_threads(backend, threads)
+    
+    from embedding_service import create_embedding_service
+    
+    start = time.perf_counter()
+    service = create_embedding_service(model_name=model_name, backend=backend)
+    load_s = time.perf_counter() - start
+    
+    results = []
+    case = {
+        'backend': service.backend,
+        'threads': threads,
+        'model': service.model_name,
+        'dimension': service.get_dimension(),
+        'load_s': round(load_s, 3),
+        'rss_after_load_mb': peak_rss_mb(),
+        'micro_batching': service.batcher is not None,
+        'results': results
+    }
+    
+    try:
+        for corpus_name, texts in corpora.items():
+            # Aquecimento (alocações e caches do runtime)
+            service.encode_batch(texts[:8])
+            
+            # encode_text: latência por query, sem cache
+            service.query_cache.clear()
+            latencies = []
+            for text in texts[:query_count]:
+                started = time.perf_counter()
+                service.encode_text(text)
+                latencies.append(time.perf_counter() - started)
+            results.append({'operation': 'encode_text', 'corpus': corpus_name,
+                            **summarize(latencies, 1)})
+            
+            for batch_size in batch_sizes:
+                latencies = []
+                for _ in range(repeat):
+                    started = time.perf_counter()
+                    service.encode_batch(texts, batch_size=batch_size)
+                    latencies.append(time.perf_counter() - started)
+                results.append({'operation': 'encode_batch', 'corpus': corpus_name,
+                                'batch_size': batch_size, 'texts': len(texts),
+                                **summarize(latencies, len(texts))})
+            
+            chunks = [{'index': i, 'text': text, 'size': len(text)} for i, text in enumerate(texts)]
+            latencies = []
+            for _ in range(repeat):
+                started = time.perf_counter()
+                service.encode_chunks(chunks)
+                latencies.append(time.perf_counter() - started)
+            results.append({'operation': 'encode_chunks', 'corpus': corpus_name,
+                            'texts': len(texts), **summarize(latencies, len(texts))})
+    finally:
+        service.close()
+    
+    return case
+
+
+def result_key(case: Dict[str, Any], result: Dict[str, Any]) -> tuple:
+    """Chave que identifica uma medição entre execuções"""
+    return (case['backend'], case['threads'], result['operation'],
+            result['corpus'], result.get('batch_size'))
+
+
+def compare(report: Dict[str, Any], baseline: Dict[str, Any]) -> None:
+    """Imprime a variação de textos/s e p95 em relação a um relatório anterior"""
+    previous = {
+        result_key(case, result): result
+        for case in baseline.get('cases', []) for result in case['results']
+    }
+    
+    print(f"\n[benchmark] Comparação com {baseline.get('commit') or 'baseline'}:")
+    for case in report['cases']:
+        for result in case['results']:
+            old = previous.get(result_key(case, result))
+            if not old:
+                continue
+            speedup = result['texts_per_s'] / old['texts_per_s'] if old['texts_per_s'] else 0
+            print(f"  {case['backend']:<22} t={case['threads']:<2} {result['operation']:<13} "
+                  f"{result['corpus']:<10} bs={str(result.get('batch_size') or '-'):<4} "
+                  f"{old['texts_per_s']:>9.1f} -> {result['texts_per_s']:>9.1f} textos/s "
+                  f"({speedup:.2f}x), p95 {old['p95_ms']:.1f} -> {result['p95_ms']:.1f} ms")
+
+
+def git_commit() -> Optional[str]:
+    """Commit atual (para comparar relatórios)"""
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+            cwd=os.path.dirname(os.path.abspath(__file__)), check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def build_corpora(args) -> Dict[str, List[str]]:
+    """Monta os corpora sintéticos (por tamanho) e de documentos reais"""
+    corpora = {
+        f"synth-{length}": synthetic_corpus(args.texts, length, args.seed)
+        for length in args.lengths
+    }
+    if args.documents:
+        corpora["documents"] = document_corpus(args.documents)
+    return corpora
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Benchmark de throughput do EmbeddingService")
+    parser.add_argument("--model", default=os.environ.get("EMBEDDING_MODEL"))
+    parser.add_argument("--backends", default=os.environ.get("EMBEDDING_BACKEND", "sentence-transformers"),
+                        help="Backends separados por vírgula (ex.: sentence-transformers,onnx)")
+    parser.add_argument("--threads", default=str(os.cpu_count() or 1),
+                        help="Números de threads separados por vírgula")
+    parser.add_argument("--batch-sizes", default="8,32,64")
+    parser.add_argument("--lengths", default="64,512,2048", help="Tamanhos (caracteres) do corpus sintético")
+    parser.add_argument("--texts", type=int, default=256, help="Textos por corpus sintético")
+    parser.add_argument("--documents", nargs="*", default=[], help="Documentos reais (PDF, DOCX, PNG, JPG ou TIFF)")
+    parser.add_argument("--queries", type=int, default=50, help="Chamadas de encode_text por corpus")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", help="Arquivo JSON de saída (padrão: stdout)")
+    parser.add_argument("--compare", help="Relatório JSON anterior para comparação")
+    parser.add_argument("--worker", action="store_true", help=argparse.SUPPRESS)
+    parser.add_argument("--worker-output", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    
+    args.lengths = [int(v) for v in args.lengths.split(",")]
+    batch_sizes = [int(v) for v in args.batch_sizes.split(",")]
+    
+    # Processo filho: um único backend/threads, para isolar memória e threads
+    if args.worker:
+        case = run_case(args.backends, int(args.threads), build_corpora(args), batch_sizes,
+                        args.repeat, args.queries, model_name=args.model)
+        with open(args.worker_output, "w", encoding="utf-8") as f:
+            json.dump(case, f)
+        return 0
+    
+    report = {
+        'commit': git_commit(),
+        'timestamp': datetime.now().isoformat(timespec="seconds"),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+        'parameters': {
+            'batch_sizes': batch_sizes, 'lengths': args.lengths, 'texts': args.texts,
+            'documents': args.documents, 'queries': args.queries, 'repeat': args.repeat,
+            'seed': args.seed
+        },
+        'cases': []
+    }
+    
+    for backend in args.backends.split(","):
+        for threads in args.threads.split(","):
+            print(f"[benchmark] Backend {backend}, {threads} threads...")
+            
+            with tempfile.NamedTemporaryFile(suffix=".json", delete=False) as tmp:
+                worker_output = tmp.name
+            
+            command = [
+                sys.executable, os.path.abspath(__file__), "--worker",
+                "--backends", backend, "--threads", threads,
+                "--batch-sizes", args.batch_sizes, "--lengths", ",".join(map(str, args.lengths)),
+                "--texts", str(args.texts), "--queries", str(args.queries),
+                "--repeat", str(args.repeat), "--seed", str(args.seed),
+                "--worker-output", worker_output
+            ]
+            if args.model:
+                command += ["--model", args.model]
+            if args.documents:
+                command += ["--documents", *args.documents]
+            
+            try:
+                completed = subprocess.run(command, stdout=subprocess.DEVNULL)
+                if completed.returncode != 0:
+                    print(f"[benchmark] Falha no backend {backend} ({threads} threads)")
+                    continue
+                with open(worker_output, encoding="utf-8") as f:
+                    report['cases'].append(json.load(f))
+            finally:
+                os.unlink(worker_output)
+    
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(output)
+        print(f"[benchmark] Resultados salvos em {args.output}")
+    else:
+        print(output)
+    
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            compare(report, json.load(f))
+    
+    return 0 if report['cases'] else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
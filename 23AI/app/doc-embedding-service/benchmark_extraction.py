@@ -0,0 +1,173 @@
+"""
+Disclaimer:
+
+Este código é fornecido como um exemplo open-source de contribuição comunitária para implementação de soluções utilizando a plataforma Oracle.
+É distribuído "AS IS" (como está), sem garantias, responsabilidades ou suporte de qualquer natureza.
+A Oracle Corporation não assume qualquer responsabilidade pelo conteúdo, precisão, funcionalidade ou forma deste material.
+"""
+
+"""
+benchmark_extraction.py - Benchmark dos Backends de Texto de PDF
+Compara throughput (páginas/s) e qualidade do texto (caracteres válidos e
+F1 de palavras contra um texto de referência) de PyPDF2, pypdfium2 e
+pdfminer.six em um corpus fixo
+"""
+
+import os
+import re
+import sys
+import json
+import time
+import argparse
+from collections import Counter
+from typing import Dict, Any, Optional
+
+from page_extraction import (
+    PageExtractor, extract_text_page, count_pages, text_stats,
+    text_backend_available, resolve_text_backend, TEXT_BACKENDS
+)
+
+
+def words(text: str) -> Counter:
+    """Multiconjunto de palavras normalizadas (minúsculas, sem pontuação)"""
+    return Counter(re.findall(r"\w+", text.lower()))
+
+
+def word_f1(found: str, reference: str) -> float:
+    """F1 entre as palavras extraídas e as do texto de referência (ordem ignorada)"""
+    expected = words(reference)
+    extracted = words(found)
+    overlap = sum((expected & extracted).values())
+    if not overlap:
+        return 0.0
+    precision = overlap / sum(extracted.values())
+    recall = overlap / sum(expected.values())
+    return 2 * precision * recall / (precision + recall)
+
+
+def load_reference(path: str, reference_dir: Optional[str]) -> Optional[str]:
+    """Texto de referência do documento: <nome>.txt ao lado do PDF ou em reference_dir"""
+    name = os.path.splitext(os.path.basename(path))[0] + ".txt"
+    candidate = os.path.join(reference_dir or os.path.dirname(path), name)
+    if not os.path.exists(candidate):
+        return None
+    with open(candidate, encoding="utf-8", errors="ignore") as f:
+        return f.read()
+
+
+def run_backend(extractor: PageExtractor, backend: str, path: str,
+                repeat: int) -> Dict[str, Any]:
+    """
+    Extrai todas as páginas com um único backend (sem fallback)
+    
+    Returns:
+        Métricas do documento (melhor tempo entre as repetições)
+    """
+    pages = list(range(count_pages(path)))
+    best = None
+    results = []
+    
+    # Aquecimento (início do pool, imports e abertura do documento)
+    extractor.run(extract_text_page, path, pages[:1], (backend,))
+    
+    for _ in range(repeat):
+        started = time.perf_counter()
+        results = extractor.run(extract_text_page, path, pages, (backend,))
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+    
+    text = "\n\n".join(r['text'] for r in results if r['text'])
+    chars, valid = text_stats(text)
+    
+    return {
+        'pages': len(pages),
+        'seconds': round(best, 4),
+        'pages_per_s': round(len(pages) / best, 2) if best else None,
+        'chars': chars,
+        'valid_ratio': round(valid / chars, 4) if chars else 0.0,
+        'failed_pages': [r['page'] + 1 for r in results if r['error']],
+        'text': text
+    }
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Benchmark dos backends de texto de PDF")
+    parser.add_argument("corpus", nargs="+", help="PDFs do corpus")
+    parser.add_argument("--backends", default=",".join(TEXT_BACKENDS),
+                        help="Backends separados por vírgula (ex.: pdfium,pypdf2,pdfminer)")
+    parser.add_argument("--reference-dir", help="Diretório com <nome>.txt de referência "
+                                                "(padrão: ao lado de cada PDF)")
+    parser.add_argument("--reference-backend",
+                        help="Sem .txt de referência, compara com o texto deste backend")
+    parser.add_argument("--workers", type=int, default=0, help="Processos do pool (0 = sem pool)")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--output", help="Arquivo JSON de saída (padrão: stdout)")
+    args = parser.parse_args()
+    
+    backends = []
+    for name in args.backends.split(","):
+        backend = resolve_text_backend(name)
+        if text_backend_available(backend):
+            backends.append(backend)
+        else:
+            print(f"[benchmark] Backend {backend} não instalado - ignorado")
+    
+    if not backends:
+        print("[benchmark] Nenhum backend de PDF instalado")
+        return 1
+    
+    reference_backend = resolve_text_backend(args.reference_backend) if args.reference_backend else None
+    extractor = PageExtractor(workers=args.workers, min_pages=1)
+    
+    report = {'backends': backends, 'workers': args.workers, 'documents': [], 'summary': {}}
+    
+    try:
+        for path in args.corpus:
+            print(f"[benchmark] {path}")
+            runs = {backend: run_backend(extractor, backend, path, args.repeat) for backend in backends}
+            
+            reference = load_reference(path, args.reference_dir)
+            reference_source = "txt" if reference is not None else None
+            if reference is None and reference_backend in runs:
+                reference = runs[reference_backend]['text']
+                reference_source = reference_backend
+            
+            for backend, run in runs.items():
+                text = run.pop('text')
+                run['word_f1'] = round(word_f1(text, reference), 4) if reference is not None else None
+                print(f"  {backend:<9} {run['pages_per_s']:>9} páginas/s  "
+                      f"válidos {run['valid_ratio']:.3f}  F1 {run['word_f1']}  "
+                      f"falhas {len(run['failed_pages'])}")
+            
+            report['documents'].append({
+                'path': path, 'reference': reference_source, 'backends': runs
+            })
+    finally:
+        extractor.close()
+    
+    # Totais por backend: páginas/s sobre o corpus inteiro e F1 médio
+    for backend in backends:
+        runs = [doc['backends'][backend] for doc in report['documents']]
+        pages = sum(run['pages'] for run in runs)
+        seconds = sum(run['seconds'] for run in runs)
+        scores = [run['word_f1'] for run in runs if run['word_f1'] is not None]
+        report['summary'][backend] = {
+            'pages': pages,
+            'pages_per_s': round(pages / seconds, 2) if seconds else None,
+            'mean_word_f1': round(sum(scores) / len(scores), 4) if scores else None,
+            'failed_pages': sum(len(run['failed_pages']) for run in runs)
+        }
+    
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(output)
+        print(f"[benchmark] Resultados salvos em {args.output}")
+    else:
+        print(output)
+    
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
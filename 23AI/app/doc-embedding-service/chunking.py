@@ -0,0 +1,164 @@
+"""
+Disclaimer:
+
+Este código é fornecido como um exemplo open-source de contribuição comunitária para implementação de soluções utilizando a plataforma Oracle.
+É distribuído "AS IS" (como está), sem garantias, responsabilidades ou suporte de qualquer natureza.
+A Oracle Corporation não assume qualquer responsabilidade pelo conteúdo, precisão, funcionalidade ou forma deste material.
+"""
+
+"""
+chunking.py - Chunking por Caracteres em Tempo Linear
+Procura os fins de frase ('. ') e de linha ('\\n') apenas na janela de
+busca de cada chunk e monta os chunks como pares de offsets, materializando
+o texto apenas quando o chunk é emitido
+"""
+
+import re
+from typing import List, Tuple, Iterable, Iterator
+
+
+_NON_SPACE = re.compile(r"\S")
+
+# Distância além de chunk_size em que se procura uma quebra natural
+BOUNDARY_SEARCH = 100
+
+
+class BoundaryBuffer:
+    """
+    Texto ainda não consumido de um documento lido por partes
+    
+    As quebras são procuradas com str.find/rfind limitados à janela de
+    busca de cada chunk (no máximo chunk_size + BOUNDARY_SEARCH caracteres),
+    e o prefixo consumido só é descartado quando passa da metade do buffer,
+    de modo que o custo total é linear no tamanho do documento.
+    """
+    
+    def __init__(self):
+        self.text = ""
+        self.base = 0           # offset absoluto de text[0]
+        self.end = 0            # offset absoluto do fim do texto lido até agora
+    
+    def append(self, part: str) -> None:
+        """Anexa uma parte do texto"""
+        self.text += part
+        self.end += len(part)
+    
+    def discard(self, upto: int) -> None:
+        """Descarta o texto antes de `upto` quando ele passa da metade do buffer"""
+        consumed = upto - self.base
+        if consumed <= len(self.text) // 2 or upto >= self.end:
+            return
+        
+        self.text = self.text[consumed:]
+        self.base = upto
+    
+    def chunk_end(self, start: int, chunk_size: int) -> int:
+        """
+        Fim do chunk iniciado em `start`
+        
+        Mesma regra do chunking original: o primeiro '. ' e, na falta dele,
+        a primeira '\\n' entre start + chunk_size e 100 caracteres depois;
+        senão o último espaço depois de `start`. Requer o texto lido até
+        start + chunk_size + 100 (ou até o fim do documento).
+        """
+        end = start + chunk_size
+        text_end = self.end
+        
+        if end >= text_end:
+            return end
+        
+        # Janela de busca em offsets locais de self.text
+        base = self.base
+        search_start = end - base
+        search_end = min(end + BOUNDARY_SEARCH, text_end) - base
+        
+        period_pos = self.text.find(". ", search_start, search_end)
+        if period_pos != -1:
+            return period_pos + base + 1
+        
+        newline_pos = self.text.find("\n", search_start, search_end)
+        if newline_pos != -1:
+            return newline_pos + base
+        
+        space_pos = self.text.rfind(" ", start - base, search_end)
+        if space_pos != -1 and space_pos + base > start:
+            return space_pos + base
+        
+        return end
+    
+    def has_text(self, start: int, end: int) -> bool:
+        """Indica se o trecho [start, end) tem algum caractere não branco"""
+        return _NON_SPACE.search(self.text, start - self.base, end - self.base) is not None
+    
+    def slice(self, start: int, end: int) -> str:
+        """Texto do trecho [start, end) em offsets absolutos"""
+        return self.text[start - self.base:end - self.base]
+
+
+def iter_spans(buffer: BoundaryBuffer, parts: Iterable[str], chunk_size: int,
+               chunk_overlap: int, separator: str = "\n\n") -> Iterator[Tuple[int, int]]:
+    """
+    Offsets (start, end) dos chunks do texto das partes unidas por `separator`
+    
+    Os chunks coincidem com os do chunking original por caracteres; a única
+    diferença é que o início do próximo chunk sempre avança: quando
+    end - chunk_overlap não passaria do início atual (palavras mais longas
+    que chunk_size - chunk_overlap), o próximo chunk começa em `end`, sem
+    sobreposição, em vez de repetir o mesmo trecho indefinidamente.
+    
+    Trechos só com espaços em branco não são emitidos. Enquanto o gerador
+    está suspenso em um yield, buffer.slice(start, end) devolve o texto do
+    chunk.
+    
+    Args:
+        buffer: Buffer vazio que receberá o texto (buffer.end é o tamanho final)
+        parts: Partes do texto, em ordem
+        chunk_size: Tamanho dos chunks em caracteres
+        chunk_overlap: Sobreposição entre chunks em caracteres
+        separator: Texto inserido entre partes não vazias
+    
+    Yields:
+        Pares (start, end) de offsets no texto inteiro
+    """
+    parts = iter(parts)
+    lookahead = chunk_size + BOUNDARY_SEARCH
+    start = 0
+    exhausted = False
+    
+    while True:
+        # Lê partes até ser possível definir o fim do próximo chunk
+        while not exhausted and buffer.end < start + lookahead:
+            part = next(parts, None)
+            if part is None:
+                exhausted = True
+            elif part:
+                buffer.append(separator + part if buffer.end else part)
+        
+        if start >= buffer.end:
+            return
+        
+        end = buffer.chunk_end(start, chunk_size)
+        
+        if buffer.has_text(start, end):
+            yield start, end
+        
+        # Próximo chunk com sobreposição, sempre avançando
+        next_start = end - chunk_overlap
+        start = next_start if next_start > start else end
+        
+        buffer.discard(start)
+
+
+def chunk_spans(text: str, chunk_size: int, chunk_overlap: int) -> List[Tuple[int, int]]:
+    """
+    Offsets (start, end) dos chunks de um texto completo
+    
+    Args:
+        text: Texto a dividir
+        chunk_size: Tamanho dos chunks em caracteres
+        chunk_overlap: Sobreposição entre chunks em caracteres
+    
+    Returns:
+        Lista de pares (start, end); o texto de cada chunk é text[start:end].strip()
+    """
+    return list(iter_spans(BoundaryBuffer(), [text], chunk_size, chunk_overlap))
@@ -12,13 +12,19 @@ Gerencia conexão, criação de tabelas e operações CRUD para documentos e chu
 """
 
 import os
+import re
 import json
 import uuid
+import hashlib
 from typing import List, Dict, Any, Optional
 from datetime import datetime
 import numpy as np
 
 
+class ChunksChangedError(RuntimeError):
+    """Os chunks do documento mudaram (ou o documento foi removido) durante a substituição"""
+
+
 class DatabaseManager:
     """Gerenciador de banco de dados ADW 23AI"""
     
@@ -97,15 +103,26 @@ class DatabaseManager:
         if not self.connection:
             self.connect()
     
-    def initialize_schema(self, embedding_dimension: int = 384) -> None:
+    def initialize_schema(self, embedding_dimension: int = 384,
+                          flexible_dimension: bool = False,
+                          default_embedding_model: str = None,
+                          migrate_vector_column: bool = None) -> None:
         """
         Cria as tabelas necessárias se não existirem
         
         Args:
             embedding_dimension: Dimensão dos vetores de embedding
+            flexible_dimension: Cria a coluna como VECTOR(*) para múltiplos modelos
+            default_embedding_model: Modelo atribuído a chunks antigos sem modelo
+                registrado (só se a coluna existente tiver a dimensão do modelo)
+            migrate_vector_column: Converte uma coluna de dimensão fixa já existente
+                em VECTOR(*) quando flexible_dimension é usado (padrão: DB_MIGRATE_VECTOR_COLUMN)
         """
         self.ensure_connection()
         self.embedding_dimension = embedding_dimension
+        vector_dimension = "*" if flexible_dimension else str(embedding_dimension)
+        if migrate_vector_column is None:
+            migrate_vector_column = os.environ.get("DB_MIGRATE_VECTOR_COLUMN", "false").lower() == "true"
         
         cursor = self.connection.cursor()
         
@@ -122,6 +139,7 @@ class DatabaseManager:
                         upload_date TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
                         content_hash VARCHAR2(64),
                         metadata CLOB,
+                        collection VARCHAR2(200),
                         created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
                     )';
                 EXCEPTION
@@ -135,7 +153,7 @@ class DatabaseManager:
             """)
             
             # Tabela de chunks
-            print(f"[database] Criando tabela DOCUMENT_CHUNKS (embedding dimension: {embedding_dimension})...")
+            print(f"[database] Criando tabela DOCUMENT_CHUNKS (embedding dimension: {vector_dimension})...")
             cursor.execute(f"""
                 BEGIN
                     EXECUTE IMMEDIATE 'CREATE TABLE DOCUMENT_CHUNKS (
@@ -144,7 +162,10 @@ class DatabaseManager:
                         chunk_index NUMBER NOT NULL,
                         chunk_text CLOB NOT NULL,
                         chunk_size NUMBER NOT NULL,
-                        embedding VECTOR({embedding_dimension}, FLOAT32),
+                        embedding VECTOR({vector_dimension}, FLOAT32),
+                        embedding_model VARCHAR2(200),
+                        embedding_short VECTOR(*, FLOAT32),
+                        chunk_hash VARCHAR2(64),
                         created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
                         CONSTRAINT fk_document FOREIGN KEY (document_id) 
                             REFERENCES DOCUMENTS(id) ON DELETE CASCADE
@@ -159,6 +180,54 @@ class DatabaseManager:
                 END;
             """)
             
+            # Colunas adicionadas em versões posteriores (tabelas já existentes)
+            self._add_column(cursor, "DOCUMENTS", "collection VARCHAR2(200)")
+            self._add_column(cursor, "DOCUMENT_CHUNKS", "embedding_model VARCHAR2(200)")
+            self._add_column(cursor, "DOCUMENT_CHUNKS", "embedding_short VECTOR(*, FLOAT32)")
+            self._add_column(cursor, "DOCUMENT_CHUNKS", "chunk_hash VARCHAR2(64)")
+            
+            # Dimensão declarada da coluna existente (a tabela pode ser anterior à configuração atual)
+            column_dimension = self._vector_column_dimension(cursor, "DOCUMENT_CHUNKS", "EMBEDDING")
+            
+            # Conversão para VECTOR(*) interrompida depois de remover a coluna antiga
+            if (column_dimension is None and flexible_dimension and migrate_vector_column
+                    and self._vector_column_dimension(cursor, "DOCUMENT_CHUNKS", "EMBEDDING_FLEX") == "*"):
+                cursor.execute("ALTER TABLE DOCUMENT_CHUNKS RENAME COLUMN embedding_flex TO embedding")
+                column_dimension = "*"
+            
+            # Chunks antigos sem modelo registrado: só atribui o modelo padrão se a
+            # coluna tiver a dimensão dele (de outra dimensão, não foram gerados por ele)
+            if default_embedding_model and column_dimension == str(embedding_dimension):
+                cursor.execute("""
+                    UPDATE DOCUMENT_CHUNKS SET embedding_model = :1
+                    WHERE embedding_model IS NULL
+                """, (default_embedding_model,))
+            elif default_embedding_model:
+                cursor.execute("SELECT COUNT(*) FROM DOCUMENT_CHUNKS WHERE embedding_model IS NULL")
+                unassigned = cursor.fetchone()[0]
+                if unassigned:
+                    print(f"[database] AVISO: {unassigned} chunks sem modelo registrado "
+                          f"(coluna VECTOR({column_dimension or '?'}), modelo padrão de dimensão "
+                          f"{embedding_dimension}) - modelo não atribuído")
+            
+            if column_dimension is not None and column_dimension != vector_dimension:
+                if flexible_dimension and column_dimension != "*":
+                    if not migrate_vector_column:
+                        raise RuntimeError(
+                            f"DOCUMENT_CHUNKS.embedding é VECTOR({column_dimension}); múltiplos "
+                            f"modelos (EMBEDDING_MODELS) exigem VECTOR(*). Defina "
+                            f"DB_MIGRATE_VECTOR_COLUMN=true para converter a coluna na "
+                            f"inicialização (remove o índice vetorial) ou remova EMBEDDING_MODELS"
+                        )
+                    self._migrate_flexible_vector(cursor)
+                    column_dimension = "*"
+                elif not flexible_dimension and column_dimension != "*":
+                    raise RuntimeError(
+                        f"DOCUMENT_CHUNKS.embedding é VECTOR({column_dimension}), mas o modelo "
+                        f"padrão gera vetores de dimensão {embedding_dimension}; use um modelo "
+                        f"da mesma dimensão ou EMBEDDING_MODELS com DB_MIGRATE_VECTOR_COLUMN=true"
+                    )
+            
             # Índice para busca por documento
             print("[database] Criando índices...")
             cursor.execute("""
@@ -175,14 +244,10 @@ class DatabaseManager:
                 END;
             """)
             
-            # Índice vetorial para busca semântica (Oracle 23AI)
-            print("[database] Criando índice vetorial para busca semântica...")
             cursor.execute("""
                 BEGIN
-                    EXECUTE IMMEDIATE 'CREATE VECTOR INDEX idx_chunks_embedding 
-                        ON DOCUMENT_CHUNKS(embedding) 
-                        ORGANIZATION NEIGHBOR PARTITIONS
-                        WITH DISTANCE COSINE';
+                    EXECUTE IMMEDIATE 'CREATE INDEX idx_chunks_model 
+                        ON DOCUMENT_CHUNKS(embedding_model)';
                 EXCEPTION
                     WHEN OTHERS THEN
                         IF SQLCODE = -955 THEN
@@ -193,6 +258,28 @@ class DatabaseManager:
                 END;
             """)
             
+            # Índice vetorial para busca semântica (Oracle 23AI)
+            # Índices vetoriais exigem dimensão fixa; com VECTOR(*) a busca é exata
+            if flexible_dimension or column_dimension == "*":
+                print("[database] Coluna VECTOR(*) (múltiplos modelos) - índice vetorial não criado")
+            else:
+                print("[database] Criando índice vetorial para busca semântica...")
+                cursor.execute("""
+                    BEGIN
+                        EXECUTE IMMEDIATE 'CREATE VECTOR INDEX idx_chunks_embedding 
+                            ON DOCUMENT_CHUNKS(embedding) 
+                            ORGANIZATION NEIGHBOR PARTITIONS
+                            WITH DISTANCE COSINE';
+                    EXCEPTION
+                        WHEN OTHERS THEN
+                            IF SQLCODE = -955 THEN
+                                NULL; -- Índice já existe
+                            ELSE
+                                RAISE;
+                            END IF;
+                    END;
+                """)
+            
             self.connection.commit()
             print("[database] Schema inicializado com sucesso")
             
@@ -202,9 +289,171 @@ class DatabaseManager:
         finally:
             cursor.close()
     
+    @staticmethod
+    def _vector_to_str(embedding) -> Optional[str]:
+        """
+        Formata um embedding como string para TO_VECTOR
+        
+        Args:
+            embedding: Array numpy, lista ou None
+            
+        Returns:
+            String no formato '[x, y, ...]' ou None
+        """
+        if embedding is None:
+            return None
+        
+        if isinstance(embedding, np.ndarray):
+            embedding = embedding.tolist()
+        
+        return str(embedding)
+    
+    @staticmethod
+    def _model_identifier(model_name: str) -> str:
+        """
+        Valida o nome de um modelo carregado no banco (DBMS_VECTOR.LOAD_ONNX_MODEL)
+        
+        O nome do modelo não pode ser passado como bind em VECTOR_EMBEDDING,
+        por isso é validado antes de ser interpolado no SQL.
+        
+        Args:
+            model_name: Nome do modelo, opcionalmente com schema (ex.: XPTO_STORE.ALL_MINILM_L12_V2)
+            
+        Returns:
+            Nome do modelo em maiúsculas
+        """
+        if not model_name or not re.fullmatch(r"[A-Za-z][\w$#]*(\.[A-Za-z][\w$#]*)?", model_name):
+            raise ValueError(f"Nome de modelo do banco inválido: {model_name}")
+        return model_name.upper()
+    
+    def _embedding_sql(self, model_name: str, bind: str) -> str:
+        """Expressão SQL que gera o embedding de um bind com o modelo do banco"""
+        return f"VECTOR_EMBEDDING({self._model_identifier(model_name)} USING :{bind} AS DATA)"
+    
+    def embed_texts(self, model_name: str, texts: List[str]) -> np.ndarray:
+        """
+        Gera embeddings com um modelo carregado no banco (VECTOR_EMBEDDING)
+        
+        Args:
+            model_name: Nome do modelo no banco
+            texts: Lista de textos
+            
+        Returns:
+            Array numpy float32 (shape: [n_texts, dimension])
+        """
+        self.ensure_connection()
+        
+        cursor = self.connection.cursor()
+        
+        try:
+            # FROM_VECTOR devolve texto, sem depender do suporte a VECTOR no driver
+            sql = f"SELECT FROM_VECTOR({self._embedding_sql(model_name, 'text')} RETURNING CLOB) FROM DUAL"
+            embeddings = []
+            
+            for text in texts:
+                cursor.execute(sql, {'text': text})
+                value = cursor.fetchone()[0]
+                if hasattr(value, 'read'):
+                    value = value.read()
+                embeddings.append(json.loads(value))
+            
+            return np.asarray(embeddings, dtype=np.float32)
+            
+        except ValueError:
+            raise
+        except Exception as e:
+            raise RuntimeError(f"Erro ao gerar embeddings no banco: {str(e)}")
+        finally:
+            cursor.close()
+    
+    @staticmethod
+    def _add_column(cursor, table: str, column_definition: str) -> None:
+        """
+        Adiciona uma coluna se ainda não existir
+        
+        Args:
+            cursor: Cursor ativo
+            table: Nome da tabela
+            column_definition: Definição da coluna (nome e tipo)
+        """
+        cursor.execute(f"""
+            BEGIN
+                EXECUTE IMMEDIATE 'ALTER TABLE {table} ADD ({column_definition})';
+            EXCEPTION
+                WHEN OTHERS THEN
+                    IF SQLCODE = -1430 THEN
+                        NULL; -- Coluna já existe
+                    ELSE
+                        RAISE;
+                    END IF;
+            END;
+        """)
+    
+    def _vector_column_dimension(self, cursor, table: str, column: str) -> Optional[str]:
+        """
+        Dimensão declarada de uma coluna VECTOR existente
+        
+        Lida do DDL da tabela (DBMS_METADATA), que traz a declaração da
+        coluna como VECTOR(384, FLOAT32, ...) ou VECTOR(*, FLOAT32, ...).
+        
+        Args:
+            cursor: Cursor ativo
+            table: Nome da tabela
+            column: Nome da coluna
+        
+        Returns:
+            "*", a dimensão como texto, ou None se não for possível determinar
+        """
+        try:
+            cursor.execute("SELECT DBMS_METADATA.GET_DDL('TABLE', :1) FROM DUAL", (table,))
+            ddl = cursor.fetchone()[0]
+            if hasattr(ddl, 'read'):
+                ddl = ddl.read()
+        except Exception as e:
+            print(f"[database] AVISO: não foi possível ler o DDL de {table}: {e}")
+            return None
+        
+        match = re.search(rf'"{column}"\s+VECTOR\s*\(\s*(\*|\d+)', ddl, re.IGNORECASE)
+        return match.group(1) if match else None
+    
+    def _migrate_flexible_vector(self, cursor) -> None:
+        """
+        Converte DOCUMENT_CHUNKS.embedding de dimensão fixa em VECTOR(*)
+        
+        Copia os vetores para uma nova coluna VECTOR(*), remove o índice
+        vetorial (exige dimensão fixa) e a coluna antiga, e renomeia a nova.
+        Cada etapa tolera uma execução anterior interrompida.
+        """
+        print("[database] Convertendo DOCUMENT_CHUNKS.embedding para VECTOR(*, FLOAT32)...")
+        
+        self._add_column(cursor, "DOCUMENT_CHUNKS", "embedding_flex VECTOR(*, FLOAT32)")
+        cursor.execute("""
+            UPDATE DOCUMENT_CHUNKS SET embedding_flex = embedding
+            WHERE embedding IS NOT NULL AND embedding_flex IS NULL
+        """)
+        self.connection.commit()
+        
+        cursor.execute("""
+            BEGIN
+                EXECUTE IMMEDIATE 'DROP INDEX idx_chunks_embedding';
+            EXCEPTION
+                WHEN OTHERS THEN
+                    IF SQLCODE = -1418 THEN
+                        NULL; -- Índice não existe
+                    ELSE
+                        RAISE;
+                    END IF;
+            END;
+        """)
+        cursor.execute("ALTER TABLE DOCUMENT_CHUNKS DROP COLUMN embedding")
+        cursor.execute("ALTER TABLE DOCUMENT_CHUNKS RENAME COLUMN embedding_flex TO embedding")
+        
+        print("[database] Coluna convertida - busca exata (sem índice vetorial)")
+    
     def insert_document(self, filename: str, file_type: str, 
                        file_size: int, content_hash: str,
-                       metadata: Dict[str, Any] = None) -> str:
+                       metadata: Dict[str, Any] = None,
+                       collection: str = None) -> str:
         """
         Insere um novo documento
         
@@ -214,6 +463,7 @@ class DatabaseManager:
             file_size: Tamanho em bytes
             content_hash: Hash SHA-256 do conteúdo
             metadata: Metadados adicionais (opcional)
+            collection: Coleção do documento (opcional)
             
         Returns:
             ID do documento inserido
@@ -228,9 +478,10 @@ class DatabaseManager:
         try:
             cursor.execute("""
                 INSERT INTO DOCUMENTS 
-                (id, filename, file_type, file_size, content_hash, metadata)
-                VALUES (:1, :2, :3, :4, :5, :6)
-            """, (document_id, filename, file_type, file_size, content_hash, metadata_json))
+                (id, filename, file_type, file_size, content_hash, metadata, collection)
+                VALUES (:1, :2, :3, :4, :5, :6, :7)
+            """, (document_id, filename, file_type, file_size, content_hash, metadata_json,
+                  collection))
             
             self.connection.commit()
             print(f"[database] Documento inserido: {document_id}")
@@ -243,13 +494,77 @@ class DatabaseManager:
         finally:
             cursor.close()
     
-    def insert_chunks(self, document_id: str, chunks: List[Dict[str, Any]]) -> int:
+    @staticmethod
+    def chunk_hash(text: str) -> str:
         """
-        Insere chunks de um documento
+        Hash SHA-256 do texto de um chunk (identifica chunks iguais entre chunkings)
         
         Args:
+            text: Texto do chunk
+            
+        Returns:
+            Hash em hexadecimal
+        """
+        return hashlib.sha256(text.encode("utf-8")).hexdigest()
+    
+    def _insert_chunk_rows(self, cursor, document_id: str, chunks: List[Dict[str, Any]],
+                           embedding_model: str = None) -> int:
+        """
+        Insere as linhas dos chunks sem commit (a transação é do chamador)
+        
+        Args:
+            cursor: Cursor ativo
             document_id: ID do documento
             chunks: Lista de chunks com texto e embedding
+            embedding_model: Modelo que gerou os embeddings (ou modelo do banco)
+            
+        Returns:
+            Número de chunks inseridos
+        """
+        inserted = 0
+        in_database_sql = None
+        
+        for chunk in chunks:
+            chunk_id = str(uuid.uuid4())
+            chunk_index = chunk['index']
+            chunk_text = chunk['text']
+            chunk_size = chunk['size']
+            chunk_hash = chunk.get('chunk_hash') or self.chunk_hash(chunk_text)
+            
+            # Formata embeddings como string para VECTOR type
+            # (embedding completo pode ser omitido no modo de dimensão reduzida)
+            embedding_str = self._vector_to_str(chunk.get('embedding'))
+            embedding_short_str = self._vector_to_str(chunk.get('embedding_short'))
+            embedding_sql = "TO_VECTOR(:6)"
+            
+            # Modo database: o próprio INSERT gera o embedding a partir do texto
+            if embedding_str is None and chunk.get('embedding_in_database'):
+                in_database_sql = in_database_sql or self._embedding_sql(embedding_model, "6")
+                embedding_sql = in_database_sql
+                embedding_str = chunk_text
+            
+            cursor.execute(f"""
+                INSERT INTO DOCUMENT_CHUNKS 
+                (id, document_id, chunk_index, chunk_text, chunk_size, embedding,
+                 embedding_model, embedding_short, chunk_hash)
+                VALUES (:1, :2, :3, :4, :5, {embedding_sql}, :7, TO_VECTOR(:8), :9)
+            """, (chunk_id, document_id, chunk_index, chunk_text, 
+                  chunk_size, embedding_str, embedding_model, embedding_short_str, chunk_hash))
+            
+            inserted += 1
+        
+        return inserted
+    
+    def insert_chunks(self, document_id: str, chunks: List[Dict[str, Any]],
+                      embedding_model: str = None) -> int:
+        """
+        Insere chunks de um documento
+        
+        Args:
+            document_id: ID do documento
+            chunks: Lista de chunks com texto e embedding (chunks marcados com
+                'embedding_in_database' têm o embedding gerado no INSERT)
+            embedding_model: Modelo que gerou os embeddings (ou modelo do banco)
             
         Returns:
             Número de chunks inseridos
@@ -262,32 +577,7 @@ class DatabaseManager:
         cursor = self.connection.cursor()
         
         try:
-            inserted = 0
-            
-            for chunk in chunks:
-                chunk_id = str(uuid.uuid4())
-                chunk_index = chunk['index']
-                chunk_text = chunk['text']
-                chunk_size = chunk['size']
-                embedding = chunk.get('embedding')
-                
-                # Converte embedding numpy para lista
-                if isinstance(embedding, np.ndarray):
-                    embedding_list = embedding.tolist()
-                else:
-                    embedding_list = embedding
-                
-                # Formata embedding como string para VECTOR type
-                embedding_str = str(embedding_list)
-                
-                cursor.execute("""
-                    INSERT INTO DOCUMENT_CHUNKS 
-                    (id, document_id, chunk_index, chunk_text, chunk_size, embedding)
-                    VALUES (:1, :2, :3, :4, :5, TO_VECTOR(:6))
-                """, (chunk_id, document_id, chunk_index, chunk_text, 
-                      chunk_size, embedding_str))
-                
-                inserted += 1
+            inserted = self._insert_chunk_rows(cursor, document_id, chunks, embedding_model)
             
             self.connection.commit()
             print(f"[database] {inserted} chunks inseridos para documento {document_id}")
@@ -300,6 +590,133 @@ class DatabaseManager:
         finally:
             cursor.close()
     
+    def list_chunk_hashes(self, document_id: str) -> List[Dict[str, Any]]:
+        """
+        Lista os chunks de um documento com o hash do texto
+        
+        Chunks gravados antes da coluna chunk_hash têm o hash calculado a
+        partir do texto.
+        
+        Args:
+            document_id: ID do documento
+            
+        Returns:
+            Lista de dicionários com id, chunk_hash e embedding_model
+        """
+        self.ensure_connection()
+        
+        cursor = self.connection.cursor()
+        
+        try:
+            cursor.execute("""
+                SELECT id, chunk_hash, embedding_model,
+                       CASE WHEN chunk_hash IS NULL THEN chunk_text END
+                FROM DOCUMENT_CHUNKS
+                WHERE document_id = :1
+                ORDER BY chunk_index
+            """, (document_id,))
+            
+            chunks = []
+            
+            for row in cursor:
+                chunk_hash = row[1]
+                if chunk_hash is None:
+                    text = row[3].read() if hasattr(row[3], 'read') else row[3]
+                    chunk_hash = self.chunk_hash(text or "")
+                chunks.append({
+                    'id': row[0],
+                    'chunk_hash': chunk_hash,
+                    'embedding_model': row[2]
+                })
+            
+            return chunks
+            
+        except Exception as e:
+            raise RuntimeError(f"Erro ao listar chunks: {str(e)}")
+        finally:
+            cursor.close()
+    
+    def replace_chunks(self, document_id: str, chunks: List[Dict[str, Any]],
+                       old_chunk_ids: List[str], embedding_model: str = None) -> int:
+        """
+        Substitui o conjunto de chunks de um documento em uma única transação
+        
+        Chunks com 'reuse_chunk_id' são copiados da linha existente (texto e
+        embeddings) com o novo índice; os demais são inseridos com os
+        embeddings recebidos. Os chunks antigos só deixam de ser visíveis
+        no commit, junto com os novos.
+        
+        A linha do documento é bloqueada (SELECT ... FOR UPDATE) durante a
+        transação, e os chunks atuais precisam ser exatamente
+        `old_chunk_ids`: se outra requisição substituiu os chunks (ou
+        removeu o documento) desde a leitura, nada é alterado e
+        ChunksChangedError é levantado.
+        
+        Args:
+            document_id: ID do documento
+            chunks: Novo conjunto de chunks, em ordem
+            old_chunk_ids: IDs dos chunks atuais (removidos no fim)
+            embedding_model: Modelo que gerou os novos embeddings
+            
+        Returns:
+            Número de chunks do novo conjunto
+        """
+        self.ensure_connection()
+        
+        cursor = self.connection.cursor()
+        
+        try:
+            # Serializa substituições concorrentes do mesmo documento
+            cursor.execute("SELECT id FROM DOCUMENTS WHERE id = :1 FOR UPDATE", (document_id,))
+            if cursor.fetchone() is None:
+                raise ChunksChangedError(f"Documento {document_id} removido durante o rechunk")
+            
+            cursor.execute("SELECT id FROM DOCUMENT_CHUNKS WHERE document_id = :1", (document_id,))
+            if {row[0] for row in cursor.fetchall()} != set(old_chunk_ids):
+                raise ChunksChangedError(
+                    f"Chunks do documento {document_id} alterados por outra requisição "
+                    f"durante o rechunk; tente novamente"
+                )
+            
+            reused = [chunk for chunk in chunks if chunk.get('reuse_chunk_id')]
+            fresh = [chunk for chunk in chunks if not chunk.get('reuse_chunk_id')]
+            
+            inserted = self._insert_chunk_rows(cursor, document_id, fresh, embedding_model)
+            
+            if reused:
+                cursor.executemany("""
+                    INSERT INTO DOCUMENT_CHUNKS
+                    (id, document_id, chunk_index, chunk_text, chunk_size, embedding,
+                     embedding_model, embedding_short, chunk_hash)
+                    SELECT :1, document_id, :2, chunk_text, chunk_size, embedding,
+                           embedding_model, embedding_short, :3
+                    FROM DOCUMENT_CHUNKS
+                    WHERE id = :4
+                """, [(str(uuid.uuid4()), chunk['index'],
+                       chunk.get('chunk_hash') or self.chunk_hash(chunk['text']),
+                       chunk['reuse_chunk_id'])
+                      for chunk in reused])
+                inserted += len(reused)
+            
+            if old_chunk_ids:
+                cursor.executemany("DELETE FROM DOCUMENT_CHUNKS WHERE id = :1",
+                                   [(chunk_id,) for chunk_id in old_chunk_ids])
+            
+            self.connection.commit()
+            print(f"[database] Chunks do documento {document_id} substituídos: "
+                  f"{inserted} ({len(reused)} reaproveitados, {len(old_chunk_ids)} removidos)")
+            
+            return inserted
+            
+        except ChunksChangedError:
+            self.connection.rollback()
+            raise
+        except Exception as e:
+            self.connection.rollback()
+            raise RuntimeError(f"Erro ao substituir chunks: {str(e)}")
+        finally:
+            cursor.close()
+    
     def get_document(self, document_id: str) -> Optional[Dict[str, Any]]:
         """
         Busca um documento por ID
@@ -317,7 +734,7 @@ class DatabaseManager:
         try:
             cursor.execute("""
                 SELECT id, filename, file_type, file_size, upload_date, 
-                       content_hash, metadata, created_at
+                       content_hash, metadata, created_at, collection
                 FROM DOCUMENTS
                 WHERE id = :1
             """, (document_id,))
@@ -335,7 +752,8 @@ class DatabaseManager:
                 'upload_date': row[4].isoformat() if row[4] else None,
                 'content_hash': row[5],
                 'metadata': json.loads(row[6]) if row[6] else None,
-                'created_at': row[7].isoformat() if row[7] else None
+                'created_at': row[7].isoformat() if row[7] else None,
+                'collection': row[8]
             }
             
         except Exception as e:
@@ -343,13 +761,15 @@ class DatabaseManager:
         finally:
             cursor.close()
     
-    def list_documents(self, limit: int = 100, offset: int = 0) -> List[Dict[str, Any]]:
+    def list_documents(self, limit: int = 100, offset: int = 0,
+                       collection: str = None) -> List[Dict[str, Any]]:
         """
         Lista documentos
         
         Args:
             limit: Número máximo de resultados
             offset: Offset para paginação
+            collection: Restringe a uma coleção (opcional)
             
         Returns:
             Lista de documentos
@@ -362,14 +782,15 @@ class DatabaseManager:
             cursor.execute("""
                 SELECT d.id, d.filename, d.file_type, d.file_size, d.upload_date,
                        d.content_hash, d.metadata, d.created_at,
-                       COUNT(c.id) as chunks_count
+                       COUNT(c.id) as chunks_count, d.collection
                 FROM DOCUMENTS d
                 LEFT JOIN DOCUMENT_CHUNKS c ON d.id = c.document_id
+                WHERE (:collection IS NULL OR d.collection = :collection)
                 GROUP BY d.id, d.filename, d.file_type, d.file_size, d.upload_date,
-                         d.content_hash, d.metadata, d.created_at
+                         d.content_hash, d.metadata, d.created_at, d.collection
                 ORDER BY d.upload_date DESC
-                OFFSET :1 ROWS FETCH NEXT :2 ROWS ONLY
-            """, (offset, limit))
+                OFFSET :row_offset ROWS FETCH NEXT :row_limit ROWS ONLY
+            """, {'row_offset': offset, 'row_limit': limit, 'collection': collection})
             
             documents = []
             
@@ -383,7 +804,8 @@ class DatabaseManager:
                     'content_hash': row[5],
                     'metadata': json.loads(row[6]) if row[6] else None,
                     'created_at': row[7].isoformat() if row[7] else None,
-                    'chunks_count': row[8]
+                    'chunks_count': row[8],
+                    'collection': row[9]
                 })
             
             return documents
@@ -426,14 +848,31 @@ class DatabaseManager:
     
     def search_similar_chunks(self, query_embedding: np.ndarray, 
                              top_k: int = 5,
-                             threshold: float = 0.0) -> List[Dict[str, Any]]:
+                             threshold: float = 0.0,
+                             embedding_model: str = None,
+                             collection: str = None,
+                             short_embedding: np.ndarray = None,
+                             rescore: bool = True,
+                             candidates: int = None,
+                             query_text: str = None) -> List[Dict[str, Any]]:
         """
         Busca chunks similares usando busca vetorial
         
+        Com short_embedding, a busca usa os vetores de dimensão reduzida
+        (embedding_short) para selecionar candidatos e, se rescore=True,
+        reordena esses candidatos pelos vetores completos.
+        
         Args:
             query_embedding: Embedding da query
             top_k: Número de resultados
             threshold: Threshold mínimo de similaridade
+            embedding_model: Considera apenas chunks gerados por este modelo
+            collection: Considera apenas documentos desta coleção
+            short_embedding: Embedding reduzido da query (busca em dois estágios)
+            rescore: Reordena candidatos pelos vetores completos
+            candidates: Número de candidatos do primeiro estágio (padrão: 4 x top_k)
+            query_text: Texto da query; sem query_embedding, o embedding é gerado
+                no SQL com o modelo do banco embedding_model (VECTOR_EMBEDDING)
             
         Returns:
             Lista de chunks similares com metadados
@@ -443,24 +882,86 @@ class DatabaseManager:
         cursor = self.connection.cursor()
         
         try:
-            # Converte embedding para string
-            if isinstance(query_embedding, np.ndarray):
-                embedding_list = query_embedding.tolist()
+            # Filtros: nunca compara vetores de modelos (espaços vetoriais) diferentes
+            filters = []
+            params = {'top_k': top_k}
+            
+            if query_embedding is not None:
+                query_sql = "TO_VECTOR(:query_vector)"
+                params['query_vector'] = self._vector_to_str(query_embedding)
+            elif query_text:
+                query_sql = self._embedding_sql(embedding_model, "query_vector")
+                params['query_vector'] = query_text
             else:
-                embedding_list = query_embedding
+                raise ValueError("Informe query_embedding ou query_text")
             
-            embedding_str = str(embedding_list)
+            if embedding_model:
+                filters.append("c.embedding_model = :embedding_model")
+                params['embedding_model'] = embedding_model
             
-            # Busca vetorial usando VECTOR_DISTANCE
-            cursor.execute("""
-                SELECT c.id, c.document_id, c.chunk_index, c.chunk_text, c.chunk_size,
-                       d.filename, d.file_type,
-                       VECTOR_DISTANCE(c.embedding, TO_VECTOR(:1), COSINE) as distance
-                FROM DOCUMENT_CHUNKS c
-                JOIN DOCUMENTS d ON c.document_id = d.id
-                ORDER BY distance
-                FETCH FIRST :2 ROWS ONLY
-            """, (embedding_str, top_k))
+            if collection:
+                filters.append("d.collection = :collection")
+                params['collection'] = collection
+            
+            columns = """c.id, c.document_id, c.chunk_index, c.chunk_text, c.chunk_size,
+                       d.filename, d.file_type"""
+            
+            if short_embedding is None:
+                filters.append("c.embedding IS NOT NULL")
+                where_clause = f"WHERE {' AND '.join(filters)}"
+                
+                # Busca vetorial usando VECTOR_DISTANCE
+                cursor.execute(f"""
+                    SELECT {columns},
+                           VECTOR_DISTANCE(c.embedding, {query_sql}, COSINE) as distance
+                    FROM DOCUMENT_CHUNKS c
+                    JOIN DOCUMENTS d ON c.document_id = d.id
+                    {where_clause}
+                    ORDER BY distance
+                    FETCH FIRST :top_k ROWS ONLY
+                """, params)
+            else:
+                # Estágio 1: candidatos pelos vetores reduzidos (mesma dimensão da query)
+                short_dimension = len(short_embedding)
+                filters.append("c.embedding_short IS NOT NULL")
+                filters.append("VECTOR_DIMENSION_COUNT(c.embedding_short) = :short_dimension")
+                params['short_vector'] = self._vector_to_str(short_embedding)
+                params['short_dimension'] = short_dimension
+                where_clause = f"WHERE {' AND '.join(filters)}"
+                
+                if rescore:
+                    params['candidates'] = max(candidates or top_k * 4, top_k)
+                    
+                    # Estágio 2: reordena pelos vetores completos (se armazenados)
+                    cursor.execute(f"""
+                        SELECT id, document_id, chunk_index, chunk_text, chunk_size,
+                               filename, file_type,
+                               COALESCE(VECTOR_DISTANCE(embedding, {query_sql}, COSINE),
+                                        short_distance) as distance
+                        FROM (
+                            SELECT {columns}, c.embedding,
+                                   VECTOR_DISTANCE(c.embedding_short, TO_VECTOR(:short_vector), COSINE)
+                                       as short_distance
+                            FROM DOCUMENT_CHUNKS c
+                            JOIN DOCUMENTS d ON c.document_id = d.id
+                            {where_clause}
+                            ORDER BY short_distance
+                            FETCH FIRST :candidates ROWS ONLY
+                        )
+                        ORDER BY distance
+                        FETCH FIRST :top_k ROWS ONLY
+                    """, params)
+                else:
+                    del params['query_vector']
+                    cursor.execute(f"""
+                        SELECT {columns},
+                               VECTOR_DISTANCE(c.embedding_short, TO_VECTOR(:short_vector), COSINE) as distance
+                        FROM DOCUMENT_CHUNKS c
+                        JOIN DOCUMENTS d ON c.document_id = d.id
+                        {where_clause}
+                        ORDER BY distance
+                        FETCH FIRST :top_k ROWS ONLY
+                    """, params)
             
             results = []
             
@@ -484,6 +985,8 @@ class DatabaseManager:
             
             return results
             
+        except ValueError:
+            raise
         except Exception as e:
             raise RuntimeError(f"Erro na busca vetorial: {str(e)}")
         finally:
@@ -496,7 +999,9 @@ _db_manager: Optional[DatabaseManager] = None
 
 def initialize_database(user: str = None, password: str = None,
                        dsn: str = None,
-                       embedding_dimension: int = 384) -> DatabaseManager:
+                       embedding_dimension: int = 384,
+                       flexible_dimension: bool = False,
+                       default_embedding_model: str = None) -> DatabaseManager:
     """
     Inicializa o gerenciador de banco de dados
     
@@ -505,6 +1010,8 @@ def initialize_database(user: str = None, password: str = None,
         password: Senha
         dsn: DSN de conexão
         embedding_dimension: Dimensão dos embeddings
+        flexible_dimension: Usa VECTOR(*) para suportar múltiplos modelos
+        default_embedding_model: Modelo atribuído a chunks antigos sem modelo registrado
         
     Returns:
         Instância do DatabaseManager
@@ -518,7 +1025,11 @@ def initialize_database(user: str = None, password: str = None,
     )
     
     _db_manager.connect()
-    _db_manager.initialize_schema(embedding_dimension=embedding_dimension)
+    _db_manager.initialize_schema(
+        embedding_dimension=embedding_dimension,
+        flexible_dimension=flexible_dimension,
+        default_embedding_model=default_embedding_model
+    )
     
     return _db_manager
 
@@ -0,0 +1,173 @@
+"""
+Disclaimer:
+
+Este código é fornecido como um exemplo open-source de contribuição comunitária para implementação de soluções utilizando a plataforma Oracle.
+É distribuído "AS IS" (como está), sem garantias, responsabilidades ou suporte de qualquer natureza.
+A Oracle Corporation não assume qualquer responsabilidade pelo conteúdo, precisão, funcionalidade ou forma deste material.
+"""
+
+"""
+database_embedding.py - Embeddings Calculados no Banco de Dados
+Usa o modelo ONNX carregado no ADW por install-model.sql (VECTOR_EMBEDDING),
+sem modelo local; opcionalmente executa o mesmo arquivo .onnx localmente
+como substituto para testes sem ADW
+"""
+
+import os
+import time
+import numpy as np
+from typing import List, Dict, Any, Optional, Tuple
+
+from embedding_service import EmbeddingService, QueryEmbeddingCache
+from embedding_backends import OnnxEmbeddingModel, BACKEND_DATABASE
+
+
+DEFAULT_DB_MODEL = "ALL_MINILM_L12_V2"
+
+
+class InDatabaseEmbeddingService(EmbeddingService):
+    """
+    Serviço de embeddings que delega a geração de vetores ao banco
+    
+    Os chunks são inseridos sem vetor e o INSERT calcula
+    VECTOR_EMBEDDING(<modelo> USING texto AS DATA); a busca envia o texto
+    da query e o vetor é calculado no próprio SELECT. Nenhum modelo é
+    carregado no processo.
+    
+    Com EMBEDDING_DB_STANDIN apontando para o arquivo .onnx augmented usado
+    em install-model.sql, os vetores passam a ser calculados localmente com
+    o mesmo modelo (ONNX Runtime), permitindo testar sem o modelo no banco.
+    """
+    
+    def __init__(self, model_name: str = None, dimension: int = None,
+                 standin_path: str = None, query_cache: QueryEmbeddingCache = None):
+        """
+        Inicializa o serviço
+        
+        Args:
+            model_name: Nome do modelo no banco (padrão: EMBEDDING_DB_MODEL)
+            dimension: Dimensão dos vetores do modelo (padrão: EMBEDDING_DIMENSION)
+            standin_path: Arquivo .onnx executado localmente no lugar do banco
+                (padrão: EMBEDDING_DB_STANDIN)
+            query_cache: Cache de queries (usado apenas em encode_text)
+        """
+        self.standin_path = standin_path or os.environ.get("EMBEDDING_DB_STANDIN") or None
+        self._configured_dimension = dimension or int(os.environ.get("EMBEDDING_DIMENSION", "384"))
+        
+        super().__init__(
+            model_name=(model_name or os.environ.get("EMBEDDING_DB_MODEL", DEFAULT_DB_MODEL)).upper(),
+            device="database",
+            query_cache=query_cache,
+            batch_max_wait_ms=0,
+            backend=BACKEND_DATABASE
+        )
+        
+        # Sem modelo local não há workers a iniciar
+        self.pool_workers = 0
+    
+    @property
+    def in_database(self) -> bool:
+        """Vetores calculados no SQL (False quando o substituto local está ativo)"""
+        return self.model is None
+    
+    def _load_model(self) -> None:
+        """Carrega o substituto local, se configurado; caso contrário, nada a carregar"""
+        if not self.standin_path:
+            self.dimension = self._configured_dimension
+            print(f"[embedding] Embeddings calculados no banco com o modelo {self.model_name} "
+                  f"(dimensão {self.dimension})")
+            return
+        
+        try:
+            print(f"[embedding] Substituto local do modelo {self.model_name}: {self.standin_path}")
+            start_time = time.time()
+            
+            self.model = OnnxEmbeddingModel(self.standin_path)
+            self.dimension = self.model.encode(["test"]).shape[1]
+            
+            print(f"[embedding] Substituto carregado em {time.time() - start_time:.2f}s "
+                  f"(dimensão {self.dimension})")
+        
+        except RuntimeError:
+            raise
+        except Exception as e:
+            raise RuntimeError(f"Erro ao carregar substituto do modelo do banco: {str(e)}")
+    
+    def _embed_in_database(self, texts: List[str]) -> np.ndarray:
+        """Gera embeddings com VECTOR_EMBEDDING no banco"""
+        from database import get_database
+        
+        db = get_database()
+        if db is None:
+            raise RuntimeError("Banco de dados não inicializado (EMBEDDING_BACKEND=database)")
+        
+        return db.embed_texts(self.model_name, texts)
+    
+    def _encode_queries(self, texts: List[str]) -> np.ndarray:
+        if self.model is not None:
+            return super()._encode_queries(texts)
+        return self._embed_in_database(texts)
+    
+    def token_offsets(self, text: str) -> Optional[List[Tuple[int, int]]]:
+        # O tokenizer do modelo do banco não é acessível: chunking por caracteres
+        if self.model is None:
+            return None
+        return super().token_offsets(text)
+    
+    def encode_batch(self, texts: List[str], batch_size: int = None,
+                     token_budget: int = None,
+                     token_lengths: List[Optional[int]] = None) -> np.ndarray:
+        """
+        Gera embeddings em batch (no banco ou no substituto local)
+        
+        Args:
+            texts: Lista de textos
+            batch_size: Limite de textos por batch (apenas substituto local)
+            token_budget: Tokens por batch (apenas substituto local)
+            token_lengths: Tokens já contados por texto (apenas substituto local)
+        
+        Returns:
+            Array numpy com os embeddings (shape: [n_texts, dimension])
+        """
+        if self.model is not None:
+            return super().encode_batch(texts, batch_size=batch_size, token_budget=token_budget,
+                                        token_lengths=token_lengths)
+        
+        valid_texts = [t for t in texts if t and t.strip()]
+        if not valid_texts:
+            raise ValueError("Nenhum texto válido para processar")
+        
+        return self._embed_in_database(valid_texts)
+    
+    def encode_chunks(self, chunks: List[Dict[str, Any]],
+                      short_dimension: int = None,
+                      keep_full: bool = True) -> List[Dict[str, Any]]:
+        """
+        Prepara chunks para inserção com embedding gerado no INSERT
+        
+        Args:
+            chunks: Lista de dicionários com chunks (deve conter chave 'text')
+            short_dimension: Não suportado no banco (requer o substituto local)
+            keep_full: Mantém o embedding completo junto do reduzido
+        
+        Returns:
+            Lista de chunks marcados com 'embedding_in_database'
+        """
+        if self.model is not None:
+            return super().encode_chunks(chunks, short_dimension=short_dimension, keep_full=keep_full)
+        
+        if short_dimension:
+            raise ValueError(
+                "Dimensão reduzida não suportada com embeddings calculados no banco "
+                "(EMBEDDING_BACKEND=database)"
+            )
+        
+        enriched_chunks = []
+        for chunk in chunks:
+            enriched_chunk = chunk.copy()
+            enriched_chunk['embedding'] = None
+            enriched_chunk['embedding_in_database'] = True
+            enriched_chunk['embedding_dimension'] = self.dimension
+            enriched_chunks.append(enriched_chunk)
+        
+        return enriched_chunks
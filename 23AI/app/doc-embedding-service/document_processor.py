@@ -12,31 +12,29 @@ Extrai texto de PDF, Word e imagens escaneadas, e divide em chunks
 """
 
 import os
-import hashlib
-from typing import List, Dict, Any, Optional
-from io import BytesIO
+import bisect
+from typing import List, Dict, Any, Optional, Tuple, Iterable, Iterator, Callable
 
-# PDF Processing
-try:
-    from PyPDF2 import PdfReader
-except ImportError:
-    PdfReader = None
+from chunking import BoundaryBuffer, iter_spans
+from docx_extraction import iter_docx_text
+from upload_spool import Content, content_sha256, open_content
+from extraction_cache import get_extraction_cache
+from ocr_engines import ocr_image, installed_languages
+from language_probe import resolve_language_hint
+from page_extraction import (
+    get_page_extractor, spooled_pdf, count_pages,
+    text_stats, METHOD_TEXT, METHOD_OCR, METHOD_MIXED
+)
 
-# Word Processing
+# Imagens para OCR
 try:
-    from docx import Document
-except ImportError:
-    Document = None
-
-# OCR for Scanned Documents
-try:
-    import pytesseract
     from PIL import Image
-    from pdf2image import convert_from_bytes
 except ImportError:
-    pytesseract = None
     Image = None
-    convert_from_bytes = None
+
+
+# Texto da camada de texto analisado na detecção de idioma do OCR
+_LANGUAGE_SAMPLE_CHARS = 20000
 
 
 class DocumentProcessor:
@@ -56,43 +54,115 @@ class DocumentProcessor:
     # Extensões suportadas
     SUPPORTED_EXTENSIONS = ['pdf', 'docx', 'png', 'jpg', 'jpeg', 'tiff', 'tif']
     
-    def __init__(self, chunk_size: int = 500, chunk_overlap: int = 50):
+    # Registro de extratores: extensão -> {'extract', 'iter_pages'} (register_extractor)
+    EXTRACTORS: Dict[str, Dict[str, Any]] = {}
+    
+    def __init__(self, chunk_size: int = 500, chunk_overlap: int = 50,
+                 tokenizer=None, chunk_unit: str = "chars",
+                 chunk_tokens: int = None, chunk_overlap_tokens: int = 32,
+                 page_extractor=None, extraction_cache=None, language: str = None):
         """
         Inicializa o processador de documentos
         
         Args:
             chunk_size: Tamanho dos chunks em caracteres
             chunk_overlap: Sobreposição entre chunks em caracteres
+            tokenizer: Serviço de embeddings ativo (fornece token_offsets e max_chunk_tokens)
+            chunk_unit: 'chars' (padrão) ou 'tokens'
+            chunk_tokens: Tokens por chunk (padrão: limite do modelo)
+            chunk_overlap_tokens: Sobreposição entre chunks em tokens
+            page_extractor: Extrator de páginas de PDF (padrão: compartilhado)
+            extraction_cache: Cache do texto extraído (padrão: compartilhado, se EXTRACTION_CACHE_DIR)
+            language: Idiomas do Tesseract informados para o documento ("por",
+                "por+eng"); sem eles, o idioma é detectado por documento
         """
         self.chunk_size = chunk_size
         self.chunk_overlap = chunk_overlap
+        self.tokenizer = tokenizer
+        self.chunk_unit = chunk_unit
+        self.chunk_tokens = chunk_tokens
+        self.chunk_overlap_tokens = chunk_overlap_tokens
+        self.page_extractor = page_extractor or get_page_extractor()
+        self.extraction_cache = extraction_cache or get_extraction_cache()
+        self.language = language
+        
+        # Informações da última extração (páginas, método, falhas)
+        self.extraction: Dict[str, Any] = {}
+        
+        # Informações do último chunking incremental (iter_chunks)
+        self.chunking: Dict[str, Any] = {}
+        self.text_length = 0
         
         # Verifica dependências
         self._check_dependencies()
     
     def _check_dependencies(self) -> None:
         """Verifica se as dependências necessárias estão instaladas"""
-        if PdfReader is None:
-            print("[doc_processor] AVISO: PyPDF2 não instalado - processamento de PDF desabilitado")
-        
-        if Document is None:
-            print("[doc_processor] AVISO: python-docx não instalado - processamento de Word desabilitado")
+        if not self.page_extractor.text_backends:
+            print("[doc_processor] AVISO: PyPDF2/pypdfium2/pdfminer.six não instalados - "
+                  "processamento de PDF desabilitado")
         
-        if pytesseract is None or Image is None:
-            print("[doc_processor] AVISO: pytesseract/PIL não instalados - OCR desabilitado")
+        if self.page_extractor.ocr_engine is None or Image is None:
+            print("[doc_processor] AVISO: tesserocr/pytesseract/PIL não instalados - OCR desabilitado")
     
     @staticmethod
-    def calculate_hash(content: bytes) -> str:
+    def calculate_hash(content: Content) -> str:
         """
         Calcula hash SHA-256 do conteúdo
         
         Args:
-            content: Conteúdo em bytes
+            content: Conteúdo em bytes ou SpooledFile (hash calculado na gravação)
             
         Returns:
             Hash hexadecimal
         """
-        return hashlib.sha256(content).hexdigest()
+        return content_sha256(content)
+    
+    @classmethod
+    def register_extractor(cls, extensions: List[str],
+                           extract: Callable[['DocumentProcessor', Content], str],
+                           iter_pages: Callable[['DocumentProcessor', Content], Iterator[str]] = None,
+                           mime_types: List[str] = None) -> None:
+        """
+        Registra (ou substitui) o extrator de um tipo de arquivo
+        
+        Args:
+            extensions: Extensões atendidas (a primeira é a canônica)
+            extract: Função (processador, conteúdo) -> texto completo
+            iter_pages: Função (processador, conteúdo) -> partes do texto, em
+                ordem, usada pela ingestão em streaming (padrão: extract)
+            mime_types: MIME types sem mapeamento, associados à extensão canônica
+        """
+        entry = {'extract': extract, 'iter_pages': iter_pages}
+        
+        for ext in extensions:
+            cls.EXTRACTORS[ext.lower()] = entry
+            if ext.lower() not in cls.SUPPORTED_EXTENSIONS:
+                cls.SUPPORTED_EXTENSIONS.append(ext.lower())
+        
+        for mime_type in mime_types or []:
+            cls.MIME_TO_EXT.setdefault(mime_type, extensions[0].lower())
+    
+    @classmethod
+    def get_extractor(cls, filename: str, mime_type: str = None) -> Optional[Dict[str, Any]]:
+        """
+        Localiza o extrator pela extensão do arquivo ou, sem ela, pelo MIME type
+        
+        Args:
+            filename: Nome do arquivo
+            mime_type: MIME type do arquivo (opcional)
+        
+        Returns:
+            Extrator registrado ou None
+        """
+        ext = filename.rsplit('.', 1)[-1].lower() if '.' in filename else ''
+        if ext in cls.EXTRACTORS:
+            return cls.EXTRACTORS[ext]
+        
+        if mime_type and mime_type in cls.MIME_TO_EXT:
+            return cls.EXTRACTORS.get(cls.MIME_TO_EXT[mime_type])
+        
+        return None
     
     @staticmethod
     def is_supported_file(filename: str, mime_type: str = None) -> bool:
@@ -106,174 +176,416 @@ class DocumentProcessor:
         Returns:
             True se suportado
         """
-        # Verifica por extensão
-        ext = filename.rsplit('.', 1)[-1].lower() if '.' in filename else ''
-        if ext in DocumentProcessor.SUPPORTED_EXTENSIONS:
-            return True
-        
-        # Verifica por MIME type
-        if mime_type and mime_type in DocumentProcessor.MIME_TO_EXT:
-            return True
-        
-        return False
+        return DocumentProcessor.get_extractor(filename, mime_type) is not None
     
-    def extract_text_from_pdf(self, content: bytes) -> str:
+    def extract_text_from_pdf(self, content: Content) -> str:
         """
         Extrai texto de arquivo PDF
         
+        As páginas são processadas pelo extrator de páginas (em paralelo
+        para documentos grandes); cada página usa a camada de texto ou, se
+        ela for inadequada, OCR. Páginas com falha são registradas em
+        self.extraction sem interromper o restante do documento.
+        
         Args:
-            content: Conteúdo do PDF em bytes
+            content: Conteúdo do PDF (bytes ou SpooledFile)
             
         Returns:
             Texto extraído
         """
-        if PdfReader is None:
-            raise RuntimeError("PyPDF2 não está instalado")
+        if not self.page_extractor.text_backends:
+            raise RuntimeError("PyPDF2, pypdfium2 ou pdfminer.six não está instalado")
         
         try:
-            pdf_file = BytesIO(content)
-            reader = PdfReader(pdf_file)
-            
-            text_parts = []
-            for page in reader.pages:
-                text = page.extract_text()
-                if text:
-                    text_parts.append(text)
-            
-            full_text = "\n\n".join(text_parts)
-            
-            # Se não conseguiu extrair texto, tenta OCR
-            if not full_text.strip() and convert_from_bytes is not None:
-                print("[doc_processor] PDF sem texto extraível - tentando OCR...")
-                return self._ocr_from_pdf(content)
-            
-            return full_text
+            with spooled_pdf(content) as path:
+                pages = list(range(count_pages(path)))
+                return self._join_pages(list(self._iter_pdf_results(path, pages)))
             
         except Exception as e:
             raise RuntimeError(f"Erro ao processar PDF: {str(e)}")
     
-    def extract_text_from_docx(self, content: bytes) -> str:
+    def extract_text_from_docx(self, content: Content) -> str:
         """
         Extrai texto de arquivo Word (.docx)
         
         Args:
-            content: Conteúdo do Word em bytes
+            content: Conteúdo do Word (bytes ou SpooledFile)
             
         Returns:
             Texto extraído
         """
-        if Document is None:
-            raise RuntimeError("python-docx não está instalado")
+        return "\n\n".join(self._iter_docx_pages(content))
+    
+    def _iter_docx_pages(self, content: Content) -> Iterator[str]:
+        """
+        Extrai o Word em streaming, na ordem do documento (parágrafos e
+        células de tabela intercalados, células mescladas uma única vez)
+        
+        Args:
+            content: Conteúdo do Word (bytes ou SpooledFile)
         
+        Yields:
+            Texto de cada parágrafo ou célula com conteúdo, em ordem
+        """
+        stats: Dict[str, Any] = {}
         try:
-            docx_file = BytesIO(content)
-            doc = Document(docx_file)
-            
-            text_parts = []
-            
-            # Extrai texto de parágrafos
-            for paragraph in doc.paragraphs:
-                if paragraph.text.strip():
-                    text_parts.append(paragraph.text)
-            
-            # Extrai texto de tabelas
-            for table in doc.tables:
-                for row in table.rows:
-                    for cell in row.cells:
-                        if cell.text.strip():
-                            text_parts.append(cell.text)
-            
-            return "\n\n".join(text_parts)
-            
+            with open_content(content) as f:
+                yield from iter_docx_text(f, stats)
         except Exception as e:
             raise RuntimeError(f"Erro ao processar Word: {str(e)}")
+        
+        self.extraction = dict(stats, method=METHOD_TEXT)
     
-    def extract_text_from_image(self, content: bytes) -> str:
+    def extract_text_from_image(self, content: Content) -> str:
         """
         Extrai texto de imagem usando OCR
         
         Args:
-            content: Conteúdo da imagem em bytes
+            content: Conteúdo da imagem (bytes ou SpooledFile)
             
         Returns:
             Texto extraído via OCR
         """
-        if pytesseract is None or Image is None:
-            raise RuntimeError("pytesseract/PIL não estão instalados")
+        if self.page_extractor.ocr_engine is None or Image is None:
+            raise RuntimeError("tesserocr/pytesseract/PIL não estão instalados")
         
         try:
-            image = Image.open(BytesIO(content))
-            
-            # Configura OCR para português e inglês
-            custom_config = r'--oem 3 --psm 6 -l por+eng'
-            text = pytesseract.image_to_string(image, config=custom_config)
-            
-            return text
+            with open_content(content) as f, Image.open(f) as image:
+                # Mesmo engine, idiomas e pré-processamento do OCR de PDFs
+                return ocr_image(
+                    image,
+                    engine=self.page_extractor.ocr_engine,
+                    languages=self.language or self.page_extractor.ocr_languages,
+                    profile=self.page_extractor.ocr_profile
+                )
             
         except Exception as e:
             raise RuntimeError(f"Erro ao processar imagem com OCR: {str(e)}")
     
-    def _ocr_from_pdf(self, content: bytes) -> str:
+    def _ocr_from_pdf(self, content: Content) -> str:
         """
         Extrai texto de PDF usando OCR (para PDFs escaneados)
         
         Args:
-            content: Conteúdo do PDF em bytes
+            content: Conteúdo do PDF (bytes ou SpooledFile)
             
         Returns:
             Texto extraído via OCR
         """
-        if convert_from_bytes is None or pytesseract is None:
-            raise RuntimeError("pdf2image/pytesseract não estão instalados")
+        if not self.page_extractor.ocr_available:
+            raise RuntimeError("pdf2image (ou pypdfium2)/tesserocr (ou pytesseract) não estão instalados")
         
         try:
-            # Converte PDF para imagens
-            images = convert_from_bytes(content)
+            with spooled_pdf(content) as path:
+                return self._ocr_pages(path, list(range(count_pages(path))))
+            
+        except Exception as e:
+            raise RuntimeError(f"Erro ao processar PDF com OCR: {str(e)}")
+    
+    def _ocr_pages(self, path: str, pages: List[int]) -> str:
+        """
+        Executa OCR nas páginas de um PDF já gravado em disco
+        
+        Args:
+            path: Caminho do PDF
+            pages: Índices das páginas
+        
+        Returns:
+            Texto extraído via OCR
+        """
+        if not self.page_extractor.ocr_available:
+            raise RuntimeError("pdf2image (ou pypdfium2)/tesserocr (ou pytesseract) não estão instalados")
+        
+        print(f"[doc_processor] Processando {len(pages)} páginas com OCR...")
+        languages = self.language
+        if languages is None and pages:
+            languages = self.page_extractor.probe_languages(path, pages[0])
+        results = self.page_extractor.ocr(path, pages, languages)
+        return self._join_pages(results)
+    
+    def _iter_pdf_results(self, path: str, pages: List[int]) -> Iterator[Dict[str, Any]]:
+        """
+        Extrai as páginas decidindo, uma a uma, entre camada de texto e OCR
+        
+        Em cada janela de páginas, a camada de texto é extraída primeiro;
+        só as páginas vazias, com pouco texto ou com texto ilegível
+        (PageExtractor.needs_ocr) são rasterizadas e processadas com OCR.
+        Sem idioma informado, os idiomas do OCR são escolhidos uma vez por
+        documento, antes da primeira página com OCR, a partir da camada de
+        texto das páginas já lidas (ou de um OCR rápido dessa página).
+        
+        Args:
+            path: Caminho do PDF
+            pages: Índices das páginas
+        
+        Yields:
+            Resultado de cada página, em ordem
+        """
+        ocr_available = self.page_extractor.ocr_available
+        languages = self.language
+        sample = []
+        sample_length = 0
+        
+        for window in self.page_extractor.windows(pages):
+            results = self.page_extractor.extract_text(path, window)
             
-            text_parts = []
-            custom_config = r'--oem 3 --psm 6 -l por+eng'
+            retry = [i for i, result in enumerate(results) if self.page_extractor.needs_ocr(result)]
             
-            for i, image in enumerate(images):
-                print(f"[doc_processor] Processando página {i+1}/{len(images)} com OCR...")
-                text = pytesseract.image_to_string(image, config=custom_config)
-                if text.strip():
-                    text_parts.append(text)
+            # Amostra da camada de texto para a detecção de idioma
+            if languages is None and sample_length < _LANGUAGE_SAMPLE_CHARS:
+                for i, result in enumerate(results):
+                    if i not in retry and result['text']:
+                        sample.append(result['text'][:_LANGUAGE_SAMPLE_CHARS])
+                        sample_length += len(sample[-1])
             
-            return "\n\n".join(text_parts)
+            if retry and ocr_available:
+                if languages is None:
+                    languages = self.page_extractor.probe_languages(
+                        path, window[retry[0]], "\n".join(sample)
+                    )
+                
+                print(f"[doc_processor] OCR em {len(retry)} páginas sem texto adequado: "
+                      f"{[window[i] + 1 for i in retry]}")
+                ocr_results = self.page_extractor.ocr(path, [window[i] for i in retry], languages)
+                for i, ocr_result in zip(retry, ocr_results):
+                    results[i] = self._best_page(results[i], ocr_result)
             
+            yield from results
+    
+    @staticmethod
+    def _best_page(text_result: Dict[str, Any], ocr_result: Dict[str, Any]) -> Dict[str, Any]:
+        """Fica com o OCR se ele produziu mais caracteres válidos que a camada de texto"""
+        seconds = text_result['seconds'] + ocr_result['seconds']
+        
+        if ocr_result['error'] is None and (
+                text_result['error'] is not None
+                or text_stats(ocr_result['text'])[1] > text_stats(text_result['text'])[1]):
+            return dict(ocr_result, seconds=seconds)
+        return dict(text_result, seconds=seconds)
+    
+    def _join_pages(self, results: List[Dict[str, Any]]) -> str:
+        """
+        Junta o texto das páginas em ordem e registra páginas com falha
+        
+        Args:
+            results: Resultados por página do extrator
+        
+        Returns:
+            Texto do documento
+        """
+        self._record_pages(results)
+        return "\n\n".join(r['text'] for r in results if r['text'])
+    
+    def _record_pages(self, results: List[Dict[str, Any]]) -> None:
+        """
+        Registra em self.extraction as páginas processadas, o método de
+        cada uma e as que falharam
+        
+        Args:
+            results: Resultados por página do extrator (o texto não é usado)
+        """
+        failed = [r for r in results if r['error']]
+        
+        for result in failed:
+            print(f"[doc_processor] AVISO: falha na página {result['page'] + 1} "
+                  f"({result['method']}): {result['error']}")
+        
+        if results and len(failed) == len(results):
+            raise RuntimeError(f"Todas as páginas falharam: {failed[0]['error']}")
+        
+        if failed and self.page_extractor.require_all_pages:
+            raise RuntimeError(f"{len(failed)} páginas não extraídas: "
+                               f"{[r['page'] + 1 for r in failed]} (EXTRACTION_REQUIRE_ALL_PAGES)")
+        
+        ocr_pages = [r['page'] + 1 for r in results if r['method'] == METHOD_OCR]
+        ocr_languages = sorted({r['languages'] for r in results
+                                if r['method'] == METHOD_OCR and r.get('languages')})
+        if not results:
+            method = None
+        elif not ocr_pages:
+            method = METHOD_TEXT
+        elif len(ocr_pages) == len(results):
+            method = METHOD_OCR
+        else:
+            method = METHOD_MIXED
+        
+        self.extraction = {
+            'pages': len(results),
+            'method': method,
+            'ocr_pages': ocr_pages,
+            'ocr_languages': ocr_languages,
+            'failed_pages': [r['page'] + 1 for r in failed],
+            'complete': not failed,
+            'page_seconds': round(sum(r['seconds'] for r in results), 2)
+        }
+    
+    def _iter_pdf_pages(self, content: Content) -> Iterator[str]:
+        """
+        Extrai o PDF página a página (camada de texto ou OCR, por página)
+        
+        Args:
+            content: Conteúdo do PDF (bytes ou SpooledFile)
+        
+        Yields:
+            Texto de cada página com conteúdo, em ordem
+        """
+        if not self.page_extractor.text_backends:
+            raise RuntimeError("PyPDF2, pypdfium2 ou pdfminer.six não está instalado")
+        
+        try:
+            with spooled_pdf(content) as path:
+                pages = list(range(count_pages(path)))
+                
+                # Guarda apenas o resumo das páginas; o texto segue adiante
+                results = []
+                for result in self._iter_pdf_results(path, pages):
+                    results.append(dict(result, text=""))
+                    if result['text']:
+                        yield result['text']
+                
+                self._record_pages(results)
+        
         except Exception as e:
-            raise RuntimeError(f"Erro ao processar PDF com OCR: {str(e)}")
+            raise RuntimeError(f"Erro ao processar PDF: {str(e)}")
     
-    def extract_text(self, content: bytes, filename: str, mime_type: str = None) -> str:
+    def extraction_settings(self) -> Dict[str, Any]:
+        """
+        Configurações que determinam o texto extraído (gravadas no cache de
+        extração: uma entrada de outras configurações não é reaproveitada)
+        
+        Returns:
+            Backends de texto, engine, idiomas e perfil do OCR, DPI e
+            idioma informado para o documento
+        """
+        extractor = self.page_extractor
+        return {
+            'text_backends': list(extractor.text_backends),
+            'ocr_engine': extractor.ocr_engine,
+            'ocr_languages': extractor.ocr_languages,
+            'language_probe': extractor.language_probe,
+            'language': self.language,
+            'ocr_profile': extractor.ocr_profile,
+            'dpi': extractor.dpi,
+        }
+    
+    def cached_pages(self, content_hash: str,
+                     settings: Dict[str, Any] = None) -> Optional[List[str]]:
+        """
+        Partes do texto já extraído de um conteúdo, do cache de extração
+        
+        Args:
+            content_hash: SHA-256 do conteúdo (calculate_hash)
+            settings: Configurações de extração exigidas (extraction_settings);
+                None aceita o texto extraído com quaisquer configurações, como
+                no rechunk, que reaproveita o texto já indexado
+        
+        Returns:
+            Texto de cada parte, em ordem, ou None se não estiver no cache
+            (self.extraction recebe o resumo da extração original)
+        """
+        if self.extraction_cache is None or not content_hash:
+            return None
+        
+        cached = self.extraction_cache.get(content_hash, settings)
+        if cached is None:
+            return None
+        
+        print(f"[doc_processor] Texto extraído encontrado no cache ({len(cached['pages'])} partes)")
+        self.extraction = dict(cached['extraction'], cached=True)
+        return cached['pages']
+    
+    def _cached_extraction(self, content: Content,
+                           content_hash: str = None) -> Tuple[Optional[str], Optional[List[str]]]:
+        """
+        Busca o texto já extraído deste conteúdo no cache de extração
+        
+        Returns:
+            Tupla (chave do cache, partes do texto); a chave é None sem cache
+            e as partes são None se o conteúdo ainda não foi extraído
+        """
+        if self.extraction_cache is None:
+            return None, None
+        
+        key = content_hash or self.calculate_hash(content)
+        return key, self.cached_pages(key, self.extraction_settings())
+    
+    def _iter_extracted_pages(self, content: Content, filename: str,
+                              mime_type: str = None) -> Iterator[str]:
+        """Partes do texto pelo extrator registrado (sem cache)"""
+        extractor = self.get_extractor(filename, mime_type)
+        if extractor['iter_pages'] is not None:
+            yield from extractor['iter_pages'](self, content)
+        else:
+            yield extractor['extract'](self, content)
+    
+    def iter_pages(self, content: Content, filename: str,
+                   mime_type: str = None, content_hash: str = None) -> Iterator[str]:
+        """
+        Extrai o texto do documento em partes (páginas, no caso de PDF)
+        
+        O texto das partes unido com "\\n\\n" é o mesmo de extract_text.
+        Com cache de extração, um conteúdo já extraído não é extraído de
+        novo, e as partes de uma nova extração são gravadas à medida que
+        passam.
+        
+        Args:
+            content: Conteúdo do arquivo (bytes ou SpooledFile)
+            filename: Nome do arquivo
+            mime_type: MIME type do arquivo
+            content_hash: SHA-256 do conteúdo, se já calculado
+        
+        Yields:
+            Texto de cada parte, em ordem
+        """
+        if not self.is_supported_file(filename, mime_type):
+            raise ValueError(f"Tipo de arquivo não suportado: {filename}")
+        
+        print(f"[doc_processor] Extraindo texto de {filename}...")
+        self.extraction = {}
+        
+        key, cached = self._cached_extraction(content, content_hash)
+        if cached is not None:
+            yield from cached
+            return
+        
+        pages = self._iter_extracted_pages(content, filename, mime_type)
+        if key is not None:
+            pages = self.extraction_cache.record(key, pages, lambda: self.extraction,
+                                                 self.extraction_settings())
+        
+        yield from pages
+    
+    def extract_text(self, content: Content, filename: str, mime_type: str = None,
+                     content_hash: str = None) -> str:
         """
         Extrai texto do documento baseado no tipo
         
         Args:
-            content: Conteúdo do arquivo em bytes
+            content: Conteúdo do arquivo (bytes ou SpooledFile)
             filename: Nome do arquivo
             mime_type: MIME type do arquivo
+            content_hash: SHA-256 do conteúdo, se já calculado (chave do cache de extração)
             
         Returns:
             Texto extraído
         """
-        # Determina o tipo do arquivo
-        ext = filename.rsplit('.', 1)[-1].lower() if '.' in filename else ''
+        # Extrator registrado para a extensão (ou MIME type)
+        extractor = self.get_extractor(filename, mime_type)
         
-        if not ext and mime_type:
-            ext = self.MIME_TO_EXT.get(mime_type, '')
+        if extractor is None:
+            ext = filename.rsplit('.', 1)[-1].lower() if '.' in filename else ''
+            raise ValueError(f"Tipo de arquivo não suportado: {ext or mime_type}")
         
-        # Processa baseado no tipo
-        if ext == 'pdf' or mime_type == 'application/pdf':
-            return self.extract_text_from_pdf(content)
+        key, cached = self._cached_extraction(content, content_hash)
+        if cached is not None:
+            return "\n\n".join(page for page in cached if page)
         
-        elif ext == 'docx' or mime_type == 'application/vnd.openxmlformats-officedocument.wordprocessingml.document':
-            return self.extract_text_from_docx(content)
+        text = extractor['extract'](self, content)
         
-        elif ext in ['png', 'jpg', 'jpeg', 'tiff', 'tif'] or (mime_type and mime_type.startswith('image/')):
-            return self.extract_text_from_image(content)
+        if key is not None:
+            self.extraction_cache.put(key, [text], self.extraction, self.extraction_settings())
         
-        else:
-            raise ValueError(f"Tipo de arquivo não suportado: {ext or mime_type}")
+        return text
     
     def create_chunks(self, text: str) -> List[Dict[str, Any]]:
         """
@@ -288,65 +600,224 @@ class DocumentProcessor:
         if not text or not text.strip():
             return []
         
+        return list(self._iter_char_chunks([text]))
+    
+    def _iter_char_chunks(self, pages: Iterable[str]) -> Iterator[Dict[str, Any]]:
+        """
+        Divide em chunks por caracteres o texto das partes unidas com "\n\n"
+        
+        Os limites dos chunks vêm de chunking.iter_spans (busca limitada
+        das quebras e pares de offsets); o texto de cada chunk só é
+        copiado aqui, ao ser emitido, e o buffer mantém apenas o texto ainda
+        não consumido.
+        
+        Args:
+            pages: Partes do texto, em ordem
+        
+        Yields:
+            Dicionários com informações dos chunks (posições no texto inteiro)
+        """
+        buffer = BoundaryBuffer()
+        spans = iter_spans(buffer, pages, self.chunk_size, self.chunk_overlap)
+        
+        for chunk_index, (start, end) in enumerate(spans):
+            chunk_text = buffer.slice(start, end).strip()
+            yield {
+                'index': chunk_index,
+                'text': chunk_text,
+                'size': len(chunk_text),
+                'start_pos': start,
+                'end_pos': end
+            }
+        
+        self.text_length = buffer.end
+    
+    def _max_chunk_tokens(self) -> int:
+        """Tokens por chunk respeitando o max_seq_length do modelo"""
+        model_limit = self.tokenizer.max_chunk_tokens() if self.tokenizer else 0
+        if self.chunk_tokens and model_limit:
+            return min(self.chunk_tokens, model_limit)
+        return self.chunk_tokens or model_limit
+    
+    def create_token_chunks(self, text: str,
+                            offsets: List[Tuple[int, int]]) -> List[Dict[str, Any]]:
+        """
+        Divide o texto em janelas exatas de tokens com sobreposição
+        
+        Args:
+            text: Texto completo
+            offsets: Offsets (início, fim) de cada token do texto inteiro
+        
+        Returns:
+            Lista de dicionários com informações dos chunks
+        """
+        window = self._max_chunk_tokens()
+        if window <= 0:
+            raise ValueError("Tamanho de chunk em tokens inválido")
+        
+        overlap = min(self.chunk_overlap_tokens, window - 1)
+        stride = window - overlap
+        
         chunks = []
-        text_length = len(text)
-        start = 0
-        chunk_index = 0
+        total_tokens = len(offsets)
         
-        while start < text_length:
-            # Define o fim do chunk
-            end = start + self.chunk_size
+        for token_start in range(0, total_tokens, stride):
+            token_end = min(token_start + window, total_tokens)
+            start = offsets[token_start][0]
+            end = offsets[token_end - 1][1]
+            chunk_text = text[start:end]
             
-            # Se não é o último chunk, tenta quebrar em espaço ou pontuação
-            if end < text_length:
-                # Procura por quebra natural (ponto, nova linha, espaço)
-                search_start = end
-                search_end = min(end + 100, text_length)
-                
-                # Procura por ponto seguido de espaço
-                period_pos = text.find('. ', search_start, search_end)
-                if period_pos != -1:
-                    end = period_pos + 1
-                else:
-                    # Procura por nova linha
-                    newline_pos = text.find('\n', search_start, search_end)
-                    if newline_pos != -1:
-                        end = newline_pos
-                    else:
-                        # Procura por espaço
-                        space_pos = text.rfind(' ', start, search_end)
-                        if space_pos > start:
-                            end = space_pos
+            if chunk_text.strip():
+                chunks.append({
+                    'index': len(chunks),
+                    'text': chunk_text,
+                    'size': len(chunk_text),
+                    'start_pos': start,
+                    'end_pos': end,
+                    'token_count': token_end - token_start
+                })
             
-            # Extrai o chunk
-            chunk_text = text[start:end].strip()
+            if token_end >= total_tokens:
+                break
+        
+        return chunks
+    
+    def _iter_token_chunks(self, pages: Iterable[str]) -> Iterator[Dict[str, Any]]:
+        """
+        Divide em janelas de tokens o texto das partes unidas com "\n\n"
+        
+        Cada parte é tokenizada separadamente e seus offsets deslocados para
+        o texto inteiro; com tokenizers que não unem tokens através de
+        quebras de linha o resultado é o mesmo de create_token_chunks.
+        
+        Args:
+            pages: Partes do texto, em ordem
+        
+        Yields:
+            Dicionários com informações dos chunks (posições no texto inteiro)
+        """
+        window = self._max_chunk_tokens()
+        if window <= 0:
+            raise ValueError("Tamanho de chunk em tokens inválido")
+        
+        overlap = min(self.chunk_overlap_tokens, window - 1)
+        stride = window - overlap
+        
+        pages = iter(pages)
+        buffer = ""         # texto a partir de `base`
+        base = 0
+        offsets = []        # offsets (no texto inteiro) a partir do próximo chunk
+        total_tokens = 0
+        chunk_index = 0
+        exhausted = False
+        
+        while True:
+            # Lê partes até saber se a próxima janela é a última
+            while not exhausted and len(offsets) <= window:
+                page = next(pages, None)
+                if page is None:
+                    exhausted = True
+                elif page:
+                    length = base + len(buffer)
+                    shift = length + 2 if length else 0
+                    buffer += "\n\n" + page if length else page
+                    page_offsets = self.tokenizer.token_offsets(page) or []
+                    offsets.extend((s + shift, e + shift) for s, e in page_offsets)
+                    total_tokens += len(page_offsets)
             
-            if chunk_text:
-                chunks.append({
+            if not offsets:
+                break
+            
+            token_end = min(window, len(offsets))
+            start = offsets[0][0]
+            end = offsets[token_end - 1][1]
+            chunk_text = buffer[start - base:end - base]
+            
+            if chunk_text.strip():
+                yield {
                     'index': chunk_index,
                     'text': chunk_text,
                     'size': len(chunk_text),
                     'start_pos': start,
-                    'end_pos': end
-                })
+                    'end_pos': end,
+                    'token_count': token_end
+                }
                 chunk_index += 1
             
-            # Move para o próximo chunk com sobreposição
-            start = end - self.chunk_overlap
-            
-            # Evita loop infinito
-            if start <= 0 and chunk_index > 0:
+            if token_end >= len(offsets):
                 break
+            
+            # Descarta os tokens e o texto já consumidos
+            del offsets[:stride]
+            buffer = buffer[offsets[0][0] - base:]
+            base = offsets[0][0]
         
-        return chunks
+        self.text_length = base + len(buffer)
+        self.chunking['total_tokens'] = total_tokens
+    
+    def iter_chunks(self, pages: Iterable[str]) -> Iterator[Dict[str, Any]]:
+        """
+        Cria chunks incrementalmente a partir das partes do texto (iter_pages)
+        
+        Equivale a process_document sem manter o texto inteiro em memória;
+        ao final, self.text_length e self.chunking descrevem o documento.
+        
+        Args:
+            pages: Partes do texto, em ordem
+        
+        Yields:
+            Dicionários com informações dos chunks
+        """
+        self.text_length = 0
+        
+        tokens = (self.chunk_unit == "tokens" and self.tokenizer is not None
+                  and self.tokenizer.token_offsets("") is not None)
+        
+        if tokens:
+            self.chunking = {'unit': 'tokens', 'max_tokens': self._max_chunk_tokens()}
+            print(f"[doc_processor] Criando chunks por tokens "
+                  f"(tokens={self.chunking['max_tokens']}, overlap={self.chunk_overlap_tokens})...")
+            yield from self._iter_token_chunks(pages)
+        else:
+            if self.chunk_unit == "tokens":
+                print("[doc_processor] AVISO: tokenizer indisponível - usando chunks por caracteres")
+            self.chunking = {'unit': 'chars'}
+            print(f"[doc_processor] Criando chunks (size={self.chunk_size}, overlap={self.chunk_overlap})...")
+            yield from self._iter_char_chunks(pages)
     
-    def process_document(self, content: bytes, filename: str, 
+    @staticmethod
+    def count_truncated_chunks(chunks: List[Dict[str, Any]],
+                               offsets: List[Tuple[int, int]],
+                               max_tokens: int) -> int:
+        """
+        Conta chunks (por caracteres) que excedem o limite de tokens do modelo
+        
+        Args:
+            chunks: Chunks com 'start_pos' e 'end_pos'
+            offsets: Offsets dos tokens do texto inteiro
+            max_tokens: Tokens de conteúdo aceitos pelo modelo
+        
+        Returns:
+            Número de chunks que seriam truncados pelo modelo
+        """
+        token_starts = [start for start, _ in offsets]
+        truncated = 0
+        
+        for chunk in chunks:
+            first = bisect.bisect_left(token_starts, chunk['start_pos'])
+            last = bisect.bisect_left(token_starts, chunk['end_pos'])
+            if last - first > max_tokens:
+                truncated += 1
+        
+        return truncated
+    
+    def process_document(self, content: Content, filename: str, 
                         mime_type: str = None) -> Dict[str, Any]:
         """
         Processa documento completo: extração de texto e chunking
         
         Args:
-            content: Conteúdo do arquivo em bytes
+            content: Conteúdo do arquivo (bytes ou SpooledFile)
             filename: Nome do arquivo
             mime_type: MIME type do arquivo
             
@@ -357,41 +828,130 @@ class DocumentProcessor:
         if not self.is_supported_file(filename, mime_type):
             raise ValueError(f"Tipo de arquivo não suportado: {filename}")
         
+        # Calcula hash do conteúdo (também é a chave do cache de extração)
+        content_hash = self.calculate_hash(content)
+        
         # Extrai texto
         print(f"[doc_processor] Extraindo texto de {filename}...")
-        text = self.extract_text(content, filename, mime_type)
+        self.extraction = {}
+        text = self.extract_text(content, filename, mime_type, content_hash=content_hash)
         
         if not text or not text.strip():
             raise ValueError("Não foi possível extrair texto do documento")
         
-        # Cria chunks
-        print(f"[doc_processor] Criando chunks (size={self.chunk_size}, overlap={self.chunk_overlap})...")
-        chunks = self.create_chunks(text)
+        # Tokeniza o documento uma única vez, apenas para chunks por tokens
+        # (em 'chars' o relatório de truncamento não compensa tokenizar tudo)
+        offsets = None
+        if self.chunk_unit == "tokens" and self.tokenizer:
+            offsets = self.tokenizer.token_offsets(text)
+        max_tokens = self._max_chunk_tokens() if offsets is not None else 0
         
-        # Calcula hash do conteúdo
-        content_hash = self.calculate_hash(content)
+        # Cria chunks
+        if offsets:
+            print(f"[doc_processor] Criando chunks por tokens "
+                  f"(tokens={max_tokens}, overlap={self.chunk_overlap_tokens})...")
+            chunks = self.create_token_chunks(text, offsets)
+            char_chunks = self.create_chunks(text)
+        else:
+            if self.chunk_unit == "tokens":
+                print("[doc_processor] AVISO: tokenizer indisponível - usando chunks por caracteres")
+            print(f"[doc_processor] Criando chunks (size={self.chunk_size}, overlap={self.chunk_overlap})...")
+            chunks = self.create_chunks(text)
+            char_chunks = chunks
+        
+        # Quantos chunks por caracteres seriam truncados pelo max_seq_length do modelo
+        # (somente com chunks por tokens: o documento já foi tokenizado)
+        chunking = {'unit': 'tokens' if chunks is not char_chunks else 'chars'}
+        if offsets is not None and max_tokens > 0:
+            truncated = self.count_truncated_chunks(char_chunks, offsets, max_tokens)
+            chunking.update({
+                'max_tokens': max_tokens,
+                'total_tokens': len(offsets),
+                'char_chunks': len(char_chunks),
+                'char_chunks_truncated': truncated
+            })
+            if truncated:
+                print(f"[doc_processor] {truncated}/{len(char_chunks)} chunks por caracteres "
+                      f"excedem {max_tokens} tokens e seriam truncados pelo modelo")
         
         return {
             'text': text,
             'chunks': chunks,
             'content_hash': content_hash,
             'text_length': len(text),
-            'chunks_count': len(chunks)
+            'chunks_count': len(chunks),
+            'chunking': chunking,
+            'extraction': self.extraction
         }
 
 
-def create_document_processor(chunk_size: int = None, chunk_overlap: int = None) -> DocumentProcessor:
+# Extratores padrão
+DocumentProcessor.register_extractor(
+    ['pdf'],
+    DocumentProcessor.extract_text_from_pdf,
+    iter_pages=DocumentProcessor._iter_pdf_pages,
+    mime_types=['application/pdf']
+)
+DocumentProcessor.register_extractor(
+    ['docx'],
+    DocumentProcessor.extract_text_from_docx,
+    iter_pages=DocumentProcessor._iter_docx_pages,
+    mime_types=['application/vnd.openxmlformats-officedocument.wordprocessingml.document']
+)
+DocumentProcessor.register_extractor(
+    ['png', 'jpg', 'jpeg', 'tiff', 'tif'],
+    DocumentProcessor.extract_text_from_image,
+    mime_types=['image/png', 'image/jpeg', 'image/jpg', 'image/tiff', 'image/tif']
+)
+
+
+def create_document_processor(chunk_size: int = None, chunk_overlap: int = None,
+                              tokenizer=None, chunk_unit: str = None,
+                              chunk_tokens: int = None,
+                              chunk_overlap_tokens: int = None,
+                              language: str = None) -> DocumentProcessor:
     """
     Factory function para criar um DocumentProcessor
     
     Args:
         chunk_size: Tamanho dos chunks (padrão: 500)
         chunk_overlap: Sobreposição entre chunks (padrão: 50)
+        tokenizer: Serviço de embeddings ativo, para chunking por tokens (opcional)
+        chunk_unit: 'chars' ou 'tokens' (padrão: CHUNK_UNIT)
+        chunk_tokens: Tokens por chunk (padrão: CHUNK_TOKENS ou limite do modelo)
+        chunk_overlap_tokens: Sobreposição em tokens (padrão: CHUNK_OVERLAP_TOKENS)
+        language: Idioma do documento para o OCR ("pt", "en", "pt+en"...;
+            padrão: detectado por documento)
         
     Returns:
         Instância de DocumentProcessor
     """
     chunk_size = chunk_size or int(os.environ.get("CHUNK_SIZE", "500"))
-    chunk_overlap = chunk_overlap or int(os.environ.get("CHUNK_OVERLAP", "50"))
+    if chunk_overlap is None:
+        chunk_overlap = int(os.environ.get("CHUNK_OVERLAP", "50"))
+    chunk_unit = (chunk_unit or os.environ.get("CHUNK_UNIT", "chars")).lower()
+    chunk_tokens = chunk_tokens or int(os.environ.get("CHUNK_TOKENS", "0")) or None
+    if chunk_overlap_tokens is None:
+        chunk_overlap_tokens = int(os.environ.get("CHUNK_OVERLAP_TOKENS", "32"))
+    
+    if chunk_unit not in ("chars", "tokens"):
+        raise ValueError(f"CHUNK_UNIT inválido: {chunk_unit} (use 'chars' ou 'tokens')")
+    
+    if chunk_size <= 0 or chunk_overlap < 0 or chunk_overlap >= chunk_size:
+        raise ValueError(f"Chunking inválido: size={chunk_size}, overlap={chunk_overlap}")
+    
+    if chunk_overlap_tokens < 0 or (chunk_tokens is not None and
+                                    (chunk_tokens <= 0 or chunk_overlap_tokens >= chunk_tokens)):
+        raise ValueError(
+            f"Chunking em tokens inválido: tokens={chunk_tokens}, overlap={chunk_overlap_tokens}"
+        )
     
-    return DocumentProcessor(chunk_size=chunk_size, chunk_overlap=chunk_overlap)
+    return DocumentProcessor(
+        chunk_size=chunk_size,
+        chunk_overlap=chunk_overlap,
+        tokenizer=tokenizer,
+        chunk_unit=chunk_unit,
+        chunk_tokens=chunk_tokens,
+        chunk_overlap_tokens=chunk_overlap_tokens,
+        language=resolve_language_hint(language, installed=installed_languages())
+    )
@@ -0,0 +1,162 @@
+"""
+Disclaimer:
+
+Este código é fornecido como um exemplo open-source de contribuição comunitária para implementação de soluções utilizando a plataforma Oracle.
+É distribuído "AS IS" (como está), sem garantias, responsabilidades ou suporte de qualquer natureza.
+A Oracle Corporation não assume qualquer responsabilidade pelo conteúdo, precisão, funcionalidade ou forma deste material.
+"""
+
+"""
+docx_extraction.py - Extração de Word (.docx) em Streaming
+Lê o word/document.xml com um parser XML incremental, na ordem do documento
+(parágrafos e tabelas intercalados), emitindo cada célula mesclada uma
+única vez e descartando cada elemento assim que seu texto é emitido
+"""
+
+import zipfile
+import xml.etree.ElementTree as ET
+from typing import Dict, Any, Iterator, List, IO, Union
+
+
+DOCUMENT_PART = "word/document.xml"
+
+_W = "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}"
+
+P = _W + "p"
+TBL = _W + "tbl"
+TR = _W + "tr"
+TC = _W + "tc"
+TC_PR = _W + "tcPr"
+T = _W + "t"
+TXBX_CONTENT = _W + "txbxContent"
+V_MERGE = _W + "vMerge"
+H_MERGE = _W + "hMerge"
+VAL = _W + "val"
+
+# Elementos de run convertidos em texto, como no python-docx
+_RUN_CHARACTERS = {
+    _W + "tab": "\t",
+    _W + "ptab": "\t",
+    _W + "br": "\n",
+    _W + "cr": "\n",
+    _W + "noBreakHyphen": "-",
+}
+
+
+def _paragraph_text(paragraph: ET.Element) -> str:
+    """Texto de um parágrafo (sem caixas de texto, ignoradas como no python-docx)"""
+    parts = []
+    stack = [paragraph]
+    while stack:
+        element = stack.pop()
+        if element.tag == TXBX_CONTENT:
+            continue
+        if element.tag == T:
+            parts.append(element.text or "")
+        elif element.tag in _RUN_CHARACTERS:
+            parts.append(_RUN_CHARACTERS[element.tag])
+        # Filhos em ordem (a pilha inverte)
+        stack.extend(reversed(element))
+    return "".join(parts)
+
+
+def _is_merge_continuation(properties: ET.Element) -> bool:
+    """Propriedades (tcPr) de uma célula que continua uma mesclagem vertical ou horizontal (hMerge)"""
+    for tag in (V_MERGE, H_MERGE):
+        merge = properties.find(tag)
+        if merge is not None and merge.get(VAL, "continue") == "continue":
+            return True
+    return False
+
+
+def iter_docx_text(source: Union[str, IO[bytes]], stats: Dict[str, Any] = None) -> Iterator[str]:
+    """
+    Texto de um .docx em ordem de leitura, sem carregar o documento inteiro
+    
+    Emite o texto de cada parágrafo do corpo e de cada célula de tabela
+    (parágrafos da célula unidos por "\\n"), na ordem em que aparecem. Uma
+    célula mesclada aparece uma única vez: as continuações de mesclagem
+    vertical são ignoradas, e a mesclagem horizontal (gridSpan) já é uma
+    única célula no XML. Tabelas aninhadas são emitidas na sua posição
+    dentro da célula. Parágrafos e linhas já emitidos são removidos da
+    árvore, de modo que a memória não cresce com o tamanho do documento.
+    
+    Args:
+        source: Caminho ou arquivo binário do .docx
+        stats: Dicionário que recebe as contagens de parágrafos, células e
+            continuações de mesclagem ignoradas (opcional)
+    
+    Yields:
+        Texto de cada parágrafo ou célula não vazio
+    """
+    counts = stats if stats is not None else {}
+    counts.update(paragraphs=0, table_cells=0, merged_cells_skipped=0)
+    
+    # Elementos abertos (o último é o pai do próximo) e células abertas
+    open_elements: List[ET.Element] = []
+    cells: List[Dict[str, Any]] = []
+    skipping = 0            # células de continuação abertas (conteúdo ignorado)
+    text_boxes = 0          # caixas de texto abertas (conteúdo ignorado)
+    
+    with zipfile.ZipFile(source) as archive, archive.open(DOCUMENT_PART) as xml:
+        for event, element in ET.iterparse(xml, events=("start", "end")):
+            tag = element.tag
+            
+            if event == "start":
+                open_elements.append(element)
+                if tag == TXBX_CONTENT:
+                    text_boxes += 1
+                elif tag == TC and not text_boxes:
+                    cells.append({'paragraphs': [], 'skip': False})
+                elif tag == TBL and cells and not skipping and not text_boxes:
+                    # Texto da célula anterior à tabela aninhada sai antes dela
+                    text = "\n".join(cells[-1]['paragraphs'])
+                    cells[-1]['paragraphs'] = []
+                    if text.strip():
+                        yield text
+                continue
+            
+            open_elements.pop()
+            parent = open_elements[-1] if open_elements else None
+            
+            if tag == TXBX_CONTENT:
+                text_boxes -= 1
+                continue
+            
+            if text_boxes:
+                continue
+            
+            if tag == TC_PR and parent is not None and parent.tag == TC:
+                # Propriedades vêm antes do conteúdo da célula
+                if _is_merge_continuation(element):
+                    cells[-1]['skip'] = True
+                    skipping += 1
+                continue
+            
+            if tag == P:
+                if cells:
+                    if not skipping:
+                        cells[-1]['paragraphs'].append(_paragraph_text(element))
+                else:
+                    counts['paragraphs'] += 1
+                    text = _paragraph_text(element)
+                    if text.strip():
+                        yield text
+            
+            elif tag == TC:
+                cell = cells.pop()
+                if cell['skip']:
+                    skipping -= 1
+                    counts['merged_cells_skipped'] += 1
+                elif not skipping:
+                    counts['table_cells'] += 1
+                    text = "\n".join(cell['paragraphs'])
+                    if text.strip():
+                        yield text
+            
+            elif tag != TR:
+                continue
+            
+            # Texto já emitido: remove o elemento da árvore
+            if parent is not None:
+                parent.remove(element)
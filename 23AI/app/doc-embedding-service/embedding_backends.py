@@ -0,0 +1,584 @@
+"""
+Disclaimer:
+
+Este código é fornecido como um exemplo open-source de contribuição comunitária para implementação de soluções utilizando a plataforma Oracle.
+É distribuído "AS IS" (como está), sem garantias, responsabilidades ou suporte de qualquer natureza.
+A Oracle Corporation não assume qualquer responsabilidade pelo conteúdo, precisão, funcionalidade ou forma deste material.
+"""
+
+"""
+embedding_backends.py - Backends de Execução de Modelos de Embedding
+Implementações intercambiáveis (PyTorch/Sentence Transformers e ONNX Runtime)
+com a mesma interface encode() usada pelo EmbeddingService
+"""
+
+import os
+import json
+import time
+import numpy as np
+from typing import List, Dict, Any, Optional, Tuple, Union
+
+
+# Backends suportados (EMBEDDING_BACKEND)
+BACKEND_SENTENCE_TRANSFORMERS = "sentence-transformers"
+BACKEND_ONNX = "onnx"
+BACKEND_DATABASE = "database"
+
+BACKEND_ALIASES = {
+    "sentence-transformers": BACKEND_SENTENCE_TRANSFORMERS,
+    "sentence_transformers": BACKEND_SENTENCE_TRANSFORMERS,
+    "pytorch": BACKEND_SENTENCE_TRANSFORMERS,
+    "torch": BACKEND_SENTENCE_TRANSFORMERS,
+    "onnx": BACKEND_ONNX,
+    "onnxruntime": BACKEND_ONNX,
+    "database": BACKEND_DATABASE,
+    "in-database": BACKEND_DATABASE,
+}
+
+# Modelo padrão (EMBEDDING_MODEL)
+DEFAULT_EMBEDDING_MODEL = "sentence-transformers/all-MiniLM-L6-v2"
+
+# Arquivos gerados pela exportação ONNX
+ONNX_MODEL_FILE = "model.onnx"
+ONNX_QUANTIZED_FILE = "model_int8.onnx"
+ONNX_CONFIG_FILE = "onnx_config.json"
+
+
+def resolve_backend_name(backend: str = None) -> str:
+    """
+    Normaliza o nome do backend
+    
+    Args:
+        backend: Nome informado (padrão: EMBEDDING_BACKEND)
+    
+    Returns:
+        Nome canônico do backend
+    """
+    name = (backend or os.environ.get("EMBEDDING_BACKEND", BACKEND_SENTENCE_TRANSFORMERS)).strip().lower()
+    
+    if name not in BACKEND_ALIASES:
+        raise ValueError(
+            f"Backend de embedding não suportado: {name}. "
+            f"Opções: {', '.join(sorted(set(BACKEND_ALIASES.values())))}"
+        )
+    
+    return BACKEND_ALIASES[name]
+
+
+def default_onnx_path(model_name: str) -> str:
+    """
+    Diretório padrão do modelo ONNX exportado
+    
+    Args:
+        model_name: Nome do modelo Sentence Transformers
+    
+    Returns:
+        Caminho do diretório
+    """
+    safe_name = model_name.replace("/", "__")
+    base_dir = os.environ.get("EMBEDDING_ONNX_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), "models", "onnx"))
+    return os.path.join(base_dir, safe_name)
+
+
+def onnx_model_path(model_name: str) -> str:
+    """
+    Modelo ONNX de um modelo de embedding
+    
+    EMBEDDING_ONNX_PATH vale apenas para o modelo padrão (EMBEDDING_MODEL);
+    os demais modelos (EMBEDDING_MODELS) usam o próprio diretório exportado.
+    
+    Args:
+        model_name: Nome do modelo Sentence Transformers
+    
+    Returns:
+        Caminho do diretório exportado ou do arquivo .onnx
+    """
+    configured = os.environ.get("EMBEDDING_ONNX_PATH")
+    if configured and model_name == os.environ.get("EMBEDDING_MODEL", DEFAULT_EMBEDDING_MODEL):
+        return configured
+    return default_onnx_path(model_name)
+
+
+def load_sentence_transformer(model_name: str, device: str = "cpu"):
+    """
+    Carrega um modelo Sentence Transformers (backend PyTorch)
+    
+    Args:
+        model_name: Nome do modelo
+        device: Dispositivo de execução
+    
+    Returns:
+        Instância de SentenceTransformer
+    """
+    try:
+        from sentence_transformers import SentenceTransformer
+    except ImportError:
+        raise RuntimeError(
+            "sentence-transformers não está instalado. "
+            "Instale com: pip install sentence-transformers"
+        )
+    
+    return SentenceTransformer(model_name, device=device)
+
+
+def export_onnx_model(model_name: str, output_dir: str, quantize: bool = True,
+                      opset: int = 14) -> str:
+    """
+    Exporta um modelo Sentence Transformers para ONNX (opcionalmente quantizado int8)
+    
+    A exportação precisa de PyTorch apenas uma vez; a execução posterior
+    usa somente onnxruntime e tokenizers.
+    
+    Args:
+        model_name: Nome do modelo Sentence Transformers
+        output_dir: Diretório de saída
+        quantize: Gera também a versão com quantização dinâmica int8
+        opset: Versão do opset ONNX
+    
+    Returns:
+        Diretório com o modelo exportado
+    """
+    try:
+        import torch
+        from sentence_transformers.models import Normalize, Pooling
+    except ImportError:
+        raise RuntimeError(
+            "A exportação ONNX requer torch e sentence-transformers. "
+            "Instale com: pip install sentence-transformers"
+        )
+    
+    print(f"[embedding] Exportando {model_name} para ONNX em {output_dir}...")
+    start_time = time.time()
+    os.makedirs(output_dir, exist_ok=True)
+    
+    st_model = load_sentence_transformer(model_name, device="cpu")
+    transformer = st_model[0].auto_model.eval()
+    tokenizer = st_model.tokenizer
+    
+    pooling = next((m for m in st_model if isinstance(m, Pooling)), None)
+    if pooling is not None and not pooling.pooling_mode_mean_tokens:
+        raise RuntimeError("Exportação ONNX suporta apenas modelos com mean pooling")
+    
+    tokenizer.save_pretrained(output_dir)
+    
+    dummy = tokenizer(["exportação onnx"], return_tensors="pt")
+    input_names = [name for name in ("input_ids", "attention_mask", "token_type_ids") if name in dummy]
+    dynamic_axes = {name: {0: "batch", 1: "sequence"} for name in input_names}
+    dynamic_axes["last_hidden_state"] = {0: "batch", 1: "sequence"}
+    
+    model_path = os.path.join(output_dir, ONNX_MODEL_FILE)
+    with torch.no_grad():
+        torch.onnx.export(
+            transformer,
+            tuple(dummy[name] for name in input_names),
+            model_path,
+            input_names=input_names,
+            output_names=["last_hidden_state"],
+            dynamic_axes=dynamic_axes,
+            opset_version=opset,
+            do_constant_folding=True
+        )
+    
+    config = {
+        "model_name": model_name,
+        "max_seq_length": st_model.max_seq_length,
+        "normalize": any(isinstance(m, Normalize) for m in st_model),
+        "input_names": input_names,
+        "pad_token": tokenizer.pad_token,
+        "pad_token_id": tokenizer.pad_token_id,
+        "dimension": st_model.get_sentence_embedding_dimension()
+    }
+    with open(os.path.join(output_dir, ONNX_CONFIG_FILE), "w", encoding="utf-8") as f:
+        json.dump(config, f, indent=2)
+    
+    if quantize:
+        quantize_onnx_model(output_dir)
+    
+    print(f"[embedding] Exportação ONNX concluída em {time.time() - start_time:.2f}s")
+    return output_dir
+
+
+def quantize_onnx_model(output_dir: str) -> str:
+    """
+    Aplica quantização dinâmica int8 a um modelo exportado
+    
+    Args:
+        output_dir: Diretório com model.onnx
+    
+    Returns:
+        Caminho do modelo quantizado
+    """
+    try:
+        from onnxruntime.quantization import quantize_dynamic, QuantType
+    except ImportError:
+        raise RuntimeError("onnxruntime não está instalado. Instale com: pip install onnxruntime")
+    
+    print("[embedding] Aplicando quantização dinâmica int8...")
+    quantized_path = os.path.join(output_dir, ONNX_QUANTIZED_FILE)
+    quantize_dynamic(
+        os.path.join(output_dir, ONNX_MODEL_FILE),
+        quantized_path,
+        weight_type=QuantType.QInt8
+    )
+    return quantized_path
+
+
+class OnnxEmbeddingModel:
+    """
+    Modelo de embeddings executado com ONNX Runtime
+    
+    Aceita dois formatos:
+    - diretório exportado por export_onnx_model (tokenizer + model.onnx/model_int8.onnx),
+      com mean pooling e normalização feitos em numpy;
+    - arquivo .onnx "augmented" (ex.: all_MiniLM_L12_v2.onnx usado em install-model.sql),
+      que recebe texto e já inclui tokenização e pós-processamento.
+    """
+    
+    def __init__(self, model_path: str, quantized: bool = True, num_threads: int = 0):
+        """
+        Inicializa o modelo ONNX
+        
+        Args:
+            model_path: Diretório exportado ou arquivo .onnx augmented
+            quantized: Usa model_int8.onnx quando disponível
+            num_threads: Threads intra-op do ONNX Runtime (0 = padrão)
+        """
+        try:
+            import onnxruntime as ort
+        except ImportError:
+            raise RuntimeError(
+                "onnxruntime não está instalado. "
+                "Instale com: pip install onnxruntime"
+            )
+        
+        self.model_path = model_path
+        self.augmented = os.path.isfile(model_path)
+        self.tokenizer = None
+        self._raw_tokenizer = None
+        self.config: Dict[str, Any] = {}
+        
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if num_threads > 0:
+            options.intra_op_num_threads = num_threads
+        
+        if self.augmented:
+            # Modelos augmented da Oracle usam operadores de tokenização do onnxruntime-extensions
+            try:
+                from onnxruntime_extensions import get_library_path
+                options.register_custom_ops_library(get_library_path())
+            except ImportError:
+                raise RuntimeError(
+                    "onnxruntime-extensions é necessário para modelos ONNX augmented. "
+                    "Instale com: pip install onnxruntime-extensions"
+                )
+            onnx_file = model_path
+        else:
+            with open(os.path.join(model_path, ONNX_CONFIG_FILE), encoding="utf-8") as f:
+                self.config = json.load(f)
+            
+            quantized_file = os.path.join(model_path, ONNX_QUANTIZED_FILE)
+            onnx_file = quantized_file if quantized and os.path.exists(quantized_file) \
+                else os.path.join(model_path, ONNX_MODEL_FILE)
+            
+            self.tokenizer = self._load_tokenizer(model_path)
+        
+        self.onnx_file = onnx_file
+        self.session = ort.InferenceSession(
+            onnx_file, sess_options=options, providers=["CPUExecutionProvider"]
+        )
+        self.input_names = [i.name for i in self.session.get_inputs()]
+        self.output_name = self.session.get_outputs()[0].name
+    
+    def _load_tokenizer(self, model_path: str):
+        """Carrega o tokenizer rápido (tokenizers) com truncamento e padding"""
+        try:
+            from tokenizers import Tokenizer
+        except ImportError:
+            raise RuntimeError("tokenizers não está instalado. Instale com: pip install tokenizers")
+        
+        tokenizer = Tokenizer.from_file(os.path.join(model_path, "tokenizer.json"))
+        tokenizer.enable_truncation(max_length=int(self.config.get("max_seq_length", 256)))
+        tokenizer.enable_padding(
+            pad_id=int(self.config.get("pad_token_id") or 0),
+            pad_token=self.config.get("pad_token") or "[PAD]"
+        )
+        return tokenizer
+    
+    @property
+    def max_seq_length(self) -> int:
+        """Comprimento máximo de sequência (tokens)"""
+        return int(self.config.get("max_seq_length", 256))
+    
+    def token_offsets(self, text: str) -> Optional[List[Tuple[int, int]]]:
+        """
+        Tokeniza o texto inteiro (sem truncamento) e retorna os offsets
+        
+        Args:
+            text: Texto completo
+        
+        Returns:
+            Lista de (início, fim) em caracteres por token, ou None sem tokenizer
+        """
+        if self.tokenizer is None:
+            return None
+        
+        if self._raw_tokenizer is None:
+            from tokenizers import Tokenizer
+            self._raw_tokenizer = Tokenizer.from_file(os.path.join(self.model_path, "tokenizer.json"))
+            self._raw_tokenizer.no_truncation()
+            self._raw_tokenizer.no_padding()
+        
+        return list(self._raw_tokenizer.encode(text, add_special_tokens=False).offsets)
+    
+    def special_tokens_count(self) -> int:
+        """Número de tokens especiais adicionados a cada sequência"""
+        if self.tokenizer is None:
+            return 2
+        return len(self.tokenizer.encode("").ids)
+    
+    def token_lengths(self, texts: List[str]) -> List[int]:
+        """
+        Conta tokens de cada texto (após truncamento)
+        
+        Args:
+            texts: Lista de textos
+        
+        Returns:
+            Lista com o número de tokens por texto
+        """
+        if self.tokenizer is None:
+            return estimate_token_lengths(texts, self.max_seq_length)
+        
+        return [sum(e.attention_mask) for e in self.tokenizer.encode_batch(texts)]
+    
+    def _encode_tokenized(self, texts: List[str]) -> np.ndarray:
+        """Executa o modelo exportado e aplica mean pooling"""
+        encodings = self.tokenizer.encode_batch(texts)
+        
+        input_ids = np.array([e.ids for e in encodings], dtype=np.int64)
+        attention_mask = np.array([e.attention_mask for e in encodings], dtype=np.int64)
+        
+        feeds = {"input_ids": input_ids, "attention_mask": attention_mask}
+        if "token_type_ids" in self.input_names:
+            feeds["token_type_ids"] = np.array([e.type_ids for e in encodings], dtype=np.int64)
+        feeds = {name: value for name, value in feeds.items() if name in self.input_names}
+        
+        token_embeddings = self.session.run([self.output_name], feeds)[0]
+        
+        # Mean pooling considerando apenas tokens válidos
+        mask = attention_mask[:, :, None].astype(np.float32)
+        summed = (token_embeddings * mask).sum(axis=1)
+        counts = np.clip(mask.sum(axis=1), 1e-9, None)
+        embeddings = summed / counts
+        
+        if self.config.get("normalize", True):
+            norms = np.linalg.norm(embeddings, axis=1, keepdims=True)
+            embeddings = embeddings / np.clip(norms, 1e-12, None)
+        
+        return embeddings.astype(np.float32)
+    
+    def _encode_augmented(self, texts: List[str]) -> np.ndarray:
+        """Executa o modelo augmented (texto de entrada) um texto por vez"""
+        embeddings = []
+        for text in texts:
+            output = self.session.run([self.output_name], {self.input_names[0]: np.array([text])})[0]
+            embeddings.append(np.asarray(output, dtype=np.float32).reshape(-1))
+        return np.stack(embeddings)
+    
+    def encode(self, sentences: Union[str, List[str]], batch_size: int = 32,
+               convert_to_numpy: bool = True, show_progress_bar: bool = False,
+               **kwargs) -> np.ndarray:
+        """
+        Gera embeddings (mesma interface de SentenceTransformer.encode)
+        
+        Args:
+            sentences: Texto ou lista de textos
+            batch_size: Tamanho do batch
+            convert_to_numpy: Mantido por compatibilidade (sempre numpy)
+            show_progress_bar: Mantido por compatibilidade (ignorado)
+        
+        Returns:
+            Array numpy com os embeddings
+        """
+        single = isinstance(sentences, str)
+        texts = [sentences] if single else list(sentences)
+        
+        encode_fn = self._encode_augmented if self.augmented else self._encode_tokenized
+        
+        parts = []
+        for i in range(0, len(texts), max(1, batch_size)):
+            parts.append(encode_fn(texts[i:i + batch_size]))
+        
+        embeddings = np.concatenate(parts, axis=0) if parts else np.zeros((0, 0), dtype=np.float32)
+        return embeddings[0] if single else embeddings
+
+
+def estimate_token_lengths(texts: List[str], max_seq_length: int = 256) -> List[int]:
+    """
+    Estima o número de tokens sem tokenizer (~4 caracteres por token)
+    
+    Args:
+        texts: Lista de textos
+        max_seq_length: Limite de truncamento do modelo
+    
+    Returns:
+        Lista com o número estimado de tokens por texto
+    """
+    return [min(max_seq_length, len(text) // 4 + 2) for text in texts]
+
+
+def count_tokens(model, texts: List[str]) -> List[int]:
+    """
+    Conta tokens por texto usando o tokenizer do backend carregado
+    
+    Args:
+        model: Modelo retornado por create_embedding_model
+        texts: Lista de textos
+    
+    Returns:
+        Lista com o número de tokens por texto (limitado a max_seq_length)
+    """
+    max_seq_length = int(getattr(model, "max_seq_length", None) or 256)
+    
+    if hasattr(model, "token_lengths"):
+        return model.token_lengths(texts)
+    
+    tokenizer = getattr(model, "tokenizer", None)
+    if tokenizer is None:
+        return estimate_token_lengths(texts, max_seq_length)
+    
+    try:
+        encoded = tokenizer(
+            texts,
+            add_special_tokens=True,
+            truncation=True,
+            max_length=max_seq_length,
+            return_attention_mask=False,
+            return_token_type_ids=False
+        )
+        return [len(ids) for ids in encoded["input_ids"]]
+    except Exception:
+        return estimate_token_lengths(texts, max_seq_length)
+
+
+def token_offsets(model, text: str) -> Optional[List[Tuple[int, int]]]:
+    """
+    Tokeniza um texto completo uma única vez e retorna os offsets dos tokens
+    
+    Args:
+        model: Modelo retornado por create_embedding_model
+        text: Texto completo (sem truncamento)
+    
+    Returns:
+        Lista de (início, fim) em caracteres por token, ou None sem tokenizer
+    """
+    if hasattr(model, "token_offsets"):
+        return model.token_offsets(text)
+    
+    tokenizer = getattr(model, "tokenizer", None)
+    if tokenizer is None:
+        return None
+    
+    try:
+        encoded = tokenizer(
+            text,
+            add_special_tokens=False,
+            truncation=False,
+            return_offsets_mapping=True,
+            return_attention_mask=False,
+            return_token_type_ids=False,
+            verbose=False
+        )
+        return [tuple(offset) for offset in encoded["offset_mapping"]]
+    except Exception:
+        return None
+
+
+def max_content_tokens(model) -> int:
+    """
+    Número máximo de tokens de conteúdo por sequência (sem tokens especiais)
+    
+    Args:
+        model: Modelo retornado por create_embedding_model
+    
+    Returns:
+        max_seq_length menos os tokens especiais do tokenizer
+    """
+    max_seq_length = int(getattr(model, "max_seq_length", None) or 256)
+    
+    if hasattr(model, "special_tokens_count"):
+        return max_seq_length - model.special_tokens_count()
+    
+    tokenizer = getattr(model, "tokenizer", None)
+    try:
+        special = len(tokenizer("", add_special_tokens=True)["input_ids"]) if tokenizer else 2
+    except Exception:
+        special = 2
+    
+    return max_seq_length - special
+
+
+def load_onnx_model(model_name: str, model_path: str = None,
+                    quantized: bool = None, num_threads: int = None) -> OnnxEmbeddingModel:
+    """
+    Carrega (exportando se necessário) um modelo ONNX
+    
+    Args:
+        model_name: Nome do modelo Sentence Transformers de origem
+        model_path: Diretório exportado ou arquivo .onnx (padrão: onnx_model_path)
+        quantized: Usa a versão int8 (padrão: EMBEDDING_ONNX_QUANTIZE)
+        num_threads: Threads intra-op (padrão: EMBEDDING_ONNX_THREADS)
+    
+    Returns:
+        Instância de OnnxEmbeddingModel
+    """
+    model_path = model_path or onnx_model_path(model_name)
+    if quantized is None:
+        quantized = os.environ.get("EMBEDDING_ONNX_QUANTIZE", "true").lower() == "true"
+    if num_threads is None:
+        num_threads = int(os.environ.get("EMBEDDING_ONNX_THREADS", "0"))
+    
+    if not os.path.isfile(model_path):
+        if not os.path.exists(os.path.join(model_path, ONNX_CONFIG_FILE)):
+            export_onnx_model(model_name, model_path, quantize=quantized)
+        elif quantized and not os.path.exists(os.path.join(model_path, ONNX_QUANTIZED_FILE)):
+            quantize_onnx_model(model_path)
+    
+    return OnnxEmbeddingModel(model_path, quantized=quantized, num_threads=num_threads)
+
+
+def create_embedding_model(model_name: str, device: str = "cpu", backend: str = None):
+    """
+    Factory function para criar o modelo do backend configurado
+    
+    Args:
+        model_name: Nome do modelo
+        device: Dispositivo de execução (apenas sentence-transformers)
+        backend: Nome do backend (padrão: EMBEDDING_BACKEND)
+    
+    Returns:
+        Objeto com método encode() compatível com SentenceTransformer
+    """
+    backend = resolve_backend_name(backend)
+    
+    if backend == BACKEND_ONNX:
+        return load_onnx_model(model_name)
+    
+    if backend == BACKEND_DATABASE:
+        # Embeddings calculados no banco (VECTOR_EMBEDDING): ver database_embedding.py
+        raise ValueError("O backend database não carrega modelo local; use InDatabaseEmbeddingService")
+    
+    return load_sentence_transformer(model_name, device=device)
+
+
+if __name__ == "__main__":
+    import argparse
+    
+    parser = argparse.ArgumentParser(description="Exporta um modelo Sentence Transformers para ONNX")
+    parser.add_argument("--model", default=os.environ.get("EMBEDDING_MODEL", DEFAULT_EMBEDDING_MODEL))
+    parser.add_argument("--output", default=None, help="Diretório de saída (padrão: models/onnx/<modelo>)")
+    parser.add_argument("--no-quantize", action="store_true", help="Não gera a versão int8")
+    args = parser.parse_args()
+    
+    export_onnx_model(args.model, args.output or default_onnx_path(args.model), quantize=not args.no_quantize)
@@ -12,41 +12,607 @@ Gera embeddings vetoriais para chunks de texto usando Sentence Transformers
 """
 
 import os
+import queue
+import threading
+import multiprocessing
 import numpy as np
-from typing import List, Dict, Any, Optional
+from collections import OrderedDict
+from concurrent.futures import Future
+from typing import List, Dict, Any, Optional, Tuple, Callable
 import time
 
+from embedding_backends import (
+    create_embedding_model, resolve_backend_name, count_tokens,
+    token_offsets, max_content_tokens, BACKEND_DATABASE, DEFAULT_EMBEDDING_MODEL
+)
+from vector_store import normalize_rows, exact_top_k, to_results
+
+
+# Limite de segurança de textos por batch de chunks; o tamanho efetivo é
+# definido pelo orçamento de tokens (EMBEDDING_TOKEN_BUDGET)
+MAX_ENCODE_BATCH_SIZE = 256
+
+
+class QueryEmbeddingCache:
+    """Cache LRU com TTL para embeddings de queries (texto normalizado -> vetor float32)"""
+    
+    def __init__(self, max_size: int = 1024, ttl: float = 3600.0,
+                 persist_path: str = None, model: str = None, dimension: int = None):
+        """
+        Inicializa o cache de embeddings
+        
+        Args:
+            max_size: Número máximo de entradas (0 desabilita o cache)
+            ttl: Tempo de vida das entradas em segundos (0 = sem expiração)
+            persist_path: Arquivo .npz para warm-load/persistência (opcional)
+            model: Modelo que gera os vetores (gravado no arquivo; um arquivo
+                de outro modelo é descartado no warm-load)
+            dimension: Dimensão dos vetores do modelo
+        """
+        self.max_size = max_size
+        self.ttl = ttl
+        self.persist_path = persist_path
+        self.model = model or ""
+        self.dimension = dimension or 0
+        self.hits = 0
+        self.misses = 0
+        
+        self._entries: "OrderedDict[str, Tuple[np.ndarray, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+        
+        if self.persist_path:
+            self.load()
+    
+    @staticmethod
+    def normalize(text: str) -> str:
+        """
+        Normaliza o texto usado como chave do cache
+        
+        Args:
+            text: Texto da query
+            
+        Returns:
+            Texto com espaços colapsados e sem bordas
+        """
+        return " ".join(text.split())
+    
+    def get(self, text: str) -> Optional[np.ndarray]:
+        """
+        Busca embedding no cache
+        
+        Args:
+            text: Texto da query
+            
+        Returns:
+            Embedding em cache ou None
+        """
+        if self.max_size <= 0:
+            return None
+        
+        key = self.normalize(text)
+        now = time.time()
+        
+        with self._lock:
+            entry = self._entries.get(key)
+            
+            if entry is not None and self.ttl > 0 and now - entry[1] > self.ttl:
+                del self._entries[key]
+                entry = None
+            
+            if entry is None:
+                self.misses += 1
+                return None
+            
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+    
+    def put(self, text: str, embedding: np.ndarray) -> None:
+        """
+        Armazena embedding no cache
+        
+        Args:
+            text: Texto da query
+            embedding: Embedding gerado pelo modelo
+        """
+        if self.max_size <= 0:
+            return
+        
+        key = self.normalize(text)
+        vector = np.asarray(embedding, dtype=np.float32)
+        vector.setflags(write=False)
+        
+        with self._lock:
+            self._entries[key] = (vector, time.time())
+            self._entries.move_to_end(key)
+            
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+    
+    def clear(self) -> None:
+        """Remove todas as entradas do cache"""
+        with self._lock:
+            self._entries.clear()
+    
+    def stats(self) -> Dict[str, Any]:
+        """
+        Retorna estatísticas do cache
+        
+        Returns:
+            Dicionário com tamanho, hits, misses e hit rate
+        """
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                'size': len(self._entries),
+                'max_size': self.max_size,
+                'ttl': self.ttl,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': round(self.hits / total, 4) if total else 0.0
+            }
+    
+    def load(self) -> int:
+        """
+        Carrega entradas persistidas (warm-load)
+        
+        Returns:
+            Número de entradas carregadas
+        """
+        if not self.persist_path or not os.path.exists(self.persist_path):
+            return 0
+        
+        try:
+            with np.load(self.persist_path, allow_pickle=False) as data:
+                saved_model = str(data['model']) if 'model' in data.files else ""
+                saved_dimension = int(data['dimension']) if 'dimension' in data.files else 0
+                keys = data['keys']
+                vectors = data['vectors']
+                timestamps = data['timestamps']
+            
+            # Vetores de outro modelo (ou de arquivo sem identificação) não servem
+            if saved_model != self.model or saved_dimension != self.dimension:
+                print(f"[embedding] AVISO: cache de queries em {self.persist_path} é do modelo "
+                      f"{saved_model or 'desconhecido'} (dimensão {saved_dimension}); "
+                      f"modelo atual: {self.model} (dimensão {self.dimension}) - descartado")
+                return 0
+            
+            now = time.time()
+            loaded = 0
+            
+            with self._lock:
+                for key, vector, ts in zip(keys, vectors, timestamps):
+                    if self.ttl > 0 and now - float(ts) > self.ttl:
+                        continue
+                    vector = vector.astype(np.float32)
+                    vector.setflags(write=False)
+                    self._entries[str(key)] = (vector, float(ts))
+                    loaded += 1
+                
+                while len(self._entries) > self.max_size:
+                    self._entries.popitem(last=False)
+            
+            print(f"[embedding] Cache de queries: {loaded} entradas carregadas de {self.persist_path}")
+            return loaded
+            
+        except Exception as e:
+            print(f"[embedding] AVISO: não foi possível carregar cache de queries: {e}")
+            return 0
+    
+    def save(self) -> int:
+        """
+        Persiste as entradas do cache em disco
+        
+        Returns:
+            Número de entradas salvas
+        """
+        if not self.persist_path:
+            return 0
+        
+        with self._lock:
+            items = list(self._entries.items())
+        
+        if not items:
+            return 0
+        
+        try:
+            keys = np.array([key for key, _ in items])
+            vectors = np.stack([vector for _, (vector, _) in items])
+            timestamps = np.array([ts for _, (_, ts) in items], dtype=np.float64)
+            
+            tmp_path = self.persist_path + ".tmp.npz"
+            np.savez(tmp_path, keys=keys, vectors=vectors, timestamps=timestamps,
+                     model=np.array(self.model), dimension=np.array(self.dimension))
+            os.replace(tmp_path, self.persist_path)
+            
+            print(f"[embedding] Cache de queries: {len(items)} entradas salvas em {self.persist_path}")
+            return len(items)
+            
+        except Exception as e:
+            print(f"[embedding] AVISO: não foi possível salvar cache de queries: {e}")
+            return 0
+
+
+class MicroBatcher:
+    """
+    Agrupa chamadas concorrentes de encode de um único texto em um só batch.
+    
+    Cada chamador enfileira seu texto e aguarda; uma thread de trabalho coleta
+    textos por até max_wait_ms (ou até max_batch_size), executa um único
+    forward pass e devolve cada embedding ao chamador correspondente. Sem
+    outros textos na fila, o primeiro é processado imediatamente.
+    """
+    
+    def __init__(self, encode_fn: Callable[[List[str]], np.ndarray],
+                 max_batch_size: int = 32, max_wait_ms: float = 5.0):
+        """
+        Inicializa o agrupador de requisições
+        
+        Args:
+            encode_fn: Função que gera embeddings para uma lista de textos
+            max_batch_size: Número máximo de textos por batch
+            max_wait_ms: Tempo máximo de espera por textos adicionais (ms)
+        """
+        self.encode_fn = encode_fn
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_wait = max(0.0, max_wait_ms) / 1000.0
+        self.batches = 0
+        self.texts = 0
+        
+        self._closed = False
+        self._submit_lock = threading.Lock()
+        self._queue: "queue.Queue[Optional[Tuple[str, Future]]]" = queue.Queue()
+        self._thread = threading.Thread(
+            target=self._run, name="embedding-microbatcher", daemon=True
+        )
+        self._thread.start()
+    
+    def submit(self, text: str) -> np.ndarray:
+        """
+        Enfileira um texto e aguarda o embedding
+        
+        Args:
+            text: Texto para gerar embedding
+            
+        Returns:
+            Array numpy com o embedding
+        """
+        future: Future = Future()
+        
+        # Garante que nenhum texto entre na fila depois do sinal de parada
+        with self._submit_lock:
+            if self._closed:
+                raise RuntimeError("Micro-batcher encerrado")
+            self._queue.put((text, future))
+        
+        return future.result()
+    
+    @property
+    def closed(self) -> bool:
+        """Indica se o agrupador foi encerrado"""
+        return self._closed
+    
+    def close(self) -> None:
+        """Encerra a thread de trabalho (textos já enfileirados são processados)"""
+        with self._submit_lock:
+            if self._closed:
+                return
+            self._closed = True
+            self._queue.put(None)
+        
+        self._thread.join(timeout=5)
+    
+    def stats(self) -> Dict[str, Any]:
+        """
+        Retorna estatísticas do agrupador
+        
+        Returns:
+            Dicionário com batches executados e tamanho médio
+        """
+        return {
+            'max_batch_size': self.max_batch_size,
+            'max_wait_ms': self.max_wait * 1000.0,
+            'batches': self.batches,
+            'texts': self.texts,
+            'avg_batch_size': round(self.texts / self.batches, 2) if self.batches else 0.0
+        }
+    
+    def _collect(self, first: Tuple[str, Future]) -> Tuple[List[Tuple[str, Future]], bool]:
+        """Coleta itens da fila até o limite de tamanho ou de tempo"""
+        batch = [first]
+        
+        # Requisição isolada: não espera por textos que podem não chegar
+        if self._queue.empty():
+            return batch, False
+        
+        deadline = time.monotonic() + self.max_wait
+        
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            try:
+                item = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+            except queue.Empty:
+                break
+            
+            if item is None:
+                return batch, True
+            batch.append(item)
+        
+        return batch, False
+    
+    def _run(self) -> None:
+        """Loop da thread de trabalho"""
+        while True:
+            item = self._queue.get()
+            if item is None:
+                return
+            
+            batch, stop = self._collect(item)
+            
+            # Textos repetidos no mesmo batch são processados uma única vez
+            unique_texts = list(dict.fromkeys(text for text, _ in batch))
+            
+            try:
+                embeddings = self.encode_fn(unique_texts)
+                by_text = dict(zip(unique_texts, embeddings))
+                
+                for text, future in batch:
+                    future.set_result(by_text[text])
+            except Exception as e:
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+            
+            self.batches += 1
+            self.texts += len(unique_texts)
+            
+            if stop:
+                return
+
+
+def _pool_worker(model_name: str, device: str, backend: str, num_threads: int,
+                 input_queue, output_queue, ready_queue) -> None:
+    """
+    Processo de trabalho do EmbeddingProcessPool
+    
+    Carrega sua própria cópia do modelo, informa o resultado da carga na
+    fila ready_queue (None ou a mensagem de erro) e processa batches da
+    fila de entrada até receber None.
+    """
+    os.environ["OMP_NUM_THREADS"] = str(num_threads)
+    os.environ["EMBEDDING_ONNX_THREADS"] = str(num_threads)
+    os.environ["TOKENIZERS_PARALLELISM"] = "false"
+    
+    try:
+        import torch
+        torch.set_num_threads(num_threads)
+    except ImportError:
+        pass
+    
+    try:
+        model = create_embedding_model(model_name, device=device, backend=backend)
+    except Exception as e:
+        ready_queue.put(f"Erro ao carregar modelo no worker: {str(e)}")
+        return
+    ready_queue.put(None)
+    
+    while True:
+        item = input_queue.get()
+        if item is None:
+            return
+        
+        job_id, batch_id, texts = item
+        try:
+            embeddings = model.encode(
+                texts,
+                batch_size=len(texts),
+                convert_to_numpy=True,
+                show_progress_bar=False
+            )
+            output_queue.put((job_id, batch_id, np.asarray(embeddings, dtype=np.float32), None))
+        except Exception as e:
+            output_queue.put((job_id, batch_id, None, str(e)))
+
+
+class EmbeddingProcessPool:
+    """
+    Pool de processos para geração de embeddings em documentos grandes
+    
+    Semelhante ao start_multi_process_pool do sentence-transformers, mas
+    independente do backend: cada worker carrega o modelo uma vez e recebe
+    batches já planejados por encode_batch. O pool só é criado depois que
+    todos os workers carregam o modelo; cada resultado leva o id do job,
+    e resultados de jobs anteriores são descartados.
+    """
+    
+    def __init__(self, model_name: str, device: str, backend: str,
+                 num_workers: int, threads_per_worker: int = 1):
+        """
+        Inicia o pool de processos
+        
+        Args:
+            model_name: Nome do modelo
+            device: Dispositivo de execução
+            backend: Backend de execução
+            num_workers: Número de processos
+            threads_per_worker: Threads de inferência por processo
+        
+        Raises:
+            RuntimeError: Se algum worker não carregar o modelo
+        """
+        self.num_workers = num_workers
+        self.threads_per_worker = threads_per_worker
+        
+        context = multiprocessing.get_context("spawn")
+        self._input_queue = context.Queue()
+        self._output_queue = context.Queue()
+        self._ready_queue = context.Queue()
+        self._lock = threading.Lock()
+        self._job_id = 0
+        self._processes = []
+        self.broken = False
+        
+        print(f"[embedding] Iniciando pool com {num_workers} processos "
+              f"({threads_per_worker} threads cada)...")
+        
+        for _ in range(num_workers):
+            process = context.Process(
+                target=_pool_worker,
+                args=(model_name, device, backend, threads_per_worker,
+                      self._input_queue, self._output_queue, self._ready_queue),
+                daemon=True
+            )
+            process.start()
+            self._processes.append(process)
+        
+        # Aguarda a carga do modelo em todos os workers antes de aceitar jobs
+        try:
+            errors = [self._wait(self._ready_queue) for _ in range(num_workers)]
+            errors = [error for error in errors if error is not None]
+            if errors:
+                raise RuntimeError(errors[0])
+        except BaseException:
+            self.broken = True
+            self.close()
+            raise
+    
+    def encode_batches(self, batches: List[List[str]]) -> List[np.ndarray]:
+        """
+        Distribui batches entre os processos
+        
+        Args:
+            batches: Lista de batches de textos
+            
+        Returns:
+            Lista de arrays de embeddings, na mesma ordem dos batches
+        """
+        results: List[Optional[np.ndarray]] = [None] * len(batches)
+        
+        # Um job por vez: a fila de saída é compartilhada entre os workers
+        with self._lock:
+            if self.broken:
+                raise RuntimeError("Pool de embeddings com falha")
+            
+            self._job_id += 1
+            job_id = self._job_id
+            for batch_id, texts in enumerate(batches):
+                self._input_queue.put((job_id, batch_id, texts))
+            
+            errors = []
+            pending = len(batches)
+            while pending:
+                result_job_id, batch_id, embeddings, error = self._wait(self._output_queue)
+                # Resultado de um job anterior (interrompido): descartado
+                if result_job_id != job_id or batch_id is None:
+                    continue
+                pending -= 1
+                if error is not None:
+                    errors.append(error)
+                else:
+                    results[batch_id] = embeddings
+        
+        # Só falha após drenar a fila, para não misturar resultados com o próximo job
+        if errors:
+            raise RuntimeError(errors[0])
+        
+        return results
+    
+    def _wait(self, results_queue):
+        """Aguarda a próxima mensagem da fila, falhando se algum worker morrer"""
+        while True:
+            try:
+                return results_queue.get(timeout=1.0)
+            except queue.Empty:
+                dead = [p for p in self._processes if not p.is_alive()]
+                if dead:
+                    self.broken = True
+                    raise RuntimeError(
+                        f"Worker do pool de embeddings encerrado (exit code {dead[0].exitcode})"
+                    )
+    
+    def close(self) -> None:
+        """Encerra os processos do pool"""
+        for _ in self._processes:
+            self._input_queue.put(None)
+        
+        for process in self._processes:
+            process.join(timeout=10)
+            if process.is_alive():
+                process.terminate()
+        
+        self._processes = []
+
 
 class EmbeddingService:
     """Serviço para geração de embeddings vetoriais"""
     
-    def __init__(self, model_name: str = None, device: str = None):
+    # Indica que os vetores de chunks e queries são calculados no próprio SQL
+    in_database = False
+    
+    def __init__(self, model_name: str = None, device: str = None,
+                 query_cache: QueryEmbeddingCache = None,
+                 batch_max_size: int = None, batch_max_wait_ms: float = None,
+                 backend: str = None):
         """
         Inicializa o serviço de embeddings
         
         Args:
             model_name: Nome do modelo Sentence Transformers
             device: Dispositivo para execução ('cpu', 'cuda', etc.)
+            query_cache: Cache de embeddings de queries (padrão: configurado via ambiente)
+            batch_max_size: Máximo de queries concorrentes agrupadas por batch
+            batch_max_wait_ms: Espera máxima para agrupar queries (0 desabilita)
+            backend: Backend de execução ('sentence-transformers' ou 'onnx';
+                'database' é tratado por InDatabaseEmbeddingService)
         """
         self.model_name = model_name or os.environ.get(
             "EMBEDDING_MODEL", 
-            "sentence-transformers/all-MiniLM-L6-v2"
+            DEFAULT_EMBEDDING_MODEL
         )
         self.device = device or os.environ.get("EMBEDDING_DEVICE", "cpu")
+        self.backend = resolve_backend_name(backend)
         self.model = None
         self.dimension = None
         
         self._load_model()
+        
+        self.query_cache = query_cache or QueryEmbeddingCache(
+            max_size=int(os.environ.get("QUERY_CACHE_SIZE", "1024")),
+            ttl=float(os.environ.get("QUERY_CACHE_TTL", "3600")),
+            persist_path=os.environ.get("QUERY_CACHE_FILE") or None,
+            model=f"{self.backend}:{self.model_name}",
+            dimension=self.dimension
+        )
+        
+        if batch_max_size is None:
+            batch_max_size = int(os.environ.get("EMBEDDING_BATCH_MAX_SIZE", "32"))
+        if batch_max_wait_ms is None:
+            batch_max_wait_ms = float(os.environ.get("EMBEDDING_BATCH_MAX_WAIT_MS", "5"))
+        
+        self.batcher: Optional[MicroBatcher] = None
+        if batch_max_wait_ms > 0 and batch_max_size > 1:
+            self.batcher = MicroBatcher(
+                self._encode_queries,
+                max_batch_size=batch_max_size,
+                max_wait_ms=batch_max_wait_ms
+            )
+        
+        # Pool de processos para documentos grandes (iniciado sob demanda)
+        self.pool_workers = int(os.environ.get("EMBEDDING_POOL_WORKERS", "0"))
+        self.pool_threads_per_worker = int(os.environ.get("EMBEDDING_POOL_THREADS_PER_WORKER", "1"))
+        self.pool_min_chunks = int(os.environ.get("EMBEDDING_POOL_MIN_CHUNKS", "256"))
+        self._pool: Optional[EmbeddingProcessPool] = None
+        self._pool_lock = threading.Lock()
     
     def _load_model(self) -> None:
-        """Carrega o modelo de embeddings"""
+        """Carrega o modelo de embeddings no backend configurado"""
         try:
-            from sentence_transformers import SentenceTransformer
-            
-            print(f"[embedding] Carregando modelo {self.model_name}...")
+            print(f"[embedding] Carregando modelo {self.model_name} (backend: {self.backend})...")
             start_time = time.time()
             
-            self.model = SentenceTransformer(self.model_name, device=self.device)
+            self.model = create_embedding_model(
+                self.model_name, device=self.device, backend=self.backend
+            )
             
             # Determina a dimensão do embedding
             test_embedding = self.model.encode(["test"], convert_to_numpy=True)
@@ -56,14 +622,60 @@ class EmbeddingService:
             print(f"[embedding] Modelo carregado em {load_time:.2f}s")
             print(f"[embedding] Dimensão dos embeddings: {self.dimension}")
             
-        except ImportError:
-            raise RuntimeError(
-                "sentence-transformers não está instalado. "
-                "Instale com: pip install sentence-transformers"
-            )
+        except RuntimeError:
+            raise
         except Exception as e:
             raise RuntimeError(f"Erro ao carregar modelo de embeddings: {str(e)}")
     
+    def memory_bytes(self) -> int:
+        """
+        Estima a memória ocupada pelo modelo carregado
+        
+        Returns:
+            Bytes estimados (pesos do modelo)
+        """
+        if self.model is None:
+            return 0
+        
+        # PyTorch: soma dos tensores de parâmetros e buffers
+        if hasattr(self.model, "parameters"):
+            total = sum(p.numel() * p.element_size() for p in self.model.parameters())
+            if hasattr(self.model, "buffers"):
+                total += sum(b.numel() * b.element_size() for b in self.model.buffers())
+            return int(total)
+        
+        # ONNX Runtime: tamanho do arquivo do modelo
+        onnx_file = getattr(self.model, "onnx_file", None)
+        if onnx_file and os.path.exists(onnx_file):
+            return os.path.getsize(onnx_file)
+        
+        return 0
+    
+    def token_offsets(self, text: str) -> Optional[List[Tuple[int, int]]]:
+        """
+        Tokeniza o texto com o tokenizer do modelo ativo (usado no chunking por tokens)
+        
+        Args:
+            text: Texto completo
+            
+        Returns:
+            Lista de offsets (início, fim) por token, ou None se indisponível
+        """
+        if self.model is None:
+            return None
+        return token_offsets(self.model, text)
+    
+    def max_chunk_tokens(self) -> int:
+        """
+        Retorna quantos tokens de conteúdo cabem no max_seq_length do modelo
+        
+        Returns:
+            Número máximo de tokens por chunk
+        """
+        if self.model is None:
+            return 0
+        return max_content_tokens(self.model)
+    
     def get_dimension(self) -> int:
         """
         Retorna a dimensão dos embeddings
@@ -86,24 +698,57 @@ class EmbeddingService:
         if not text or not text.strip():
             raise ValueError("Texto vazio não pode ser processado")
         
+        cached = self.query_cache.get(text)
+        if cached is not None:
+            return cached
+        
         try:
-            embedding = self.model.encode(
-                text,
-                convert_to_numpy=True,
-                show_progress_bar=False
-            )
+            batcher = self.batcher
+            if batcher is not None and not batcher.closed:
+                embedding = batcher.submit(text)
+            else:
+                embedding = self._encode_queries([text])[0]
+            
+            self.query_cache.put(text, embedding)
             return embedding
             
         except Exception as e:
             raise RuntimeError(f"Erro ao gerar embedding: {str(e)}")
     
-    def encode_batch(self, texts: List[str], batch_size: int = 32) -> np.ndarray:
+    def _encode_queries(self, texts: List[str]) -> np.ndarray:
+        """
+        Executa um único forward pass para um grupo de queries
+        
+        Args:
+            texts: Lista de textos
+            
+        Returns:
+            Array numpy float32 (shape: [n_texts, dimension])
+        """
+        embeddings = self.model.encode(
+            texts,
+            batch_size=len(texts),
+            convert_to_numpy=True,
+            show_progress_bar=False
+        )
+        return np.asarray(embeddings, dtype=np.float32)
+    
+    def encode_batch(self, texts: List[str], batch_size: int = None,
+                     token_budget: int = None,
+                     token_lengths: List[Optional[int]] = None) -> np.ndarray:
         """
         Gera embeddings para múltiplos textos em batch
         
+        Os textos são ordenados por número de tokens e agrupados em batches
+        de comprimento semelhante, cujo tamanho é definido pelo orçamento de
+        tokens (batch x maior sequência). O resultado volta à ordem original.
+        
         Args:
             texts: Lista de textos
-            batch_size: Tamanho do batch para processamento
+            batch_size: Limite de segurança de textos por batch (padrão: MAX_ENCODE_BATCH_SIZE)
+            token_budget: Tokens (com padding) por batch (padrão: EMBEDDING_TOKEN_BUDGET)
+            token_lengths: Tokens de conteúdo já contados por texto (ex.:
+                'token_count' dos chunks por tokens); evita tokenizar de novo
             
         Returns:
             Array numpy com os embeddings (shape: [n_texts, dimension])
@@ -111,37 +756,162 @@ class EmbeddingService:
         if not texts:
             raise ValueError("Lista de textos vazia")
         
+        if token_lengths is not None and len(token_lengths) != len(texts):
+            raise ValueError("token_lengths deve ter um valor por texto")
+        
         # Remove textos vazios
-        valid_texts = [t for t in texts if t and t.strip()]
+        valid = [i for i, t in enumerate(texts) if t and t.strip()]
+        valid_texts = [texts[i] for i in valid]
         if not valid_texts:
             raise ValueError("Nenhum texto válido para processar")
         
+        if batch_size is None:
+            batch_size = MAX_ENCODE_BATCH_SIZE
+        if token_budget is None:
+            token_budget = int(os.environ.get("EMBEDDING_TOKEN_BUDGET", "8192"))
+        
         try:
             print(f"[embedding] Gerando embeddings para {len(valid_texts)} textos...")
             start_time = time.time()
             
-            embeddings = self.model.encode(
-                valid_texts,
-                batch_size=batch_size,
-                convert_to_numpy=True,
-                show_progress_bar=len(valid_texts) > 10
-            )
+            if token_lengths is not None and all(token_lengths[i] is not None for i in valid):
+                lengths = self._sequence_lengths([token_lengths[i] for i in valid])
+            else:
+                lengths = count_tokens(self.model, valid_texts)
+            batches = self._plan_batches(lengths, batch_size, token_budget)
+            
+            embeddings = np.empty((len(valid_texts), self.dimension), dtype=np.float32)
+            real_tokens = 0
+            padded_tokens = 0
+            
+            pool = self._get_pool() if len(valid_texts) > self.pool_min_chunks else None
+            
+            if pool is not None:
+                batch_results = pool.encode_batches(
+                    [[valid_texts[i] for i in indices] for indices in batches]
+                )
+            else:
+                batch_results = (
+                    self.model.encode(
+                        [valid_texts[i] for i in indices],
+                        batch_size=len(indices),
+                        convert_to_numpy=True,
+                        show_progress_bar=False
+                    )
+                    for indices in batches
+                )
+            
+            for indices, batch_embeddings in zip(batches, batch_results):
+                embeddings[indices] = batch_embeddings
+                
+                batch_lengths = [lengths[i] for i in indices]
+                real_tokens += sum(batch_lengths)
+                padded_tokens += len(indices) * max(batch_lengths)
             
             elapsed = time.time() - start_time
+            padding_efficiency = real_tokens / padded_tokens if padded_tokens else 1.0
             print(f"[embedding] Embeddings gerados em {elapsed:.2f}s "
-                  f"({len(valid_texts)/elapsed:.1f} textos/s)")
+                  f"({len(valid_texts)/max(elapsed, 1e-9):.1f} textos/s, "
+                  f"{len(batches)} batches, eficiência de padding {padding_efficiency:.1%})")
             
             return embeddings
             
         except Exception as e:
             raise RuntimeError(f"Erro ao gerar embeddings em batch: {str(e)}")
     
-    def encode_chunks(self, chunks: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    def _sequence_lengths(self, content_lengths: List[int]) -> List[int]:
+        """Comprimento das sequências (com tokens especiais, até max_seq_length)"""
+        max_seq_length = int(getattr(self.model, "max_seq_length", None) or 256)
+        special = max_seq_length - self.max_chunk_tokens()
+        return [min(max_seq_length, length + special) for length in content_lengths]
+    
+    def _get_pool(self) -> Optional[EmbeddingProcessPool]:
+        """
+        Retorna o pool de processos, iniciando-o na primeira utilização
+        
+        Returns:
+            Instância de EmbeddingProcessPool ou None se desabilitado
+        """
+        if self.pool_workers <= 0:
+            return None
+        
+        with self._pool_lock:
+            if self._pool is not None and self._pool.broken:
+                print("[embedding] AVISO: pool de processos com falha - reiniciando")
+                self._pool.close()
+                self._pool = None
+            
+            if self._pool is None:
+                self._pool = EmbeddingProcessPool(
+                    self.model_name,
+                    device=self.device,
+                    backend=self.backend,
+                    num_workers=self.pool_workers,
+                    threads_per_worker=self.pool_threads_per_worker
+                )
+            return self._pool
+    
+    def close(self) -> None:
+        """Libera recursos (micro-batcher e pool de processos)"""
+        if self.batcher is not None:
+            self.batcher.close()
+            self.batcher = None
+        
+        with self._pool_lock:
+            if self._pool is not None:
+                self._pool.close()
+                self._pool = None
+    
+    @staticmethod
+    def _plan_batches(lengths: List[int], max_batch_size: int,
+                      token_budget: int) -> List[List[int]]:
+        """
+        Agrupa índices por comprimento (maiores primeiro) respeitando o orçamento de tokens
+        
+        Cada batch recebe tantos textos quantos cabem no orçamento com o
+        padding do seu texto mais longo; max_batch_size só limita batches
+        de textos muito curtos.
+        
+        Args:
+            lengths: Número de tokens por texto
+            max_batch_size: Limite de segurança de textos por batch
+            token_budget: Máximo de tokens com padding por batch
+            
+        Returns:
+            Lista de batches (listas de índices na ordem original)
+        """
+        order = sorted(range(len(lengths)), key=lambda i: -lengths[i])
+        
+        batches = []
+        current: List[int] = []
+        current_limit = 0
+        
+        for i in order:
+            if not current:
+                # O primeiro texto é o mais longo do batch e define o padding
+                current_limit = max(1, min(max_batch_size, token_budget // max(1, lengths[i])))
+            
+            current.append(i)
+            
+            if len(current) >= current_limit:
+                batches.append(current)
+                current = []
+        
+        if current:
+            batches.append(current)
+        
+        return batches
+    
+    def encode_chunks(self, chunks: List[Dict[str, Any]],
+                      short_dimension: int = None,
+                      keep_full: bool = True) -> List[Dict[str, Any]]:
         """
         Gera embeddings para uma lista de chunks
         
         Args:
             chunks: Lista de dicionários com chunks (deve conter chave 'text')
+            short_dimension: Dimensão reduzida (Matryoshka) a gerar em 'embedding_short'
+            keep_full: Mantém o embedding completo junto do reduzido
             
         Returns:
             Lista de chunks com embeddings adicionados
@@ -152,19 +922,50 @@ class EmbeddingService:
         # Extrai textos dos chunks
         texts = [chunk['text'] for chunk in chunks]
         
-        # Gera embeddings
-        embeddings = self.encode_batch(texts)
+        # Gera embeddings (reaproveitando a contagem de tokens dos chunks por tokens)
+        embeddings = self.encode_batch(
+            texts, token_lengths=[chunk.get('token_count') for chunk in chunks]
+        )
+        short_embeddings = self.reduce_dimension(embeddings, short_dimension) \
+            if short_dimension else None
         
         # Adiciona embeddings aos chunks
         enriched_chunks = []
         for i, chunk in enumerate(chunks):
             enriched_chunk = chunk.copy()
-            enriched_chunk['embedding'] = embeddings[i]
+            enriched_chunk['embedding'] = embeddings[i] if keep_full or short_embeddings is None else None
             enriched_chunk['embedding_dimension'] = self.dimension
+            if short_embeddings is not None:
+                enriched_chunk['embedding_short'] = short_embeddings[i]
+                enriched_chunk['embedding_short_dimension'] = short_dimension
             enriched_chunks.append(enriched_chunk)
         
         return enriched_chunks
     
+    def reduce_dimension(self, embeddings: np.ndarray, dimension: int) -> np.ndarray:
+        """
+        Trunca embeddings para uma dimensão menor e renormaliza (Matryoshka)
+        
+        Só faz sentido para modelos treinados com Matryoshka Representation
+        Learning, em que as primeiras dimensões concentram a informação.
+        
+        Args:
+            embeddings: Embedding(s) completo(s) (shape: [dimension] ou [n, dimension])
+            dimension: Dimensão reduzida
+            
+        Returns:
+            Array float32 normalizado com o mesmo número de eixos da entrada
+        """
+        if not 0 < dimension < self.get_dimension():
+            raise ValueError(
+                f"Dimensão reduzida inválida: {dimension} "
+                f"(modelo {self.model_name} tem dimensão {self.get_dimension()})"
+            )
+        
+        embeddings = np.asarray(embeddings)
+        reduced = normalize_rows(embeddings[..., :dimension])
+        return reduced[0] if embeddings.ndim == 1 else reduced
+    
     def calculate_similarity(self, embedding1: np.ndarray, 
                            embedding2: np.ndarray) -> float:
         """
@@ -193,15 +994,20 @@ class EmbeddingService:
     def find_similar(self, query_embedding: np.ndarray, 
                     embeddings: np.ndarray, 
                     top_k: int = 5,
-                    threshold: float = 0.0) -> List[Dict[str, Any]]:
+                    threshold: float = 0.0,
+                    normalized: bool = False) -> List[Dict[str, Any]]:
         """
         Encontra os embeddings mais similares a uma query
         
+        Para coleções grandes ou persistentes, use MemoryMappedVectorStore
+        (vector_store.py), que mantém os vetores já normalizados em disco.
+        
         Args:
             query_embedding: Embedding da query
             embeddings: Array de embeddings para comparar
             top_k: Número de resultados a retornar
             threshold: Threshold mínimo de similaridade
+            normalized: Indica que embeddings já estão normalizados (evita a cópia)
             
         Returns:
             Lista de dicionários com índices e similaridades
@@ -209,59 +1015,361 @@ class EmbeddingService:
         if len(embeddings) == 0:
             return []
         
-        # Normaliza query
-        query_norm = query_embedding / np.linalg.norm(query_embedding)
+        query_norm = normalize_rows(query_embedding)
+        embeddings_norm = np.asarray(embeddings, dtype=np.float32) if normalized \
+            else normalize_rows(embeddings)
         
-        # Normaliza embeddings
-        embeddings_norm = embeddings / np.linalg.norm(embeddings, axis=1, keepdims=True)
+        # Top-k parcial (argpartition) em vez de ordenar todas as similaridades
+        scores, indices = exact_top_k(query_norm, embeddings_norm, top_k)
         
-        # Calcula similaridades
-        similarities = np.dot(embeddings_norm, query_norm)
+        return to_results(scores, indices, threshold)[0]
+
+
+class EmbeddingModelRegistry:
+    """
+    Registro de modelos de embedding com carregamento sob demanda
+    
+    O modelo padrão fica sempre carregado; os demais são carregados no
+    primeiro uso e descarregados em ordem LRU quando a soma estimada da
+    memória dos modelos ultrapassa o orçamento configurado. Com o servidor
+    de modelo (EMBEDDING_SERVER_URL), os modelos adicionais são carregados
+    no servidor e o registro guarda apenas clientes leves.
+    """
+    
+    def __init__(self, default_service: EmbeddingService,
+                 models: Dict[str, str] = None,
+                 collection_models: Dict[str, str] = None,
+                 memory_budget_mb: float = 0,
+                 collection_dimensions: Dict[str, int] = None,
+                 keep_full: bool = True,
+                 rescore_factor: int = 4):
+        """
+        Inicializa o registro
         
-        # Converte para [0, 1]
-        similarities = (similarities + 1) / 2
+        Args:
+            default_service: Serviço do modelo padrão (já carregado)
+            models: Mapeamento alias -> nome do modelo permitido
+            collection_models: Mapeamento coleção -> alias ou nome do modelo
+            memory_budget_mb: Orçamento de memória dos modelos em MB (0 = sem limite)
+            collection_dimensions: Mapeamento coleção -> dimensão reduzida (Matryoshka)
+            keep_full: Armazena também o embedding completo nas coleções reduzidas
+            rescore_factor: Candidatos por resultado na busca em dois estágios
+        """
+        self.default_service = default_service
+        self.default_model = default_service.model_name
+        self.memory_budget = int(memory_budget_mb * 1024 * 1024)
+        self.collection_dimensions = dict(collection_dimensions or {})
+        self.keep_full = keep_full
+        self.rescore_factor = rescore_factor
         
-        # Filtra por threshold
-        valid_indices = np.where(similarities >= threshold)[0]
+        self.models: Dict[str, str] = {self.default_model: self.default_model}
+        for alias, model_name in (models or {}).items():
+            self.models[alias] = model_name
+            self.models[model_name] = model_name
         
-        if len(valid_indices) == 0:
-            return []
+        self.collection_models = {
+            collection: self._resolve_name(model)
+            for collection, model in (collection_models or {}).items()
+        }
         
-        # Ordena por similaridade
-        sorted_indices = valid_indices[np.argsort(-similarities[valid_indices])]
+        self._services: "OrderedDict[str, EmbeddingService]" = OrderedDict()
+        self._services[self.default_model] = default_service
+        self._loading: Dict[str, threading.Event] = {}
+        self._lock = threading.Lock()
+    
+    @property
+    def multi_model(self) -> bool:
+        """Indica se mais de um modelo pode ser usado"""
+        return len(set(self.models.values())) > 1
+    
+    def _resolve_name(self, model: str) -> str:
+        """Converte alias ou nome em nome de modelo permitido"""
+        if model not in self.models:
+            raise ValueError(
+                f"Modelo de embedding não disponível: {model}. "
+                f"Opções: {', '.join(sorted(self.models))}"
+            )
+        return self.models[model]
+    
+    def resolve(self, model: str = None, collection: str = None) -> str:
+        """
+        Determina o modelo para uma requisição
+        
+        Args:
+            model: Alias ou nome do modelo (opcional)
+            collection: Nome da coleção (opcional)
+            
+        Returns:
+            Nome do modelo
+        """
+        collection_model = self.collection_models.get(collection) if collection else None
         
-        # Retorna top_k
-        results = []
-        for idx in sorted_indices[:top_k]:
-            results.append({
-                'index': int(idx),
-                'similarity': float(similarities[idx])
-            })
+        if model:
+            model_name = self._resolve_name(model)
+            if collection_model and model_name != collection_model:
+                raise ValueError(
+                    f"A coleção '{collection}' usa o modelo {collection_model}; "
+                    f"modelo solicitado: {model_name}"
+                )
+            return model_name
         
-        return results
+        return collection_model or self.default_model
+    
+    def dimension_for(self, collection: str = None) -> Optional[int]:
+        """
+        Retorna a dimensão reduzida (Matryoshka) de uma coleção
+        
+        Args:
+            collection: Nome da coleção (opcional)
+            
+        Returns:
+            Dimensão reduzida ou None (coleção usa apenas vetores completos)
+        """
+        return self.collection_dimensions.get(collection) if collection else None
+    
+    def get(self, model: str = None, collection: str = None) -> EmbeddingService:
+        """
+        Retorna o serviço do modelo, carregando-o se necessário
+        
+        Args:
+            model: Alias ou nome do modelo (opcional)
+            collection: Nome da coleção (opcional)
+            
+        Returns:
+            Instância do EmbeddingService
+        """
+        model_name = self.resolve(model, collection)
+        
+        while True:
+            with self._lock:
+                service = self._services.get(model_name)
+                if service is not None:
+                    self._services.move_to_end(model_name)
+                    return service
+                
+                loading = self._loading.get(model_name)
+                if loading is None:
+                    loading = self._loading[model_name] = threading.Event()
+                    break
+            
+            # Outra requisição já está carregando o modelo
+            loading.wait()
+        
+        # Carrega fora do lock: requisições de modelos já carregados não esperam
+        try:
+            service = self._create_service(model_name)
+        except Exception:
+            with self._lock:
+                del self._loading[model_name]
+            loading.set()
+            raise
+        
+        with self._lock:
+            self._services[model_name] = service
+            del self._loading[model_name]
+            self._evict()
+        loading.set()
+        
+        return service
+    
+    def _create_service(self, model_name: str) -> EmbeddingService:
+        """Cria o serviço de um modelo adicional"""
+        server_url = getattr(self.default_service, "server_url", None)
+        if server_url:
+            from model_server import EmbeddingClient
+            return EmbeddingClient(server_url=server_url, model=model_name)
+        
+        # Só o modelo padrão persiste o cache de queries (QUERY_CACHE_FILE)
+        return create_embedding_service(
+            model_name=model_name,
+            device=self.default_service.device,
+            backend=self.default_service.backend,
+            query_cache=QueryEmbeddingCache(
+                max_size=int(os.environ.get("QUERY_CACHE_SIZE", "1024")),
+                ttl=float(os.environ.get("QUERY_CACHE_TTL", "3600"))
+            )
+        )
+    
+    def _evict(self) -> None:
+        """Descarrega modelos LRU até respeitar o orçamento de memória"""
+        if self.memory_budget <= 0:
+            return
+        
+        while self._total_memory() > self.memory_budget:
+            victim = next(
+                (name for name in self._services
+                 if name != self.default_model and name != next(reversed(self._services))),
+                None
+            )
+            if victim is None:
+                break
+            
+            service = self._services.pop(victim)
+            service.close()
+            print(f"[embedding] Modelo {victim} descarregado (orçamento de memória)")
+    
+    def _total_memory(self) -> int:
+        return sum(service.memory_bytes() for service in self._services.values())
+    
+    def stats(self) -> Dict[str, Any]:
+        """
+        Retorna informações dos modelos disponíveis e carregados
+        
+        Returns:
+            Dicionário com modelos, coleções e memória estimada
+        """
+        with self._lock:
+            loaded = {
+                name: {
+                    'dimension': service.get_dimension(),
+                    'memory_mb': round(service.memory_bytes() / (1024 * 1024), 1)
+                }
+                for name, service in self._services.items()
+            }
+        
+        return {
+            'default_model': self.default_model,
+            'available_models': self.models,
+            'collection_models': self.collection_models,
+            'loaded_models': loaded,
+            'memory_budget_mb': round(self.memory_budget / (1024 * 1024), 1),
+            'collection_dimensions': self.collection_dimensions,
+            'keep_full_embeddings': self.keep_full
+        }
+    
+    def close(self) -> None:
+        """Libera recursos de todos os modelos carregados"""
+        with self._lock:
+            for service in self._services.values():
+                service.close()
+
+
+def parse_model_mapping(value: str) -> Dict[str, str]:
+    """
+    Interpreta mapeamentos no formato "chave=valor,chave=valor"
+    
+    Args:
+        value: Texto de configuração (ex.: EMBEDDING_MODELS)
+        
+    Returns:
+        Dicionário com os pares
+    """
+    mapping = {}
+    for item in (value or "").split(","):
+        item = item.strip()
+        if not item:
+            continue
+        key, sep, target = item.partition("=")
+        if not sep:
+            key, target = item, item
+        mapping[key.strip()] = target.strip()
+    return mapping
 
 
 # Instância global (será inicializada na aplicação principal)
 _embedding_service: Optional[EmbeddingService] = None
+_model_registry: Optional[EmbeddingModelRegistry] = None
 
 
 def initialize_embedding_service(model_name: str = None, 
-                                device: str = None) -> EmbeddingService:
+                                device: str = None,
+                                backend: str = None,
+                                server_url: str = None) -> EmbeddingService:
     """
     Inicializa o serviço de embeddings
     
     Args:
         model_name: Nome do modelo
         device: Dispositivo de execução
+        backend: Backend de execução (padrão: EMBEDDING_BACKEND)
+        server_url: URL do servidor de modelo compartilhado; se informada,
+            retorna um cliente leve em vez de carregar o modelo
         
     Returns:
         Instância do EmbeddingService
     """
     global _embedding_service
-    _embedding_service = EmbeddingService(model_name=model_name, device=device)
+    
+    if server_url:
+        from model_server import EmbeddingClient
+        _embedding_service = EmbeddingClient(server_url=server_url)
+    elif resolve_backend_name(backend) == BACKEND_DATABASE:
+        # EMBEDDING_MODEL descreve o modelo local; no banco vale EMBEDDING_DB_MODEL
+        from database_embedding import InDatabaseEmbeddingService
+        _embedding_service = InDatabaseEmbeddingService()
+    else:
+        _embedding_service = EmbeddingService(model_name=model_name, device=device,
+                                              backend=backend)
     return _embedding_service
 
 
+def initialize_model_registry(default_service: EmbeddingService = None,
+                              models: str = None,
+                              collection_models: str = None,
+                              memory_budget_mb: float = None,
+                              collection_dimensions: str = None,
+                              keep_full: bool = None,
+                              rescore_factor: int = None) -> EmbeddingModelRegistry:
+    """
+    Inicializa o registro de modelos
+    
+    Args:
+        default_service: Serviço do modelo padrão (padrão: serviço global)
+        models: Modelos adicionais "alias=modelo,..." (padrão: EMBEDDING_MODELS)
+        collection_models: Modelos por coleção "coleção=alias,..." (padrão: EMBEDDING_COLLECTION_MODELS)
+        memory_budget_mb: Orçamento de memória em MB (padrão: EMBEDDING_MODELS_MEMORY_MB)
+        collection_dimensions: Dimensões reduzidas "coleção=256,..." (padrão: EMBEDDING_COLLECTION_DIMENSIONS)
+        keep_full: Mantém embeddings completos (padrão: EMBEDDING_KEEP_FULL)
+        rescore_factor: Candidatos por resultado no reranqueamento (padrão: EMBEDDING_RESCORE_CANDIDATES)
+        
+    Returns:
+        Instância do EmbeddingModelRegistry
+    """
+    global _model_registry
+    
+    if models is None:
+        models = os.environ.get("EMBEDDING_MODELS", "")
+    if collection_models is None:
+        collection_models = os.environ.get("EMBEDDING_COLLECTION_MODELS", "")
+    if memory_budget_mb is None:
+        memory_budget_mb = float(os.environ.get("EMBEDDING_MODELS_MEMORY_MB", "0"))
+    if collection_dimensions is None:
+        collection_dimensions = os.environ.get("EMBEDDING_COLLECTION_DIMENSIONS", "")
+    if keep_full is None:
+        keep_full = os.environ.get("EMBEDDING_KEEP_FULL", "true").lower() == "true"
+    if rescore_factor is None:
+        rescore_factor = int(os.environ.get("EMBEDDING_RESCORE_CANDIDATES", "4"))
+    
+    try:
+        dimensions = {
+            collection: int(dimension)
+            for collection, dimension in parse_model_mapping(collection_dimensions).items()
+        }
+    except ValueError:
+        raise ValueError(f"EMBEDDING_COLLECTION_DIMENSIONS inválido: {collection_dimensions}")
+    
+    _model_registry = EmbeddingModelRegistry(
+        default_service or _embedding_service,
+        models=parse_model_mapping(models),
+        collection_models=parse_model_mapping(collection_models),
+        memory_budget_mb=memory_budget_mb,
+        collection_dimensions=dimensions,
+        keep_full=keep_full,
+        rescore_factor=rescore_factor
+    )
+    return _model_registry
+
+
+def get_model_registry() -> Optional[EmbeddingModelRegistry]:
+    """
+    Retorna o registro de modelos
+    
+    Returns:
+        Instância do EmbeddingModelRegistry ou None
+    """
+    return _model_registry
+
+
 def get_embedding_service() -> Optional[EmbeddingService]:
     """
     Retorna a instância do serviço de embeddings
@@ -273,15 +1381,25 @@ def get_embedding_service() -> Optional[EmbeddingService]:
 
 
 def create_embedding_service(model_name: str = None, 
-                            device: str = None) -> EmbeddingService:
+                            device: str = None,
+                            backend: str = None,
+                            query_cache: QueryEmbeddingCache = None) -> EmbeddingService:
     """
     Factory function para criar um EmbeddingService
     
     Args:
         model_name: Nome do modelo
         device: Dispositivo de execução
+        backend: Backend de execução (padrão: EMBEDDING_BACKEND)
+        query_cache: Cache de queries (padrão: configurado via ambiente,
+            persistido em QUERY_CACHE_FILE)
         
     Returns:
         Nova instância de EmbeddingService
     """
-    return EmbeddingService(model_name=model_name, device=device)
+    if resolve_backend_name(backend) == BACKEND_DATABASE:
+        from database_embedding import InDatabaseEmbeddingService
+        return InDatabaseEmbeddingService(model_name=model_name, query_cache=query_cache)
+    
+    return EmbeddingService(model_name=model_name, device=device, backend=backend,
+                            query_cache=query_cache)
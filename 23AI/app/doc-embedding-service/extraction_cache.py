@@ -0,0 +1,344 @@
+"""
+Disclaimer:
+
+Este código é fornecido como um exemplo open-source de contribuição comunitária para implementação de soluções utilizando a plataforma Oracle.
+É distribuído "AS IS" (como está), sem garantias, responsabilidades ou suporte de qualquer natureza.
+A Oracle Corporation não assume qualquer responsabilidade pelo conteúdo, precisão, funcionalidade ou forma deste material.
+"""
+
+"""
+extraction_cache.py - Cache em Disco do Texto Extraído
+Guarda o texto de cada parte (páginas, no caso de PDF) e o resumo da
+extração, endereçados pelo SHA-256 do arquivo, para que reprocessar o mesmo
+arquivo não repita a extração (nem o OCR)
+"""
+
+import os
+import gzip
+import json
+import tempfile
+import threading
+from typing import List, Dict, Any, Optional, Iterable, Iterator, Callable
+
+
+class ExtractionCache:
+    """
+    Cache de extração em disco com tamanho limitado (LRU por data de acesso)
+    
+    Cada entrada é um arquivo <sha256[:2]>/<sha256>.jsonl.gz com uma linha
+    por parte do texto e uma última linha com o resumo da extração e as
+    configurações que a produziram. A entrada é gravada em um arquivo
+    temporário e publicada com os.replace apenas quando a extração termina
+    sem erro e sem páginas com falha.
+    """
+    
+    SUFFIX = ".jsonl.gz"
+    
+    def __init__(self, directory: str, max_bytes: int = 1024 * 1024 * 1024):
+        """
+        Inicializa o cache
+        
+        Args:
+            directory: Diretório das entradas (criado se não existir)
+            max_bytes: Tamanho máximo do cache em disco (0 = sem limite)
+        """
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        
+        self._lock = threading.Lock()
+        
+        os.makedirs(self.directory, exist_ok=True)
+        self.size = sum(size for _, _, size in self._entries())
+    
+    def _path(self, key: str) -> str:
+        """Arquivo da entrada de `key`"""
+        return os.path.join(self.directory, key[:2], key + self.SUFFIX)
+    
+    def _entries(self) -> List[tuple]:
+        """Entradas em disco como (mtime, caminho, tamanho)"""
+        entries = []
+        for shard in os.scandir(self.directory):
+            if not shard.is_dir():
+                continue
+            for entry in os.scandir(shard.path):
+                if entry.name.endswith(self.SUFFIX):
+                    try:
+                        stat = entry.stat()
+                    except FileNotFoundError:
+                        continue
+                    entries.append((stat.st_mtime, entry.path, stat.st_size))
+        return entries
+    
+    def get(self, key: str, settings: Dict[str, Any] = None) -> Optional[Dict[str, Any]]:
+        """
+        Busca o texto extraído de um arquivo
+        
+        Args:
+            key: SHA-256 do conteúdo do arquivo (calculate_hash)
+            settings: Configurações de extração exigidas; uma entrada gravada
+                com outras configurações conta como miss (None = qualquer uma)
+        
+        Returns:
+            Dicionário com 'pages' (texto de cada parte) e 'extraction'
+            (resumo da extração), ou None
+        """
+        path = self._path(key)
+        
+        try:
+            pages = []
+            extraction = None
+            stored_settings = None
+            with gzip.open(path, "rt", encoding="utf-8") as f:
+                for line in f:
+                    record = json.loads(line)
+                    if 'extraction' in record:
+                        extraction = record['extraction']
+                        stored_settings = record.get('settings')
+                    else:
+                        pages.append(record['page'])
+            
+            if extraction is None:
+                raise ValueError("entrada incompleta")
+            
+            if settings is not None and stored_settings != settings:
+                with self._lock:
+                    self.misses += 1
+                return None
+            
+            # Marca o acesso (ordem de remoção)
+            os.utime(path)
+        
+        except FileNotFoundError:
+            with self._lock:
+                self.misses += 1
+            return None
+        
+        except Exception as e:
+            print(f"[extraction_cache] AVISO: entrada inválida {key[:12]}... removida: {e}")
+            self._remove(path)
+            with self._lock:
+                self.misses += 1
+            return None
+        
+        with self._lock:
+            self.hits += 1
+        return {'pages': pages, 'extraction': extraction}
+    
+    def record(self, key: str, pages: Iterable[str],
+               extraction: Callable[[], Dict[str, Any]],
+               settings: Dict[str, Any] = None) -> Iterator[str]:
+        """
+        Repassa as partes do texto, gravando-as no cache à medida que passam
+        
+        A entrada só é publicada se `pages` terminar sem erro e sem páginas
+        com falha (extraction['failed_pages']); se o consumidor parar antes
+        ou a extração falhar, nada é gravado.
+        
+        Args:
+            key: SHA-256 do conteúdo do arquivo
+            pages: Partes do texto, em ordem
+            extraction: Retorna o resumo da extração (chamado ao final)
+            settings: Configurações de extração gravadas com a entrada (get)
+        
+        Yields:
+            As mesmas partes de `pages`
+        """
+        shard = os.path.dirname(self._path(key))
+        tmp_path = None
+        
+        try:
+            os.makedirs(shard, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(suffix=".tmp", dir=shard)
+            os.close(fd)
+            writer = gzip.open(tmp_path, "wt", encoding="utf-8", compresslevel=1)
+        except Exception as e:
+            print(f"[extraction_cache] AVISO: não foi possível gravar no cache: {e}")
+            if tmp_path:
+                self._remove(tmp_path)
+            yield from pages
+            return
+        
+        published = False
+        failed = False
+        try:
+            for page in pages:
+                if not failed:
+                    try:
+                        writer.write(json.dumps({'page': page}, ensure_ascii=False) + "\n")
+                    except Exception as e:
+                        print(f"[extraction_cache] AVISO: não foi possível gravar no cache: {e}")
+                        failed = True
+                yield page
+            
+            summary = extraction() if not failed else None
+            if summary and summary.get('failed_pages'):
+                # Texto parcial: a próxima extração tenta as páginas de novo
+                print(f"[extraction_cache] Extração com páginas com falha "
+                      f"{summary['failed_pages']} não gravada no cache")
+            elif summary is not None:
+                try:
+                    writer.write(json.dumps({'extraction': summary, 'settings': settings},
+                                            ensure_ascii=False) + "\n")
+                    writer.close()
+                    published = self._publish(tmp_path, self._path(key))
+                except Exception as e:
+                    print(f"[extraction_cache] AVISO: não foi possível gravar no cache: {e}")
+        
+        finally:
+            if not published:
+                try:
+                    writer.close()
+                except Exception:
+                    pass
+                self._remove(tmp_path)
+    
+    def put(self, key: str, pages: List[str], extraction: Dict[str, Any],
+            settings: Dict[str, Any] = None) -> None:
+        """
+        Grava o texto extraído de um arquivo
+        
+        Args:
+            key: SHA-256 do conteúdo do arquivo
+            pages: Texto de cada parte, em ordem
+            extraction: Resumo da extração
+            settings: Configurações de extração gravadas com a entrada
+        """
+        for _ in self.record(key, pages, lambda: extraction, settings):
+            pass
+    
+    def _publish(self, tmp_path: str, path: str) -> bool:
+        """Publica a entrada gravada e remove as mais antigas acima do limite (False se falhar)"""
+        try:
+            size = os.path.getsize(tmp_path)
+            previous = os.path.getsize(path) if os.path.exists(path) else 0
+            os.replace(tmp_path, path)
+        except OSError as e:
+            print(f"[extraction_cache] AVISO: não foi possível gravar no cache: {e}")
+            return False
+        
+        with self._lock:
+            self.size += size - previous
+            over = self.max_bytes > 0 and self.size > self.max_bytes
+        
+        if over:
+            self._evict()
+        return True
+    
+    def _evict(self) -> None:
+        """Remove as entradas acessadas há mais tempo até caber no limite"""
+        with self._lock:
+            entries = sorted(self._entries())
+            size = sum(entry_size for _, _, entry_size in entries)
+            removed = 0
+            
+            # Libera 10% além do limite para não varrer o diretório a cada gravação
+            target = self.max_bytes * 0.9
+            for _, path, entry_size in entries:
+                if size <= target:
+                    break
+                if self._remove(path):
+                    size -= entry_size
+                    removed += 1
+            
+            self.size = size
+        
+        if removed:
+            print(f"[extraction_cache] {removed} entradas removidas (limite: {self.max_bytes} bytes)")
+    
+    @staticmethod
+    def _remove(path: str) -> bool:
+        try:
+            os.remove(path)
+            return True
+        except OSError:
+            return False
+    
+    def stats(self) -> Dict[str, Any]:
+        """
+        Retorna estatísticas do cache
+        
+        Returns:
+            Dicionário com tamanho em disco, limite, hits, misses e hit rate
+        """
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                'directory': self.directory,
+                'size_bytes': self.size,
+                'max_bytes': self.max_bytes,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': round(self.hits / total, 4) if total else 0.0
+            }
+
+
+# Instâncias globais dos caches (None se desabilitado)
+_extraction_cache: Optional[ExtractionCache] = None
+_cache_initialized = False
+_ocr_cache: Optional[ExtractionCache] = None
+_ocr_cache_initialized = False
+
+
+def _create_cache(directory: Optional[str], max_mb: float, label: str) -> Optional[ExtractionCache]:
+    """Cria um cache em `directory` (None se vazio ou inacessível)"""
+    if not directory:
+        return None
+    try:
+        cache = ExtractionCache(directory, int(max_mb * 1024 * 1024))
+        print(f"[extraction_cache] Cache {label} em {directory} (limite: {max_mb:g} MB)")
+        return cache
+    except OSError as e:
+        print(f"[extraction_cache] AVISO: cache {label} desabilitado: {e}")
+        return None
+
+
+def get_extraction_cache() -> Optional[ExtractionCache]:
+    """
+    Retorna o cache de extração compartilhado
+    
+    Configurado por EXTRACTION_CACHE_DIR (vazio desabilita o cache) e
+    EXTRACTION_CACHE_MAX_MB (padrão: 1024).
+    
+    Returns:
+        Instância de ExtractionCache ou None
+    """
+    global _extraction_cache, _cache_initialized
+    
+    if not _cache_initialized:
+        _cache_initialized = True
+        _extraction_cache = _create_cache(
+            os.environ.get("EXTRACTION_CACHE_DIR"),
+            float(os.environ.get("EXTRACTION_CACHE_MAX_MB", "1024")),
+            "de extração"
+        )
+    
+    return _extraction_cache
+
+
+def get_ocr_cache() -> Optional[ExtractionCache]:
+    """
+    Retorna o cache de resultados de OCR por imagem de página
+    
+    As entradas são endereçadas pelo hash da imagem pré-processada (mais
+    engine, idiomas e perfil), de modo que páginas repetidas entre
+    documentos diferentes (papel timbrado, formulários padrão) passam pelo
+    OCR uma única vez. O diretório é compartilhado pelos workers do pool.
+    Configurado por OCR_CACHE_DIR (vazio desabilita o cache) e
+    OCR_CACHE_MAX_MB (padrão: 256).
+    
+    Returns:
+        Instância de ExtractionCache ou None
+    """
+    global _ocr_cache, _ocr_cache_initialized
+    
+    if not _ocr_cache_initialized:
+        _ocr_cache_initialized = True
+        _ocr_cache = _create_cache(
+            os.environ.get("OCR_CACHE_DIR"),
+            float(os.environ.get("OCR_CACHE_MAX_MB", "256")),
+            "de OCR"
+        )
+    
+    return _ocr_cache
@@ -0,0 +1,349 @@
+"""
+Disclaimer:
+
+Este código é fornecido como um exemplo open-source de contribuição comunitária para implementação de soluções utilizando a plataforma Oracle.
+É distribuído "AS IS" (como está), sem garantias, responsabilidades ou suporte de qualquer natureza.
+A Oracle Corporation não assume qualquer responsabilidade pelo conteúdo, precisão, funcionalidade ou forma deste material.
+"""
+
+"""
+ingest_pipeline.py - Pipeline de Ingestão em Streaming
+Conecta extração por página, chunking, embeddings em batch e inserção em
+batch com filas limitadas, mantendo a memória constante com o tamanho do
+documento
+"""
+
+import os
+import time
+import queue
+import threading
+from typing import List, Dict, Any, Optional, Iterable, Iterator
+
+from upload_spool import Content
+
+
+# Marca o fim de um estágio na fila
+_DONE = object()
+
+
+class _StageError:
+    """Exceção de um estágio, repassada ao consumidor pela fila"""
+    
+    def __init__(self, error: BaseException):
+        self.error = error
+
+
+def _put(buffer: queue.Queue, item: Any, stop: threading.Event) -> bool:
+    """Insere na fila aguardando espaço; retorna False se o consumidor desistiu"""
+    while not stop.is_set():
+        try:
+            buffer.put(item, timeout=0.1)
+            return True
+        except queue.Full:
+            continue
+    return False
+
+
+def bounded_stage(items: Iterable[Any], maxsize: int, name: str) -> Iterator[Any]:
+    """
+    Consome `items` em uma thread, entregando-os por uma fila limitada
+    
+    O produtor bloqueia quando a fila está cheia (memória limitada) e
+    trabalha em paralelo com o consumidor. Exceções do produtor são
+    relançadas no consumidor; se o consumidor parar antes do fim, o
+    produtor é interrompido e seu gerador fechado.
+    
+    Args:
+        items: Iterável do estágio (executado na thread)
+        maxsize: Itens prontos aguardando o consumidor
+        name: Nome da thread
+    
+    Yields:
+        Itens de `items`, em ordem
+    """
+    buffer = queue.Queue(maxsize=max(maxsize, 1))
+    stop = threading.Event()
+    
+    def produce():
+        try:
+            for item in items:
+                if not _put(buffer, item, stop):
+                    return
+            _put(buffer, _DONE, stop)
+        except BaseException as e:
+            _put(buffer, _StageError(e), stop)
+        finally:
+            close = getattr(items, "close", None)
+            if close is not None:
+                close()
+    
+    thread = threading.Thread(target=produce, name=name, daemon=True)
+    thread.start()
+    
+    try:
+        while True:
+            item = buffer.get()
+            if item is _DONE:
+                return
+            if isinstance(item, _StageError):
+                raise item.error
+            yield item
+    finally:
+        stop.set()
+        thread.join()
+
+
+def batched(items: Iterable[Any], size: int) -> Iterator[List[Any]]:
+    """
+    Agrupa itens em listas de até `size` elementos
+    
+    Args:
+        items: Itens a agrupar
+        size: Tamanho máximo de cada lista
+    
+    Yields:
+        Listas de itens, em ordem
+    """
+    batch = []
+    for item in items:
+        batch.append(item)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+class IngestPipeline:
+    """
+    Ingestão de um documento em estágios com filas limitadas
+    
+    extração (thread) -> chunking + embeddings (thread) -> inserção (chamador)
+    
+    Enquanto o batch N gera embeddings, o batch N-1 é inserido; nenhum
+    estágio mantém o texto, os chunks ou os embeddings do documento inteiro.
+    O documento é criado no banco junto com o primeiro batch e removido
+    (com seus chunks) se algum estágio falhar.
+    """
+    
+    def __init__(self, processor, embedding_service, db,
+                 batch_size: int = None, queue_size: int = None,
+                 short_dimension: int = None, keep_full: bool = True):
+        """
+        Inicializa o pipeline
+        
+        Args:
+            processor: DocumentProcessor (iter_pages e iter_chunks)
+            embedding_service: Serviço de embeddings do documento
+            db: DatabaseManager
+            batch_size: Chunks por batch de embeddings/inserção (padrão: INGEST_BATCH_SIZE)
+            queue_size: Itens prontos por fila entre estágios (padrão: INGEST_QUEUE_SIZE)
+            short_dimension: Dimensão reduzida da coleção (Matryoshka), se houver
+            keep_full: Mantém o embedding completo junto do reduzido
+        """
+        self.processor = processor
+        self.embedding_service = embedding_service
+        self.db = db
+        self.batch_size = batch_size or int(os.environ.get("INGEST_BATCH_SIZE", "64"))
+        self.queue_size = queue_size or int(os.environ.get("INGEST_QUEUE_SIZE", "2"))
+        self.short_dimension = short_dimension
+        self.keep_full = keep_full
+        
+        if self.batch_size <= 0:
+            raise ValueError(f"INGEST_BATCH_SIZE inválido: {self.batch_size}")
+    
+    def _embedded_batches(self, pages: Iterable[str]) -> Iterator[List[Dict[str, Any]]]:
+        """Chunking e embeddings, batch a batch"""
+        chunks = self.processor.iter_chunks(pages)
+        
+        for batch in batched(chunks, self.batch_size):
+            yield self.embedding_service.encode_chunks(
+                batch,
+                short_dimension=self.short_dimension,
+                keep_full=self.keep_full
+            )
+    
+    def run(self, content: Content, filename: str, file_type: str,
+            metadata: Dict[str, Any] = None, collection: str = None) -> Dict[str, Any]:
+        """
+        Extrai, divide, gera embeddings e insere um documento
+        
+        Args:
+            content: Conteúdo do arquivo (bytes ou SpooledFile)
+            filename: Nome do arquivo
+            file_type: MIME type do arquivo
+            metadata: Metadados do documento (opcional)
+            collection: Coleção do documento (opcional)
+        
+        Returns:
+            Dicionário com document_id, chunks inseridos, text_length,
+            chunking, extraction e batches
+        """
+        content_hash = self.processor.calculate_hash(content)
+        
+        pages = bounded_stage(
+            self.processor.iter_pages(content, filename, file_type, content_hash=content_hash),
+            self.queue_size, "ingest-extraction"
+        )
+        embedded = bounded_stage(
+            self._embedded_batches(pages), self.queue_size, "ingest-embedding"
+        )
+        
+        document_id: Optional[str] = None
+        inserted = 0
+        batches = 0
+        insert_seconds = 0.0
+        
+        try:
+            for batch in embedded:
+                started = time.perf_counter()
+                
+                # O documento só é criado quando há chunks a inserir
+                if document_id is None:
+                    document_id = self.db.insert_document(
+                        filename=filename,
+                        file_type=file_type,
+                        file_size=len(content),
+                        content_hash=content_hash,
+                        metadata=metadata,
+                        collection=collection
+                    )
+                
+                inserted += self.db.insert_chunks(
+                    document_id,
+                    batch,
+                    embedding_model=self.embedding_service.model_name
+                )
+                batches += 1
+                insert_seconds += time.perf_counter() - started
+        
+        except BaseException:
+            embedded.close()
+            if document_id is not None:
+                print(f"[ingest] Falha na ingestão - removendo documento parcial {document_id}")
+                try:
+                    self.db.delete_document(document_id)
+                except Exception as e:
+                    print(f"[ingest] AVISO: não foi possível remover {document_id}: {e}")
+            raise
+        
+        if document_id is None:
+            raise ValueError("Não foi possível extrair texto do documento")
+        
+        print(f"[ingest] {inserted} chunks inseridos em {batches} batches "
+              f"(inserção: {insert_seconds:.2f}s)")
+        
+        return {
+            'document_id': document_id,
+            'chunks_inserted': inserted,
+            'content_hash': content_hash,
+            'text_length': self.processor.text_length,
+            'chunking': dict(self.processor.chunking, batches=batches, batch_size=self.batch_size),
+            'extraction': self.processor.extraction
+        }
+    
+    def rechunk(self, document: Dict[str, Any], pages: Iterable[str]) -> Dict[str, Any]:
+        """
+        Refaz o chunking de um documento já ingerido a partir do texto extraído
+        
+        Chunks cujo texto (hash) já existe no documento, com o mesmo modelo,
+        reaproveitam o embedding gravado; apenas os textos novos passam pelo
+        modelo. O novo conjunto substitui o antigo em uma única transação.
+        
+        Args:
+            document: Documento (get_document)
+            pages: Partes do texto extraído do documento (cached_pages)
+        
+        Returns:
+            Dicionário com document_id, chunks (total, reaproveitados, novos e
+            removidos), chunking e extraction
+        """
+        document_id = document['id']
+        model_name = self.embedding_service.model_name
+        
+        existing = self.db.list_chunk_hashes(document_id)
+        reusable = {
+            chunk['chunk_hash']: chunk['id']
+            for chunk in existing
+            if chunk['embedding_model'] == model_name
+        }
+        
+        chunks = []
+        fresh = []
+        for chunk in self.processor.iter_chunks(pages):
+            chunk['chunk_hash'] = self.db.chunk_hash(chunk['text'])
+            reuse_id = reusable.get(chunk['chunk_hash'])
+            if reuse_id is not None:
+                chunk['reuse_chunk_id'] = reuse_id
+            else:
+                fresh.append(len(chunks))
+            chunks.append(chunk)
+        
+        if not chunks:
+            raise ValueError("Não foi possível extrair texto do documento")
+        
+        # Embeddings só dos textos que ainda não existem no documento
+        started = time.perf_counter()
+        for batch in batched(fresh, self.batch_size):
+            embedded = self.embedding_service.encode_chunks(
+                [chunks[i] for i in batch],
+                short_dimension=self.short_dimension,
+                keep_full=self.keep_full
+            )
+            for i, chunk in zip(batch, embedded):
+                chunks[i] = chunk
+        embed_seconds = time.perf_counter() - started
+        
+        total = self.db.replace_chunks(
+            document_id,
+            chunks,
+            [chunk['id'] for chunk in existing],
+            embedding_model=model_name
+        )
+        
+        reused = len(chunks) - len(fresh)
+        kept = {chunk['reuse_chunk_id'] for chunk in chunks if chunk.get('reuse_chunk_id')}
+        removed = sum(1 for chunk in existing if chunk['id'] not in kept)
+        print(f"[ingest] Documento {document_id} refeito: {total} chunks "
+              f"({reused} reaproveitados, {len(fresh)} novos em {embed_seconds:.2f}s)")
+        
+        return {
+            'document_id': document_id,
+            'chunks': total,
+            'chunks_reused': reused,
+            'chunks_embedded': len(fresh),
+            'chunks_removed': removed,
+            'text_length': self.processor.text_length,
+            'chunking': self.processor.chunking,
+            'extraction': self.processor.extraction
+        }
+
+
+def create_ingest_pipeline(processor, embedding_service, db,
+                           short_dimension: int = None,
+                           keep_full: bool = True) -> IngestPipeline:
+    """
+    Factory function para criar um IngestPipeline
+    
+    Args:
+        processor: DocumentProcessor
+        embedding_service: Serviço de embeddings do documento
+        db: DatabaseManager
+        short_dimension: Dimensão reduzida da coleção (opcional)
+        keep_full: Mantém o embedding completo junto do reduzido
+    
+    Returns:
+        Instância de IngestPipeline
+    """
+    return IngestPipeline(
+        processor,
+        embedding_service,
+        db,
+        short_dimension=short_dimension,
+        keep_full=keep_full
+    )
+
+
+def streaming_enabled() -> bool:
+    """Ingestão em streaming habilitada (INGEST_STREAMING, padrão: true)"""
+    return os.environ.get("INGEST_STREAMING", "true").lower() == "true"
@@ -0,0 +1,134 @@
+"""
+Disclaimer:
+
+Este código é fornecido como um exemplo open-source de contribuição comunitária para implementação de soluções utilizando a plataforma Oracle.
+É distribuído "AS IS" (como está), sem garantias, responsabilidades ou suporte de qualquer natureza.
+A Oracle Corporation não assume qualquer responsabilidade pelo conteúdo, precisão, funcionalidade ou forma deste material.
+"""
+
+"""
+language_probe.py - Idiomas do OCR por Documento
+Reduz o conjunto de idiomas do Tesseract (por+eng) ao idioma do documento,
+detectado por palavras funcionais em uma amostra de texto (camada de texto
+de outras páginas ou OCR rápido em baixa resolução), e normaliza o idioma
+informado pelo cliente no upload
+"""
+
+import re
+from typing import Dict, Iterable, Optional
+
+
+# Palavras funcionais frequentes e exclusivas de cada idioma (sem as
+# ambíguas entre eles, como "a", "as", "no", "se")
+STOPWORDS: Dict[str, frozenset] = {
+    "por": frozenset((
+        "de", "que", "não", "para", "com", "uma", "os", "na", "por", "mais",
+        "dos", "como", "mas", "ao", "das", "à", "seu", "sua", "ou", "quando",
+        "muito", "nos", "já", "também", "só", "pelo", "pela", "até", "isso",
+        "ela", "entre", "depois", "sem", "mesmo", "aos", "seus", "suas", "quem",
+        "nas", "são", "está", "foi", "ser", "há", "pelos", "pelas", "em", "um",
+        "do", "da", "este", "esta", "essa", "esse", "ainda", "sobre", "qual",
+    )),
+    "eng": frozenset((
+        "the", "and", "of", "to", "in", "is", "that", "for", "it", "with",
+        "was", "on", "are", "be", "this", "by", "at", "from", "or", "have",
+        "an", "which", "not", "but", "were", "their", "has", "been", "will",
+        "shall", "would", "there", "can", "all", "its", "these", "into",
+        "other", "such", "any", "may", "should", "if", "than", "they", "we",
+    )),
+}
+
+# Códigos aceitos como idioma do documento, normalizados para o Tesseract
+LANGUAGE_ALIASES = {
+    "pt": "por", "pt-br": "por", "pt_br": "por", "pt-pt": "por", "por": "por",
+    "portuguese": "por", "portugues": "por", "português": "por",
+    "en": "eng", "en-us": "eng", "en_us": "eng", "en-gb": "eng", "eng": "eng",
+    "english": "eng", "ingles": "eng", "inglês": "eng",
+    "es": "spa", "spa": "spa", "spanish": "spa", "espanhol": "spa",
+    "fr": "fra", "fra": "fra", "french": "fra", "frances": "fra", "francês": "fra",
+    "de": "deu", "deu": "deu", "german": "deu", "alemao": "deu", "alemão": "deu",
+    "it": "ita", "ita": "ita", "italian": "ita", "italiano": "ita",
+}
+
+# Nome de pacote de idioma do Tesseract (por, eng, chi_sim, ...)
+_TESSERACT_LANGUAGE = re.compile(r"^[a-z]{3}(_[a-z]+)?$")
+
+_WORD = re.compile(r"[^\W\d_]+")
+
+# Amostra analisada e critérios para escolher um único idioma
+PROBE_MAX_WORDS = 2000
+PROBE_MIN_HITS = 10
+PROBE_MIN_SHARE = 0.85
+
+
+def resolve_language_hint(hint, installed: Iterable[str] = None) -> Optional[str]:
+    """
+    Normaliza o idioma informado pelo cliente para o Tesseract
+    
+    Args:
+        hint: Idioma ("pt", "en", "por", "pt-BR"...) ou idiomas unidos por
+            '+' ou ',' ("pt+en"); None ou vazio = sem indicação
+        installed: Idiomas instalados no Tesseract (None = não verifica)
+    
+    Returns:
+        Idiomas do Tesseract ("por", "por+eng"...) ou None
+    """
+    if hint is None:
+        return None
+    if not isinstance(hint, str):
+        raise ValueError(f"Idioma inválido: {hint!r} (texto esperado, ex.: 'pt' ou 'pt+en')")
+    
+    languages = []
+    for part in re.split(r"[+,]", hint.strip().lower()):
+        part = part.strip()
+        if not part:
+            continue
+        language = LANGUAGE_ALIASES.get(part, part)
+        if not _TESSERACT_LANGUAGE.match(language):
+            raise ValueError(
+                f"Idioma não suportado: {part}. "
+                f"Use códigos como {', '.join(sorted(set(LANGUAGE_ALIASES.values())))}"
+            )
+        if installed is not None and language not in installed:
+            raise ValueError(
+                f"Idioma não instalado no Tesseract: {part}. "
+                f"Instalados: {', '.join(sorted(set(installed) - {'osd'}))}"
+            )
+        if language not in languages:
+            languages.append(language)
+    
+    return "+".join(languages) or None
+
+
+def detect_language(text: str, languages: str) -> Optional[str]:
+    """
+    Idioma predominante de um texto entre os idiomas do Tesseract
+    
+    Args:
+        text: Amostra de texto
+        languages: Idiomas candidatos ("por+eng")
+    
+    Returns:
+        O idioma escolhido, ou None se a amostra for pequena, mista ou se
+        algum candidato não tiver lista de palavras funcionais
+    """
+    candidates = languages.split("+")
+    if len(candidates) < 2 or any(language not in STOPWORDS for language in candidates):
+        return None
+    
+    hits = dict.fromkeys(candidates, 0)
+    for i, match in enumerate(_WORD.finditer(text.lower())):
+        if i >= PROBE_MAX_WORDS:
+            break
+        word = match.group()
+        for language in candidates:
+            if word in STOPWORDS[language]:
+                hits[language] += 1
+    
+    total = sum(hits.values())
+    if total < PROBE_MIN_HITS:
+        return None
+    
+    best = max(candidates, key=hits.get)
+    return best if hits[best] / total >= PROBE_MIN_SHARE else None
+
@@ -0,0 +1,428 @@
+"""
+Disclaimer:
+
+Este código é fornecido como um exemplo open-source de contribuição comunitária para implementação de soluções utilizando a plataforma Oracle.
+É distribuído "AS IS" (como está), sem garantias, responsabilidades ou suporte de qualquer natureza.
+A Oracle Corporation não assume qualquer responsabilidade pelo conteúdo, precisão, funcionalidade ou forma deste material.
+"""
+
+"""
+model_server.py - Servidor de Modelo de Embeddings Compartilhado
+Um processo de longa duração carrega o modelo e atende requisições de encode
+(HTTP local ou Unix socket); os workers da API usam um cliente leve
+"""
+
+import os
+import sys
+import json
+import socket
+import threading
+import http.client
+import numpy as np
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from socketserver import ThreadingMixIn, UnixStreamServer
+from typing import List, Dict, Any, Optional, Tuple
+from urllib.parse import urlparse, parse_qs, quote
+
+from embedding_service import (
+    EmbeddingService, EmbeddingModelRegistry, QueryEmbeddingCache,
+    create_embedding_service, initialize_model_registry
+)
+
+
+DEFAULT_SERVER_URL = "http://127.0.0.1:8001"
+
+
+def parse_server_url(url: str) -> Tuple[str, Any]:
+    """
+    Interpreta a URL do servidor de modelo
+    
+    Args:
+        url: http://host:porta ou unix:///caminho/do/socket
+    
+    Returns:
+        Tupla (esquema, endereço) com endereço (host, porta) ou caminho do socket
+    """
+    parsed = urlparse(url)
+    
+    if parsed.scheme == "unix":
+        return "unix", parsed.path
+    
+    if parsed.scheme == "http":
+        return "http", (parsed.hostname or "127.0.0.1", parsed.port or 80)
+    
+    raise ValueError(f"URL de servidor de modelo inválida: {url} (use http:// ou unix://)")
+
+
+# ==========================
+# Servidor
+# ==========================
+
+class _EncodeHandler(BaseHTTPRequestHandler):
+    """Handler HTTP do servidor de modelo"""
+    
+    protocol_version = "HTTP/1.1"
+    service: EmbeddingService = None
+    registry: EmbeddingModelRegistry = None
+    
+    def address_string(self) -> str:
+        # Conexões via Unix socket não têm endereço IP
+        return self.client_address[0] if self.client_address else "unix"
+    
+    def log_message(self, format: str, *args) -> None:
+        # Requisições de encode são frequentes demais para log por requisição
+        pass
+    
+    def _send_json(self, status: int, payload: Dict[str, Any]) -> None:
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+    
+    def _send_embeddings(self, embeddings: np.ndarray) -> None:
+        body = np.ascontiguousarray(embeddings, dtype=np.float32).tobytes()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/octet-stream")
+        self.send_header("X-Embedding-Shape", ",".join(str(d) for d in embeddings.shape))
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+    
+    def _service(self, model: str = None) -> EmbeddingService:
+        """Serviço do modelo solicitado (padrão: o modelo do servidor)"""
+        if not model:
+            return self.service
+        return self.registry.get(model=model)
+    
+    def do_GET(self) -> None:
+        url = urlparse(self.path)
+        if url.path not in ("/", "/health", "/info"):
+            self._send_json(404, {"error": "Não encontrado"})
+            return
+        
+        try:
+            service = self._service(parse_qs(url.query).get("model", [None])[0])
+            self._send_json(200, {
+                "status": "ok",
+                "model_name": service.model_name,
+                "backend": service.backend,
+                "dimension": service.get_dimension(),
+                # Chunking por tokens nos clientes (via /tokenize)
+                "max_chunk_tokens": service.max_chunk_tokens(),
+                "tokenizer": service.token_offsets("") is not None,
+                "query_cache": service.query_cache.stats(),
+                "micro_batching": service.batcher.stats() if service.batcher else None
+            })
+        except ValueError as e:
+            self._send_json(400, {"error": str(e)})
+        except Exception as e:
+            self._send_json(500, {"error": str(e)})
+    
+    def do_POST(self) -> None:
+        if self.path not in ("/encode", "/tokenize"):
+            self._send_json(404, {"error": "Não encontrado"})
+            return
+        
+        try:
+            length = int(self.headers.get("Content-Length", "0"))
+            body = json.loads(self.rfile.read(length) or b"{}")
+            service = self._service(body.get("model"))
+            
+            if self.path == "/tokenize":
+                text = body.get("text")
+                if not isinstance(text, str):
+                    raise ValueError("Campo 'text' deve ser um texto")
+                offsets = service.token_offsets(text)
+                self._send_json(200, {"offsets": offsets})
+                return
+            
+            texts = body.get("texts")
+            
+            if not isinstance(texts, list) or not texts:
+                raise ValueError("Campo 'texts' deve ser uma lista não vazia")
+            
+            # Textos únicos passam pelo cache e pelo micro-batching do serviço
+            if len(texts) == 1:
+                embeddings = np.atleast_2d(service.encode_text(texts[0]))
+            else:
+                batch_size = body.get("batch_size")
+                embeddings = service.encode_batch(
+                    texts,
+                    batch_size=int(batch_size) if batch_size else None,
+                    token_lengths=body.get("token_lengths")
+                )
+            
+            self._send_embeddings(embeddings)
+        
+        except ValueError as e:
+            self._send_json(400, {"error": str(e)})
+        except Exception as e:
+            self._send_json(500, {"error": str(e)})
+
+
+class _ThreadingUnixHTTPServer(ThreadingMixIn, UnixStreamServer):
+    """Servidor HTTP multi-thread sobre Unix socket"""
+    
+    daemon_threads = True
+    
+    def server_bind(self) -> None:
+        if os.path.exists(self.server_address):
+            os.unlink(self.server_address)
+        UnixStreamServer.server_bind(self)
+        self.server_name = "unix"
+        self.server_port = 0
+
+
+def run_server(url: str = None, service: EmbeddingService = None) -> None:
+    """
+    Executa o servidor de modelo
+    
+    Os modelos adicionais de EMBEDDING_MODELS são carregados no servidor,
+    sob demanda, quando um cliente os solicita.
+    
+    Args:
+        url: Endereço de escuta (padrão: EMBEDDING_SERVER_URL)
+        service: EmbeddingService já carregado (padrão: criado a partir do ambiente)
+    """
+    url = url or os.environ.get("EMBEDDING_SERVER_URL", DEFAULT_SERVER_URL)
+    scheme, address = parse_server_url(url)
+    
+    service = service or create_embedding_service(
+        model_name=os.environ.get("EMBEDDING_MODEL"),
+        device=os.environ.get("EMBEDDING_DEVICE", "cpu"),
+        backend=os.environ.get("EMBEDDING_BACKEND")
+    )
+    
+    registry = initialize_model_registry(service)
+    handler = type("EncodeHandler", (_EncodeHandler,), {"service": service, "registry": registry})
+    
+    if scheme == "unix":
+        server = _ThreadingUnixHTTPServer(address, handler)
+    else:
+        server = ThreadingHTTPServer(address, handler)
+        server.daemon_threads = True
+    
+    print(f"[model_server] Servindo {service.model_name} em {url}")
+    
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        registry.close()
+        service.query_cache.save()
+        if scheme == "unix" and os.path.exists(address):
+            os.unlink(address)
+
+
+# ==========================
+# Cliente
+# ==========================
+
+class _UnixHTTPConnection(http.client.HTTPConnection):
+    """HTTPConnection sobre Unix socket"""
+    
+    def __init__(self, socket_path: str, timeout: float = None):
+        super().__init__("localhost", timeout=timeout)
+        self.socket_path = socket_path
+    
+    def connect(self) -> None:
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        if self.timeout is not None:
+            self.sock.settimeout(self.timeout)
+        self.sock.connect(self.socket_path)
+
+
+class EmbeddingClient(EmbeddingService):
+    """
+    Cliente leve do servidor de modelo
+    
+    Mesma interface do EmbeddingService, sem carregar modelo: os embeddings
+    e a tokenização do chunking por tokens são feitos pelo processo
+    model_server.py. Mantém um cache local de queries para evitar idas ao
+    servidor em queries repetidas; o micro-batching e o pool de processos
+    ficam no servidor.
+    """
+    
+    def __init__(self, server_url: str = None, timeout: float = None,
+                 query_cache: QueryEmbeddingCache = None, model: str = None):
+        """
+        Inicializa o cliente e consulta as informações do modelo
+        
+        Args:
+            server_url: URL do servidor (padrão: EMBEDDING_SERVER_URL)
+            timeout: Timeout das requisições em segundos (padrão: EMBEDDING_SERVER_TIMEOUT)
+            query_cache: Cache local de queries (padrão: configurado via ambiente)
+            model: Modelo adicional do servidor (EMBEDDING_MODELS; padrão: o modelo do servidor)
+        """
+        self.remote_model = model
+        self.server_url = server_url or os.environ.get("EMBEDDING_SERVER_URL", DEFAULT_SERVER_URL)
+        self.timeout = timeout or float(os.environ.get("EMBEDDING_SERVER_TIMEOUT", "120"))
+        self._scheme, self._address = parse_server_url(self.server_url)
+        self._local = threading.local()
+        self._max_chunk_tokens = 0
+        self._remote_tokenizer = False
+        
+        # O cache local não é persistido: QUERY_CACHE_FILE pertence ao servidor
+        super().__init__(
+            device="remote",
+            query_cache=query_cache or QueryEmbeddingCache(
+                max_size=int(os.environ.get("QUERY_CACHE_SIZE", "1024")),
+                ttl=float(os.environ.get("QUERY_CACHE_TTL", "3600")),
+                persist_path=None
+            ),
+            batch_max_wait_ms=0
+        )
+        
+        self.pool_workers = 0
+    
+    def _load_model(self) -> None:
+        """Consulta as informações do modelo no servidor (nada a carregar)"""
+        path = f"/info?model={quote(self.remote_model, safe='')}" if self.remote_model else "/info"
+        info = self._request_json("GET", path)
+        self.model_name = info["model_name"]
+        self.backend = info["backend"]
+        self.dimension = info["dimension"]
+        self._max_chunk_tokens = int(info.get("max_chunk_tokens") or 0)
+        self._remote_tokenizer = bool(info.get("tokenizer"))
+        
+        if not self._remote_tokenizer and os.environ.get("CHUNK_UNIT", "chars").lower() == "tokens":
+            print(f"[embedding] AVISO: servidor de modelo {self.server_url} sem tokenizer - "
+                  f"CHUNK_UNIT=tokens usará chunks por caracteres")
+        
+        print(f"[embedding] Usando servidor de modelo {self.server_url} "
+              f"({self.model_name}, dimensão {self.dimension})")
+    
+    def token_offsets(self, text: str) -> Optional[List[Tuple[int, int]]]:
+        """
+        Tokeniza o texto no servidor de modelo (usado no chunking por tokens)
+        
+        Args:
+            text: Texto completo
+        
+        Returns:
+            Lista de offsets (início, fim) por token, ou None se o servidor
+            não tiver tokenizer
+        """
+        if not self._remote_tokenizer:
+            return None
+        
+        offsets = self._request_json(
+            "POST", "/tokenize", {"text": text, "model": self.remote_model}
+        )["offsets"]
+        return [tuple(offset) for offset in offsets] if offsets is not None else None
+    
+    def max_chunk_tokens(self) -> int:
+        """Tokens de conteúdo por chunk informados pelo servidor"""
+        return self._max_chunk_tokens
+    
+    def _connection(self) -> http.client.HTTPConnection:
+        """Conexão persistente por thread"""
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            if self._scheme == "unix":
+                connection = _UnixHTTPConnection(self._address, timeout=self.timeout)
+            else:
+                connection = http.client.HTTPConnection(*self._address, timeout=self.timeout)
+            self._local.connection = connection
+        return connection
+    
+    def _request(self, method: str, path: str,
+                 payload: Dict[str, Any] = None) -> Tuple[int, Dict[str, str], bytes]:
+        """Executa uma requisição, reconectando uma vez se a conexão caiu"""
+        body = json.dumps(payload).encode("utf-8") if payload is not None else None
+        headers = {"Content-Type": "application/json"} if body is not None else {}
+        
+        for attempt in range(2):
+            connection = self._connection()
+            try:
+                connection.request(method, path, body=body, headers=headers)
+                response = connection.getresponse()
+                return response.status, dict(response.getheaders()), response.read()
+            except (ConnectionError, http.client.HTTPException, OSError) as e:
+                connection.close()
+                self._local.connection = None
+                if attempt == 1:
+                    raise RuntimeError(f"Erro de comunicação com servidor de modelo: {str(e)}")
+    
+    def _request_json(self, method: str, path: str,
+                      payload: Dict[str, Any] = None) -> Dict[str, Any]:
+        status, _, data = self._request(method, path, payload)
+        if status != 200:
+            error = f"Servidor de modelo retornou {status}"
+            try:
+                error = json.loads(data).get("error", error)
+            except ValueError:
+                pass
+            if status == 400:
+                raise ValueError(error)
+            raise RuntimeError(error)
+        return json.loads(data)
+    
+    def _encode_remote(self, texts: List[str], batch_size: int = None,
+                       token_lengths: List[Optional[int]] = None) -> np.ndarray:
+        """
+        Solicita embeddings ao servidor
+        
+        Args:
+            texts: Lista de textos
+            batch_size: Limite de textos por batch no servidor (padrão: o do servidor)
+            token_lengths: Tokens já contados por texto (opcional)
+        
+        Returns:
+            Array numpy float32 (shape: [n_texts, dimension])
+        """
+        status, headers, data = self._request(
+            "POST", "/encode",
+            {"texts": texts, "batch_size": batch_size, "token_lengths": token_lengths,
+             "model": self.remote_model}
+        )
+        
+        if status != 200:
+            error = json.loads(data).get("error", f"status {status}")
+            if status == 400:
+                raise ValueError(error)
+            raise RuntimeError(error)
+        
+        shape = tuple(int(d) for d in headers["X-Embedding-Shape"].split(","))
+        return np.frombuffer(data, dtype=np.float32).reshape(shape)
+    
+    def _encode_queries(self, texts: List[str]) -> np.ndarray:
+        return np.concatenate([self._encode_remote([text]) for text in texts])
+    
+    def encode_batch(self, texts: List[str], batch_size: int = None,
+                     token_budget: int = None,
+                     token_lengths: List[Optional[int]] = None) -> np.ndarray:
+        """
+        Gera embeddings em batch no servidor de modelo
+        
+        Args:
+            texts: Lista de textos
+            batch_size: Limite de textos por batch
+            token_budget: Ignorado (configurado no servidor)
+            token_lengths: Tokens já contados por texto (opcional)
+        
+        Returns:
+            Array numpy com os embeddings (shape: [n_texts, dimension])
+        """
+        if not texts:
+            raise ValueError("Lista de textos vazia")
+        
+        return self._encode_remote(texts, batch_size=batch_size, token_lengths=token_lengths)
+    
+    def close(self) -> None:
+        """Fecha a conexão da thread atual"""
+        connection = getattr(self._local, "connection", None)
+        if connection is not None:
+            connection.close()
+            self._local.connection = None
+
+
+if __name__ == "__main__":
+    from dotenv import load_dotenv
+    
+    load_dotenv()
+    run_server(sys.argv[1] if len(sys.argv) > 1 else None)
@@ -0,0 +1,336 @@
+"""
+Disclaimer:
+
+Este código é fornecido como um exemplo open-source de contribuição comunitária para implementação de soluções utilizando a plataforma Oracle.
+É distribuído "AS IS" (como está), sem garantias, responsabilidades ou suporte de qualquer natureza.
+A Oracle Corporation não assume qualquer responsabilidade pelo conteúdo, precisão, funcionalidade ou forma deste material.
+"""
+
+"""
+ocr_engines.py - Engines de OCR (Tesseract)
+Executa o OCR pelo binding da API do Tesseract no próprio processo
+(tesserocr), com os idiomas carregados uma única vez por processo, ou pelo
+executável tesseract (pytesseract, um processo por imagem)
+"""
+
+import os
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Optional, Tuple
+
+from extraction_cache import get_ocr_cache
+from ocr_preprocessing import preprocess_image, image_hash, resolve_ocr_profile
+
+# API do Tesseract no próprio processo
+try:
+    import tesserocr
+except ImportError:
+    tesserocr = None
+
+# Executável tesseract (um processo e um arquivo temporário por imagem)
+try:
+    import pytesseract
+except ImportError:
+    pytesseract = None
+
+
+OCR_ENGINE_TESSEROCR = "tesserocr"
+OCR_ENGINE_PYTESSERACT = "pytesseract"
+
+OCR_ENGINE_ALIASES = {
+    "tesserocr": OCR_ENGINE_TESSEROCR,
+    "api": OCR_ENGINE_TESSEROCR,
+    "pytesseract": OCR_ENGINE_PYTESSERACT,
+    "tesseract": OCR_ENGINE_PYTESSERACT,
+    "cli": OCR_ENGINE_PYTESSERACT,
+}
+
+# Português e inglês; um bloco uniforme de texto (--psm 6) com o engine padrão (--oem 3),
+# nas duas engines (OEM.DEFAULT e PSM.SINGLE_BLOCK no tesserocr)
+DEFAULT_OCR_LANGUAGES = "por+eng"
+TESSERACT_OEM = 3
+TESSERACT_PSM = 6
+
+# Combinações de idiomas carregadas ao mesmo tempo por processo (um engine
+# por combinação; cada handle do tesserocr mantém os modelos em memória)
+DEFAULT_MAX_LANGUAGE_SETS = 4
+
+
+def max_language_sets() -> int:
+    """Limite de combinações de idiomas carregadas por processo (OCR_MAX_LANGUAGE_SETS)"""
+    return max(1, int(os.environ.get("OCR_MAX_LANGUAGE_SETS", str(DEFAULT_MAX_LANGUAGE_SETS))))
+
+
+def resolve_ocr_engine(engine: str = None) -> str:
+    """
+    Normaliza o nome do engine de OCR
+    
+    Args:
+        engine: Nome informado (padrão: OCR_ENGINE)
+    
+    Returns:
+        Nome canônico do engine
+    """
+    name = (engine or os.environ.get("OCR_ENGINE") or OCR_ENGINE_TESSEROCR).strip().lower()
+    
+    if name not in OCR_ENGINE_ALIASES:
+        raise ValueError(
+            f"Engine de OCR não suportado: {name}. "
+            f"Opções: {', '.join(sorted(set(OCR_ENGINE_ALIASES.values())))}"
+        )
+    
+    return OCR_ENGINE_ALIASES[name]
+
+
+def ocr_engine_available(engine: str) -> bool:
+    """Indica se o pacote do engine está instalado"""
+    if engine == OCR_ENGINE_TESSEROCR:
+        return tesserocr is not None
+    if engine == OCR_ENGINE_PYTESSERACT:
+        return pytesseract is not None
+    return False
+
+
+# Idiomas instalados no Tesseract (consultados uma vez por processo)
+_installed_languages: Optional[frozenset] = None
+_installed_languages_lock = threading.Lock()
+
+
+def installed_languages() -> Optional[frozenset]:
+    """
+    Idiomas instalados no Tesseract (pacotes .traineddata do tessdata)
+    
+    Returns:
+        Conjunto de códigos ("por", "eng", "osd"...), ou None se nenhum
+        engine estiver instalado ou a consulta falhar
+    """
+    global _installed_languages
+    
+    with _installed_languages_lock:
+        if _installed_languages is not None:
+            return _installed_languages
+        
+        try:
+            if tesserocr is not None:
+                _, languages = tesserocr.get_languages()
+            elif pytesseract is not None:
+                languages = pytesseract.get_languages(config="")
+            else:
+                return None
+        except Exception as e:
+            print(f"[ocr] AVISO: Não foi possível listar os idiomas do Tesseract: {e}")
+            return None
+        
+        _installed_languages = frozenset(languages)
+        return _installed_languages
+
+
+class PytesseractEngine:
+    """OCR pelo executável tesseract (idiomas recarregados a cada imagem)"""
+    
+    name = OCR_ENGINE_PYTESSERACT
+    
+    def __init__(self, languages: str = DEFAULT_OCR_LANGUAGES):
+        if pytesseract is None:
+            raise RuntimeError("pytesseract não está instalado")
+        self.languages = languages
+    
+    def image_to_string(self, image, timeout: float = 0) -> str:
+        """
+        Executa OCR em uma imagem PIL
+        
+        Args:
+            image: Imagem PIL
+            timeout: Timeout em segundos (0 = sem limite)
+        
+        Returns:
+            Texto reconhecido
+        """
+        config = f"--oem {TESSERACT_OEM} --psm {TESSERACT_PSM} -l {self.languages}"
+        return pytesseract.image_to_string(image, config=config, timeout=timeout or 0)
+    
+    def close(self) -> None:
+        pass
+
+
+class TesserocrEngine:
+    """
+    OCR pela API do Tesseract no próprio processo (tesserocr)
+    
+    Um handle PyTessBaseAPI para os idiomas do engine, criado no primeiro
+    uso e reaproveitado nas imagens seguintes: sem fork de processo,
+    arquivo temporário ou nova carga dos modelos por página. Outras
+    combinações de idiomas são outros engines (get_ocr_engine mantém até
+    OCR_MAX_LANGUAGE_SETS por processo). O handle não é thread-safe; as
+    chamadas no mesmo processo são serializadas (o paralelismo vem dos
+    workers de EXTRACTION_WORKERS).
+    """
+    
+    name = OCR_ENGINE_TESSEROCR
+    
+    def __init__(self, languages: str = DEFAULT_OCR_LANGUAGES):
+        if tesserocr is None:
+            raise RuntimeError("tesserocr não está instalado")
+        self.languages = languages
+        self._api = None
+        self._lock = threading.Lock()
+    
+    def _get_api(self):
+        """Handle da API (idiomas carregados uma única vez; chamar com _lock)"""
+        if self._api is None:
+            print(f"[ocr] Carregando Tesseract ({self.languages}) no processo {os.getpid()}...")
+            self._api = tesserocr.PyTessBaseAPI(
+                lang=self.languages,
+                oem=tesserocr.OEM.DEFAULT,
+                psm=tesserocr.PSM.SINGLE_BLOCK
+            )
+        return self._api
+    
+    def image_to_string(self, image, timeout: float = 0) -> str:
+        """
+        Executa OCR em uma imagem PIL
+        
+        Args:
+            image: Imagem PIL
+            timeout: Timeout em segundos (0 = sem limite)
+        
+        Returns:
+            Texto reconhecido
+        """
+        with self._lock:
+            api = self._get_api()
+            try:
+                api.SetImage(image)
+                if not api.Recognize(int(timeout * 1000) if timeout else 0):
+                    raise TimeoutError(f"OCR excedeu {timeout:g}s")
+                return api.GetUTF8Text()
+            finally:
+                api.Clear()
+    
+    def close(self) -> None:
+        """Libera o handle da API"""
+        with self._lock:
+            if self._api is not None:
+                self._api.End()
+                self._api = None
+
+
+_ENGINE_CLASSES = {
+    OCR_ENGINE_TESSEROCR: TesserocrEngine,
+    OCR_ENGINE_PYTESSERACT: PytesseractEngine,
+}
+
+# Engines do processo (um por worker do pool, criados no primeiro OCR), do
+# usado há mais tempo para o mais recente
+_engines: "OrderedDict[Tuple[str, str], object]" = OrderedDict()
+_engines_lock = threading.Lock()
+
+
+def get_ocr_engine(engine: str = None, languages: str = None):
+    """
+    Retorna o engine de OCR deste processo, criando-o no primeiro uso
+    
+    Args:
+        engine: Nome do engine (padrão: OCR_ENGINE)
+        languages: Idiomas do Tesseract (padrão: OCR_LANGUAGES)
+    
+    Returns:
+        Instância de TesserocrEngine ou PytesseractEngine
+    """
+    name = resolve_ocr_engine(engine)
+    languages = languages or os.environ.get("OCR_LANGUAGES", DEFAULT_OCR_LANGUAGES)
+    
+    evicted = []
+    with _engines_lock:
+        instance = _engines.get((name, languages))
+        if instance is not None:
+            _engines.move_to_end((name, languages))
+            return instance
+        
+        instance = _ENGINE_CLASSES[name](languages)
+        _engines[(name, languages)] = instance
+        
+        # Idiomas informados por documento criam engines novos: mantém
+        # apenas os OCR_MAX_LANGUAGE_SETS usados mais recentemente
+        while len(_engines) > max_language_sets():
+            evicted.append(_engines.popitem(last=False)[1])
+    
+    # Fora do lock global: close() espera o OCR em andamento no engine
+    for old in evicted:
+        old.close()
+    return instance
+
+
+def ocr_image(image, timeout: float = 0, engine: str = None, languages: str = None,
+              profile: str = None, dpi: float = None) -> str:
+    """
+    Pré-processa uma imagem e executa OCR, reaproveitando o resultado de
+    imagens já reconhecidas (cache de OCR, se configurado)
+    
+    Args:
+        image: Imagem PIL (não é fechada)
+        timeout: Timeout do OCR em segundos (0 = sem limite)
+        engine: Nome do engine (padrão: OCR_ENGINE)
+        languages: Idiomas do Tesseract (padrão: OCR_LANGUAGES)
+        profile: Perfil de pré-processamento (padrão: OCR_PREPROCESS)
+        dpi: Resolução da imagem (padrão: a gravada no arquivo)
+    
+    Returns:
+        Texto reconhecido
+    """
+    instance = get_ocr_engine(engine, languages)
+    profile = resolve_ocr_profile(profile)
+    prepared = preprocess_image(image, profile, dpi)
+    
+    try:
+        cache = get_ocr_cache()
+        key = None
+        if cache is not None:
+            key = hashlib.sha256(
+                f"{instance.name}|{instance.languages}|{profile}|{image_hash(prepared)}".encode()
+            ).hexdigest()
+            cached = cache.get(key)
+            if cached is not None:
+                return cached['pages'][0]
+        
+        text = instance.image_to_string(prepared, timeout)
+        
+        if cache is not None:
+            cache.put(key, [text], {'engine': instance.name, 'languages': instance.languages,
+                                    'profile': profile})
+        return text
+    
+    finally:
+        if prepared is not image:
+            prepared.close()
+
+
+def select_ocr_engine(engine: str = None) -> Optional[str]:
+    """
+    Engine configurado, ou o alternativo instalado se ele não estiver
+    
+    Args:
+        engine: Nome do engine (padrão: OCR_ENGINE)
+    
+    Returns:
+        Nome do engine a usar, ou None se nenhum estiver instalado
+    """
+    name = resolve_ocr_engine(engine)
+    if ocr_engine_available(name):
+        return name
+    
+    for fallback in (OCR_ENGINE_TESSEROCR, OCR_ENGINE_PYTESSERACT):
+        if ocr_engine_available(fallback):
+            print(f"[ocr] AVISO: {name} não instalado - usando {fallback}")
+            return fallback
+    
+    return None
+
+
+def close_ocr_engines() -> None:
+    """Libera os engines deste processo"""
+    with _engines_lock:
+        for instance in _engines.values():
+            instance.close()
+        _engines.clear()
@@ -0,0 +1,233 @@
+"""
+Disclaimer:
+
+Este código é fornecido como um exemplo open-source de contribuição comunitária para implementação de soluções utilizando a plataforma Oracle.
+É distribuído "AS IS" (como está), sem garantias, responsabilidades ou suporte de qualquer natureza.
+A Oracle Corporation não assume qualquer responsabilidade pelo conteúdo, precisão, funcionalidade ou forma deste material.
+"""
+
+"""
+ocr_preprocessing.py - Pré-processamento de Imagens para OCR
+Perfis de preparação da imagem antes do Tesseract (redução para o DPI alvo,
+tons de cinza, correção de inclinação e binarização) e hash das imagens
+preparadas, usado como chave do cache de resultados de OCR
+"""
+
+import os
+import hashlib
+from typing import Dict, Any, Optional
+
+import numpy as np
+
+try:
+    from PIL import Image
+except ImportError:
+    Image = None
+
+
+PROFILE_NONE = "none"
+PROFILE_FAST = "fast"
+PROFILE_STANDARD = "standard"
+PROFILE_SCAN = "scan"
+
+# Etapas de cada perfil, aplicadas nesta ordem: DPI alvo, tons de cinza,
+# correção de inclinação e binarização
+OCR_PROFILES: Dict[str, Dict[str, Any]] = {
+    # Imagem original, como antes do pré-processamento
+    PROFILE_NONE: {'downscale': False, 'grayscale': False, 'deskew': False, 'binarize': False},
+    # Menos pixels para o Tesseract sem alterar o conteúdo
+    PROFILE_FAST: {'downscale': True, 'grayscale': True, 'deskew': False, 'binarize': False},
+    # Limiar de Otsu: fundo uniforme, mais acertos de cache em páginas repetidas
+    PROFILE_STANDARD: {'downscale': True, 'grayscale': True, 'deskew': False, 'binarize': True},
+    # Documentos digitalizados (páginas tortas)
+    PROFILE_SCAN: {'downscale': True, 'grayscale': True, 'deskew': True, 'binarize': True},
+}
+
+OCR_PROFILE_ALIASES = {
+    "none": PROFILE_NONE,
+    "off": PROFILE_NONE,
+    "fast": PROFILE_FAST,
+    "standard": PROFILE_STANDARD,
+    "default": PROFILE_STANDARD,
+    "scan": PROFILE_SCAN,
+}
+
+# Imagens sem DPI informado: assume o lado maior de uma página A4 (polegadas)
+_ASSUMED_PAGE_INCHES = 11.7
+
+# Correção de inclinação: ângulos testados (graus) e lado da miniatura usada na estimativa
+DESKEW_MAX_ANGLE = 5.0
+DESKEW_STEP = 0.5
+_DESKEW_THUMBNAIL = 800
+
+def resolve_ocr_profile(profile: str = None) -> str:
+    """
+    Normaliza o nome do perfil de pré-processamento
+    
+    Args:
+        profile: Nome informado (padrão: OCR_PREPROCESS)
+    
+    Returns:
+        Nome canônico do perfil
+    """
+    name = (profile or os.environ.get("OCR_PREPROCESS", PROFILE_FAST)).strip().lower()
+    
+    if name not in OCR_PROFILE_ALIASES:
+        raise ValueError(
+            f"Perfil de pré-processamento de OCR não suportado: {name}. "
+            f"Opções: {', '.join(OCR_PROFILES)}"
+        )
+    
+    return OCR_PROFILE_ALIASES[name]
+
+
+def target_dpi() -> int:
+    """DPI alvo das imagens enviadas ao OCR (OCR_TARGET_DPI)"""
+    return int(os.environ.get("OCR_TARGET_DPI", "300"))
+
+
+def _source_dpi(image) -> Optional[float]:
+    """DPI gravado no arquivo da imagem, se houver"""
+    dpi = image.info.get("dpi")
+    if not dpi:
+        return None
+    try:
+        value = float(dpi[0])
+    except (TypeError, ValueError, IndexError):
+        return None
+    return value if value > 1 else None
+
+
+def _downscale(image, dpi: Optional[float], target: int):
+    """Reduz a imagem para o DPI alvo (nunca amplia)"""
+    dpi = dpi or _source_dpi(image)
+    if dpi:
+        scale = target / dpi
+    else:
+        scale = target * _ASSUMED_PAGE_INCHES / max(image.size)
+    
+    if scale >= 1:
+        return image
+    
+    size = (max(1, round(image.width * scale)), max(1, round(image.height * scale)))
+    return image.resize(size, Image.LANCZOS)
+
+
+def _row_variance(image) -> float:
+    """Variância da soma das linhas: máxima quando as linhas de texto estão na horizontal"""
+    return float(np.asarray(image, dtype=np.float32).sum(axis=1).var())
+
+
+def _deskew(image):
+    """Gira a imagem pelo ângulo que alinha as linhas de texto (até ±DESKEW_MAX_ANGLE)"""
+    small = image.copy()
+    small.thumbnail((_DESKEW_THUMBNAIL, _DESKEW_THUMBNAIL))
+    
+    # Tinta em branco sobre fundo preto: as bordas criadas pela rotação não contam
+    ink = small.point(lambda p: 255 if p < 128 else 0)
+    small.close()
+    
+    steps = int(DESKEW_MAX_ANGLE / DESKEW_STEP)
+    angles = [i * DESKEW_STEP for i in range(-steps, steps + 1)]
+    scores = {}
+    for angle in angles:
+        rotated = ink.rotate(angle, fillcolor=0)
+        scores[angle] = _row_variance(rotated)
+        rotated.close()
+    ink.close()
+    
+    # Em empate, prefere o menor ângulo (sem rotação)
+    best = max(angles, key=lambda angle: (scores[angle], -abs(angle)))
+    if best == 0:
+        return image
+    
+    return image.rotate(best, resample=Image.BICUBIC, expand=True, fillcolor=255)
+
+
+def _otsu_threshold(image) -> int:
+    """Limiar de Otsu a partir do histograma da imagem em tons de cinza"""
+    histogram = image.histogram()
+    total = sum(histogram)
+    weighted_total = sum(i * count for i, count in enumerate(histogram))
+    
+    background = 0
+    weighted_background = 0
+    best_threshold, best_variance = 0, -1.0
+    
+    for threshold, count in enumerate(histogram):
+        background += count
+        if background == 0:
+            continue
+        foreground = total - background
+        if foreground == 0:
+            break
+        
+        weighted_background += threshold * count
+        mean_background = weighted_background / background
+        mean_foreground = (weighted_total - weighted_background) / foreground
+        variance = background * foreground * (mean_background - mean_foreground) ** 2
+        
+        if variance > best_variance:
+            best_threshold, best_variance = threshold, variance
+    
+    return best_threshold
+
+
+def _binarize(image):
+    """Preto e branco pelo limiar de Otsu (mantido em modo 'L', aceito pelos dois engines)"""
+    threshold = _otsu_threshold(image)
+    return image.point([0 if p <= threshold else 255 for p in range(256)])
+
+
+def preprocess_image(image, profile: str = None, dpi: float = None):
+    """
+    Prepara uma imagem para o OCR conforme o perfil
+    
+    Args:
+        image: Imagem PIL
+        profile: Perfil de pré-processamento (padrão: OCR_PREPROCESS)
+        dpi: Resolução da imagem (padrão: a gravada no arquivo; sem ela,
+            assume uma página A4 no lado maior)
+    
+    Returns:
+        Imagem preparada; se for diferente de `image`, o chamador deve fechá-la
+    """
+    steps = OCR_PROFILES[resolve_ocr_profile(profile)]
+    current = image
+    
+    def replace(result):
+        nonlocal current
+        if result is not current and current is not image:
+            current.close()
+        current = result
+    
+    if steps['downscale']:
+        replace(_downscale(current, dpi, target_dpi()))
+    if steps['grayscale'] and current.mode != "L":
+        replace(current.convert("L"))
+    if steps['deskew']:
+        replace(_deskew(current if current.mode == "L" else current.convert("L")))
+    if steps['binarize']:
+        replace(_binarize(current if current.mode == "L" else current.convert("L")))
+    
+    return current
+
+
+def image_hash(image) -> str:
+    """
+    Hash de uma imagem preparada para o OCR
+    
+    SHA-256 dos pixels: só coincide em páginas idênticas (por exemplo, o
+    mesmo formulário em PDFs gerados digitalmente). Um hash perceptual
+    igualaria formulários preenchidos que diferem em poucos caracteres e
+    devolveria o texto de um documento no lugar do outro.
+    
+    Args:
+        image: Imagem PIL (já pré-processada)
+    
+    Returns:
+        Hash em hexadecimal
+    """
+    digest = hashlib.sha256(f"{image.mode}:{image.width}x{image.height}:".encode())
+    digest.update(image.tobytes())
+    return digest.hexdigest()
@@ -0,0 +1,910 @@
+"""
+Disclaimer:
+
+Este código é fornecido como um exemplo open-source de contribuição comunitária para implementação de soluções utilizando a plataforma Oracle.
+É distribuído "AS IS" (como está), sem garantias, responsabilidades ou suporte de qualquer natureza.
+A Oracle Corporation não assume qualquer responsabilidade pelo conteúdo, precisão, funcionalidade ou forma deste material.
+"""
+
+"""
+page_extraction.py - Extração de PDF por Página em Paralelo
+Extrai a camada de texto e executa OCR página a página em um pool de
+processos, preservando a ordem das páginas e isolando falhas e timeouts
+"""
+
+import os
+import time
+import signal
+import unicodedata
+import tempfile
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+from concurrent.futures.process import BrokenProcessPool
+from contextlib import contextmanager
+from typing import List, Dict, Any, Optional, Callable, Tuple, Set
+
+# PDF Processing
+try:
+    from PyPDF2 import PdfReader
+except ImportError:
+    PdfReader = None
+
+# Renderização de páginas para OCR (pdftoppm)
+try:
+    from pdf2image import convert_from_path, pdfinfo_from_path
+except ImportError:
+    convert_from_path = None
+    pdfinfo_from_path = None
+
+# Renderização e texto no próprio processo (OCR_RENDERER=pdfium, PDF_TEXT_BACKEND=pdfium)
+try:
+    import pypdfium2 as pdfium
+except ImportError:
+    pdfium = None
+
+# Extração de texto com análise de layout (PDF_TEXT_BACKEND=pdfminer)
+try:
+    from pdfminer.high_level import extract_pages as pdfminer_extract_pages
+    from pdfminer.layout import LTTextContainer
+except ImportError:
+    pdfminer_extract_pages = None
+    LTTextContainer = None
+
+from ocr_engines import (
+    get_ocr_engine, select_ocr_engine, ocr_image, DEFAULT_OCR_LANGUAGES,
+    OCR_ENGINE_TESSEROCR, OCR_ENGINE_PYTESSERACT
+)
+from ocr_preprocessing import OCR_PROFILES, resolve_ocr_profile, target_dpi
+from language_probe import detect_language
+from upload_spool import Content, SpooledFile
+
+
+METHOD_TEXT = "text"
+METHOD_OCR = "ocr"
+METHOD_MIXED = "mixed"
+
+RENDERER_PDFTOPPM = "pdftoppm"
+RENDERER_PDFIUM = "pdfium"
+
+# Backends da camada de texto do PDF, na ordem de fallback padrão
+TEXT_BACKEND_PYPDF2 = "pypdf2"
+TEXT_BACKEND_PDFIUM = "pdfium"
+TEXT_BACKEND_PDFMINER = "pdfminer"
+TEXT_BACKENDS = (TEXT_BACKEND_PDFIUM, TEXT_BACKEND_PYPDF2, TEXT_BACKEND_PDFMINER)
+
+TEXT_BACKEND_ALIASES = {
+    "pypdf2": TEXT_BACKEND_PYPDF2,
+    "pypdf": TEXT_BACKEND_PYPDF2,
+    "pdfium": TEXT_BACKEND_PDFIUM,
+    "pypdfium2": TEXT_BACKEND_PDFIUM,
+    "pdfminer": TEXT_BACKEND_PDFMINER,
+    "pdfminer.six": TEXT_BACKEND_PDFMINER,
+}
+
+# Área de uma página Letter em polegadas² (quando o tamanho da página é desconhecido)
+_DEFAULT_PAGE_AREA = 8.5 * 11
+
+# Erro de página cujo worker morreu por causa de outra página (reprocessada)
+_BROKEN_POOL_ERROR = "pool de processos interrompido"
+
+# Erro de página que excedeu o prazo sem que o worker a interrompesse
+_TIMEOUT_ERROR = "timeout da página excedido"
+
+# Folga do alarme da página sobre o timeout, para que os timeouts do
+# pdftoppm/tesseract atuem primeiro
+_DEADLINE_SLACK = 1.5
+
+# Intervalo máximo entre verificações de páginas travadas no pool
+_POLL_SECONDS = 1.0
+
+# Leitor do último PDF aberto neste processo (reaproveitado entre páginas)
+_reader_cache: Dict[str, Any] = {"key": None, "reader": None}
+
+# Documento pdfium do último PDF renderizado neste processo
+_pdfium_cache: Dict[str, Any] = {"key": None, "document": None}
+
+# O pdfium não é thread-safe (várias requisições sem pool no mesmo processo)
+_pdfium_lock = threading.Lock()
+
+
+@contextmanager
+def _page_deadline(seconds: float):
+    """
+    Interrompe a página com TimeoutError após `seconds` (SIGALRM)
+    
+    Só tem efeito na thread principal de sistemas com setitimer, como os
+    workers do pool; em outras threads (requisições sem pool),
+    PageExtractor deixa de esperar pela página após o prazo.
+    """
+    if (seconds <= 0 or not hasattr(signal, "setitimer")
+            or threading.current_thread() is not threading.main_thread()):
+        yield
+        return
+    
+    def _timeout(signum, frame):
+        raise TimeoutError(f"timeout de {seconds:.0f}s excedido")
+    
+    previous = signal.signal(signal.SIGALRM, _timeout)
+    signal.setitimer(signal.ITIMER_REAL, seconds)
+    try:
+        yield
+    finally:
+        signal.setitimer(signal.ITIMER_REAL, 0)
+        signal.signal(signal.SIGALRM, previous)
+
+
+def _open_reader(path: str):
+    """Abre o PDF uma única vez por processo"""
+    key = _pdf_key(path)
+    if _reader_cache["key"] != key:
+        _reader_cache["reader"] = PdfReader(path)
+        _reader_cache["key"] = key
+    return _reader_cache["reader"]
+
+
+def _pdf_key(path: str) -> tuple:
+    stat = os.stat(path)
+    return (path, stat.st_size, stat.st_mtime_ns)
+
+
+def _close_pdfium() -> None:
+    if _pdfium_cache["document"] is not None:
+        _pdfium_cache["document"].close()
+    _pdfium_cache["key"] = _pdfium_cache["document"] = None
+
+
+def _open_pdfium(path: str):
+    """Abre o PDF no pdfium uma única vez por processo (chamar com _pdfium_lock)"""
+    key = _pdf_key(path)
+    if _pdfium_cache["key"] != key:
+        _close_pdfium()
+        _pdfium_cache["document"] = pdfium.PdfDocument(path)
+        _pdfium_cache["key"] = key
+    return _pdfium_cache["document"]
+
+
+def resolve_text_backend(backend: str = None) -> str:
+    """
+    Normaliza o nome do backend da camada de texto
+    
+    Args:
+        backend: Nome informado (padrão: PDF_TEXT_BACKEND)
+    
+    Returns:
+        Nome canônico do backend
+    """
+    name = (backend or os.environ.get("PDF_TEXT_BACKEND", TEXT_BACKEND_PYPDF2)).strip().lower()
+    
+    if name not in TEXT_BACKEND_ALIASES:
+        raise ValueError(
+            f"Backend de texto de PDF não suportado: {name}. "
+            f"Opções: {', '.join(TEXT_BACKENDS)}"
+        )
+    
+    return TEXT_BACKEND_ALIASES[name]
+
+
+def text_backend_available(backend: str) -> bool:
+    """Indica se a biblioteca do backend da camada de texto está instalada"""
+    if backend == TEXT_BACKEND_PYPDF2:
+        return PdfReader is not None
+    if backend == TEXT_BACKEND_PDFIUM:
+        return pdfium is not None
+    if backend == TEXT_BACKEND_PDFMINER:
+        return pdfminer_extract_pages is not None
+    return False
+
+
+def _text_pypdf2(path: str, page: int) -> Tuple[str, float]:
+    pdf_page = _open_reader(path).pages[page]
+    area = float(pdf_page.mediabox.width) * float(pdf_page.mediabox.height)
+    return pdf_page.extract_text(), area
+
+
+def _text_pdfium(path: str, page: int) -> Tuple[str, float]:
+    with _pdfium_lock:
+        pdf_page = _open_pdfium(path)[page]
+        try:
+            width, height = pdf_page.get_size()
+            textpage = pdf_page.get_textpage()
+            try:
+                # pdfium separa linhas com \r\n
+                return textpage.get_text_range().replace("\r\n", "\n"), width * height
+            finally:
+                textpage.close()
+        finally:
+            pdf_page.close()
+
+
+def _text_pdfminer(path: str, page: int) -> Tuple[str, float]:
+    layout = next(iter(pdfminer_extract_pages(path, page_numbers=[page])))
+    text = "".join(element.get_text() for element in layout if isinstance(element, LTTextContainer))
+    return text, layout.width * layout.height
+
+
+# Backend -> função (caminho, página) -> (texto, área em pontos²)
+_TEXT_EXTRACTORS: Dict[str, Callable[[str, int], Tuple[str, float]]] = {
+    TEXT_BACKEND_PYPDF2: _text_pypdf2,
+    TEXT_BACKEND_PDFIUM: _text_pdfium,
+    TEXT_BACKEND_PDFMINER: _text_pdfminer,
+}
+
+
+def render_page(path: str, page: int, dpi: int, timeout: float = 0,
+                grayscale: bool = True, renderer: str = RENDERER_PDFTOPPM):
+    """
+    Renderiza uma única página do PDF como imagem PIL
+    
+    Args:
+        path: Caminho do PDF
+        page: Índice da página (0-based)
+        dpi: Resolução da renderização
+        timeout: Timeout do pdftoppm em segundos (0 = sem limite)
+        grayscale: Renderiza em tons de cinza (1/3 da memória do RGB)
+        renderer: 'pdftoppm' (processo externo) ou 'pdfium' (no próprio processo)
+    
+    Returns:
+        Imagem da página (o chamador deve fechá-la)
+    """
+    if renderer == RENDERER_PDFIUM:
+        with _pdfium_lock:
+            pdf_page = _open_pdfium(path)[page]
+            try:
+                bitmap = pdf_page.render(scale=dpi / 72, grayscale=grayscale)
+                try:
+                    return bitmap.to_pil()
+                finally:
+                    bitmap.close()
+            finally:
+                pdf_page.close()
+    
+    images = convert_from_path(
+        path, dpi=dpi, first_page=page + 1, last_page=page + 1,
+        grayscale=grayscale, timeout=timeout or None
+    )
+    return images[0]
+
+
+def _page_result(page: int, method: str, started: float, text: str = "",
+                 error: str = None) -> Dict[str, Any]:
+    return {
+        'page': page,
+        'text': text or "",
+        'method': method,
+        'error': error,
+        'seconds': round(time.perf_counter() - started, 3)
+    }
+
+
+def text_stats(text: str) -> Tuple[int, int]:
+    """
+    Conta caracteres visíveis e quantos deles são válidos
+    
+    Caracteres de controle, de uso privado e U+FFFD (comuns em fontes sem
+    mapeamento Unicode) não contam como válidos.
+    
+    Args:
+        text: Texto da página
+    
+    Returns:
+        (caracteres não brancos, caracteres válidos)
+    """
+    chars = 0
+    valid = 0
+    for ch in text:
+        if ch.isspace():
+            continue
+        chars += 1
+        if ch != "\ufffd" and unicodedata.category(ch)[0] in "LNPS":
+            valid += 1
+    return chars, valid
+
+
+def extract_text_page(path: str, page: int, timeout: float,
+                      backends: Tuple[str, ...] = (TEXT_BACKEND_PYPDF2,)) -> Dict[str, Any]:
+    """
+    Extrai a camada de texto de uma página (executado no worker)
+    
+    Os backends são tentados em ordem: se um deles falhar na página, o
+    seguinte é usado (o timeout vale para a página inteira).
+    
+    Args:
+        path: Caminho do PDF
+        page: Índice da página (0-based)
+        timeout: Timeout da página em segundos
+        backends: Backends da camada de texto, em ordem de preferência
+    
+    Returns:
+        Resultado da página ({'page', 'text', 'method', 'error', 'seconds'},
+        mais 'area' em polegadas² e 'backend')
+    """
+    started = time.perf_counter()
+    errors = []
+    try:
+        with _page_deadline(timeout):
+            for backend in backends:
+                try:
+                    text, area = _TEXT_EXTRACTORS[backend](path, page)
+                    return dict(_page_result(page, METHOD_TEXT, started, text),
+                                area=area / (72 * 72), backend=backend)
+                except TimeoutError:
+                    raise
+                except Exception as e:
+                    errors.append(f"{backend}: {type(e).__name__}: {e}")
+    except TimeoutError as e:
+        errors.append(f"{type(e).__name__}: {e}")
+        return dict(_page_result(page, METHOD_TEXT, started, error="; ".join(errors)), timed_out=True)
+    except Exception as e:
+        errors.append(f"{type(e).__name__}: {e}")
+    return _page_result(page, METHOD_TEXT, started, error="; ".join(errors) or "nenhum backend")
+
+
+def ocr_page(path: str, page: int, timeout: float, dpi: int,
+             grayscale: bool = True, renderer: str = RENDERER_PDFTOPPM,
+             engine: str = None, languages: str = None,
+             profile: str = None) -> Dict[str, Any]:
+    """
+    Renderiza uma página e executa OCR (executado no worker)
+    
+    Só a imagem desta página existe em memória, e ela é liberada logo
+    após o OCR. O engine de OCR é criado uma vez por processo e
+    reaproveitado nas páginas seguintes.
+    
+    Args:
+        path: Caminho do PDF
+        page: Índice da página (0-based)
+        timeout: Timeout da página em segundos
+        dpi: Resolução da renderização
+        grayscale: Renderiza em tons de cinza
+        renderer: 'pdftoppm' ou 'pdfium'
+        engine: 'tesserocr' ou 'pytesseract' (padrão: OCR_ENGINE)
+        languages: Idiomas do Tesseract (padrão: OCR_LANGUAGES)
+        profile: Perfil de pré-processamento (padrão: OCR_PREPROCESS); perfis
+            com redução renderizam a página direto no DPI alvo, se menor
+    
+    Returns:
+        Resultado da página ({'page', 'text', 'method', 'error', 'seconds'})
+    """
+    started = time.perf_counter()
+    image = None
+    try:
+        with _page_deadline(timeout * _DEADLINE_SLACK if timeout > 0 else 0):
+            if OCR_PROFILES[resolve_ocr_profile(profile)]['downscale']:
+                dpi = min(dpi, target_dpi())
+            image = render_page(path, page, dpi, timeout, grayscale, renderer)
+            text = ocr_image(image, timeout, engine, languages, profile, dpi)
+        return dict(_page_result(page, METHOD_OCR, started, text), languages=languages)
+    except TimeoutError as e:
+        return dict(_page_result(page, METHOD_OCR, started, error=f"{type(e).__name__}: {e}"),
+                    timed_out=True)
+    except Exception as e:
+        return _page_result(page, METHOD_OCR, started, error=f"{type(e).__name__}: {e}")
+    finally:
+        if image is not None:
+            image.close()
+
+
+def _init_ocr_worker(engine: str, languages: str) -> None:
+    """Carrega o engine de OCR ao iniciar o worker (fora do timeout da primeira página)"""
+    try:
+        get_ocr_engine(engine, languages)
+    except Exception as e:
+        print(f"[extraction] AVISO: engine de OCR não carregado no worker {os.getpid()}: {e}")
+
+
+def count_pages(path: str) -> int:
+    """
+    Conta as páginas de um PDF
+    
+    Args:
+        path: Caminho do PDF
+    
+    Returns:
+        Número de páginas
+    """
+    if PdfReader is not None:
+        return len(_open_reader(path).pages)
+    if pdfium is not None:
+        with _pdfium_lock:
+            return len(_open_pdfium(path))
+    if pdfinfo_from_path is not None:
+        return int(pdfinfo_from_path(path)["Pages"])
+    raise RuntimeError("PyPDF2, pypdfium2 ou pdf2image necessários para ler PDFs")
+
+
+@contextmanager
+def spooled_pdf(content: Content):
+    """
+    Caminho do PDF em disco, que os workers abrem diretamente
+    
+    Uploads já gravados em disco (SpooledFile) são usados no próprio
+    arquivo; bytes são gravados em um arquivo temporário.
+    
+    Args:
+        content: Conteúdo do PDF em bytes ou SpooledFile
+    
+    Yields:
+        Caminho do arquivo
+    """
+    temporary = not isinstance(content, SpooledFile)
+    if temporary:
+        fd, path = tempfile.mkstemp(suffix=".pdf", dir=os.environ.get("EXTRACTION_TMP_DIR") or None)
+    else:
+        path = content.path
+    
+    try:
+        if temporary:
+            with os.fdopen(fd, "wb") as f:
+                f.write(content)
+        yield path
+    finally:
+        if _reader_cache["key"] and _reader_cache["key"][0] == path:
+            _reader_cache["key"] = _reader_cache["reader"] = None
+        if _pdfium_cache["key"] and _pdfium_cache["key"][0] == path:
+            with _pdfium_lock:
+                _close_pdfium()
+        if temporary:
+            os.unlink(path)
+
+
+class PageExtractor:
+    """
+    Executa tarefas por página em um pool de processos
+    
+    Documentos com menos de `min_pages` páginas (ou workers=0) são
+    processados no próprio processo. Cada página retorna seu resultado ou
+    erro; uma página com falha ou timeout não interrompe as demais, nem as
+    páginas de outras requisições que compartilham o pool.
+    """
+    
+    def __init__(self, workers: int = None, page_timeout: float = None,
+                 min_pages: int = None, dpi: int = None,
+                 grayscale: bool = None, renderer: str = None,
+                 text_backend: str = None, ocr_engine: str = None,
+                 ocr_languages: str = None, ocr_profile: str = None,
+                 language_probe: bool = None, probe_dpi: int = None):
+        """
+        Inicializa o extrator
+        
+        Args:
+            workers: Processos do pool (padrão: EXTRACTION_WORKERS; 0 = sem pool)
+            page_timeout: Timeout por página em segundos (padrão: EXTRACTION_PAGE_TIMEOUT)
+            min_pages: Páginas mínimas para usar o pool (padrão: EXTRACTION_MIN_PAGES)
+            dpi: Resolução da renderização para OCR (padrão: OCR_DPI)
+            grayscale: Renderiza páginas em tons de cinza (padrão: OCR_GRAYSCALE)
+            renderer: 'pdftoppm' ou 'pdfium' (padrão: OCR_RENDERER)
+            text_backend: Backend preferido da camada de texto (padrão: PDF_TEXT_BACKEND);
+                os demais backends instalados são usados como fallback
+            ocr_engine: 'tesserocr' (API no próprio processo) ou 'pytesseract'
+                (padrão: OCR_ENGINE; sem ele, tesserocr com pool e pytesseract sem)
+            ocr_languages: Idiomas do Tesseract (padrão: OCR_LANGUAGES)
+            ocr_profile: Perfil de pré-processamento das imagens (padrão: OCR_PREPROCESS)
+            language_probe: Reduz os idiomas do OCR ao idioma detectado em cada
+                documento (padrão: OCR_LANGUAGE_PROBE)
+            probe_dpi: Resolução do OCR rápido de detecção de idioma (padrão: OCR_PROBE_DPI)
+        """
+        if workers is None:
+            workers = int(os.environ.get("EXTRACTION_WORKERS", "0"))
+        self.workers = workers if workers >= 0 else (os.cpu_count() or 1)
+        self.page_timeout = page_timeout if page_timeout is not None \
+            else float(os.environ.get("EXTRACTION_PAGE_TIMEOUT", "120"))
+        self.min_pages = min_pages if min_pages is not None \
+            else int(os.environ.get("EXTRACTION_MIN_PAGES", "4"))
+        self.dpi = dpi or int(os.environ.get("OCR_DPI", "200"))
+        self.grayscale = grayscale if grayscale is not None \
+            else os.environ.get("OCR_GRAYSCALE", "true").lower() == "true"
+        self.renderer = (renderer or os.environ.get("OCR_RENDERER", RENDERER_PDFTOPPM)).lower()
+        
+        if self.renderer not in (RENDERER_PDFTOPPM, RENDERER_PDFIUM):
+            raise ValueError(f"OCR_RENDERER inválido: {self.renderer} (use 'pdftoppm' ou 'pdfium')")
+        if self.renderer == RENDERER_PDFIUM and pdfium is None:
+            print("[extraction] AVISO: pypdfium2 não instalado - renderizando com pdftoppm")
+            self.renderer = RENDERER_PDFTOPPM
+        
+        # Sem pool, o OCR roda nas threads das requisições: o handle único do
+        # tesserocr (com lock) as serializaria, e o pytesseract (um processo
+        # por página) não
+        if not (ocr_engine or os.environ.get("OCR_ENGINE")):
+            ocr_engine = OCR_ENGINE_TESSEROCR if self.workers > 0 else OCR_ENGINE_PYTESSERACT
+        
+        # Engine configurado ou, se não instalado, o alternativo (None = sem OCR)
+        self.ocr_engine = select_ocr_engine(ocr_engine)
+        self.ocr_languages = ocr_languages or os.environ.get("OCR_LANGUAGES", DEFAULT_OCR_LANGUAGES)
+        self.ocr_profile = resolve_ocr_profile(ocr_profile)
+        self.language_probe = language_probe if language_probe is not None \
+            else os.environ.get("OCR_LANGUAGE_PROBE", "true").lower() == "true"
+        self.probe_dpi = probe_dpi or int(os.environ.get("OCR_PROBE_DPI", "100"))
+        
+        # Backend preferido seguido dos demais instalados (fallback por página)
+        preferred = resolve_text_backend(text_backend)
+        self.text_backends = tuple(
+            backend for backend in dict.fromkeys((preferred,) + TEXT_BACKENDS)
+            if text_backend_available(backend)
+        )
+        if self.text_backends and self.text_backends[0] != preferred:
+            print(f"[extraction] AVISO: backend de PDF {preferred} não instalado - "
+                  f"usando {self.text_backends[0]}")
+        
+        # Heurística de camada de texto inadequada (página enviada ao OCR)
+        self.ocr_min_density = float(os.environ.get("OCR_MIN_CHAR_DENSITY", "1.0"))
+        self.ocr_min_valid_ratio = float(os.environ.get("OCR_MIN_VALID_RATIO", "0.8"))
+        
+        # Documento com páginas que falharam mesmo após nova tentativa: erro
+        # (true) ou texto parcial com as páginas em extraction.failed_pages
+        self.require_all_pages = os.environ.get("EXTRACTION_REQUIRE_ALL_PAGES", "false").lower() == "true"
+        
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._lock = threading.Lock()
+        
+        # Páginas enviadas a cada pool e ainda não concluídas (de todas as
+        # requisições), e pools substituídos aguardando o encerramento
+        self._inflight: Dict[ProcessPoolExecutor, Set[Any]] = {}
+        self._retiring: List[ProcessPoolExecutor] = []
+    
+    def _get_executor(self) -> ProcessPoolExecutor:
+        """
+        Cria o pool sob demanda (spawn: seguro com threads no processo pai)
+        
+        Cada worker carrega o engine de OCR ao iniciar e o mantém enquanto
+        viver, de modo que os idiomas são carregados uma vez por processo.
+        """
+        with self._lock:
+            if self._executor is None:
+                print(f"[extraction] Iniciando pool de extração com {self.workers} processos...")
+                initializer = _init_ocr_worker if self.ocr_available else None
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.workers,
+                    mp_context=multiprocessing.get_context("spawn"),
+                    initializer=initializer,
+                    initargs=(self.ocr_engine, self.ocr_languages) if initializer else ()
+                )
+            return self._executor
+    
+    def _submit(self, executor: ProcessPoolExecutor, *args) -> Any:
+        """Envia uma página ao pool, registrando-a até terminar"""
+        future = executor.submit(*args)
+        with self._lock:
+            inflight = self._inflight.setdefault(executor, set())
+            inflight.add(future)
+        
+        # Chamado na thread do pool (ou nesta, se já terminou): nunca com _lock
+        def _done(done_future):
+            with self._lock:
+                inflight.discard(done_future)
+        
+        future.add_done_callback(_done)
+        return future
+    
+    @staticmethod
+    def _terminate_executor(executor: ProcessPoolExecutor) -> None:
+        """Encerra os processos de um pool (shutdown() não interrompe tarefas em execução)"""
+        # _processes é None depois do shutdown do pool
+        for process in list((getattr(executor, "_processes", None) or {}).values()):
+            process.terminate()
+        executor.shutdown(wait=False, cancel_futures=True)
+    
+    def _retire_executor(self, executor: ProcessPoolExecutor, stuck: List[Any] = ()) -> None:
+        """
+        Substitui um pool com workers travados ou mortos
+        
+        As próximas páginas vão para um novo pool. Um pool interrompido
+        (BrokenProcessPool) é encerrado na hora: suas páginas já falharam e
+        são reprocessadas por quem as enviou. Com workers travados, o pool
+        antigo só é encerrado depois que as demais páginas enviadas a ele,
+        inclusive as de outras requisições, terminam.
+        
+        Args:
+            executor: Pool a substituir
+            stuck: Páginas travadas (não são esperadas)
+        """
+        with self._lock:
+            if self._executor is executor:
+                self._executor = None
+            inflight = self._inflight.get(executor, set())
+            inflight.difference_update(stuck)
+            if executor in self._retiring:
+                return
+            self._retiring.append(executor)
+        
+        def _drain():
+            while True:
+                with self._lock:
+                    pending = [future for future in inflight if not future.done()]
+                if not pending or getattr(executor, "_broken", False):
+                    break
+                wait(pending, timeout=_POLL_SECONDS)
+            
+            with self._lock:
+                self._inflight.pop(executor, None)
+                if executor not in self._retiring:
+                    return          # já encerrado por close()
+                self._retiring.remove(executor)
+            self._terminate_executor(executor)
+        
+        if stuck:
+            print(f"[extraction] AVISO: {len(stuck)} páginas travadas - novo pool de extração; "
+                  f"o anterior é encerrado após as páginas em andamento")
+            threading.Thread(target=_drain, name="extraction-pool-drain", daemon=True).start()
+        else:
+            _drain()
+    
+    def run(self, task: Callable[..., Dict[str, Any]], path: str,
+            pages: List[int], *args) -> List[Dict[str, Any]]:
+        """
+        Executa uma tarefa para cada página, preservando a ordem
+        
+        Args:
+            task: Função de página (extract_text_page ou ocr_page)
+            path: Caminho do PDF
+            pages: Índices das páginas
+            *args: Argumentos adicionais da tarefa
+        
+        Returns:
+            Resultados na mesma ordem de `pages`
+        """
+        if self.workers <= 0 or len(pages) < self.min_pages:
+            return [self._run_inline(task, path, page, *args) for page in pages]
+        
+        results = self._run_pool(task, path, pages, *args)
+        
+        # Páginas com timeout: uma nova tentativa (a lentidão pode vir da
+        # concorrência com outras requisições ou de um worker travado)
+        retry = [i for i, result in enumerate(results) if result.get('timed_out')]
+        if retry:
+            print(f"[extraction] Reprocessando {len(retry)} páginas após timeout...")
+            retried = self._run_pool(task, path, [pages[i] for i in retry], *args)
+            for i, result in zip(retry, retried):
+                results[i] = result
+        
+        # Páginas perdidas quando outra página derrubou o worker: nova tentativa
+        # em paralelo e, se o pool cair de novo, uma página por vez (isola a culpada)
+        for one_at_a_time in (False, True):
+            retry = [i for i, result in enumerate(results) if result['error'] == _BROKEN_POOL_ERROR]
+            if not retry:
+                break
+            
+            print(f"[extraction] Reprocessando {len(retry)} páginas após falha de worker...")
+            for group in ([[i] for i in retry] if one_at_a_time else [retry]):
+                retried = self._run_pool(task, path, [pages[i] for i in group], *args)
+                for i, result in zip(group, retried):
+                    results[i] = result
+        
+        return results
+    
+    def _run_inline(self, task: Callable[..., Dict[str, Any]], path: str,
+                    page: int, *args) -> Dict[str, Any]:
+        """
+        Executa uma página no próprio processo, com o prazo da página
+        
+        Na thread principal o prazo é o alarme de _page_deadline. Nas
+        threads das requisições o alarme não funciona: a página roda em
+        uma thread auxiliar e, após o prazo, é registrada como timeout; a
+        thread termina em segundo plano (por isso a página não é repetida).
+        """
+        if self.page_timeout <= 0 or threading.current_thread() is threading.main_thread():
+            return task(path, page, self.page_timeout, *args)
+        
+        started = time.perf_counter()
+        outcome: Dict[str, Any] = {}
+        
+        def _target():
+            try:
+                outcome['result'] = task(path, page, self.page_timeout, *args)
+            except Exception as e:
+                outcome['error'] = f"{type(e).__name__}: {e}"
+        
+        thread = threading.Thread(target=_target, name=f"extraction-page-{page}", daemon=True)
+        thread.start()
+        thread.join(self.page_timeout * _DEADLINE_SLACK)
+        
+        method = METHOD_OCR if task is ocr_page else METHOD_TEXT
+        if thread.is_alive():
+            return _page_result(page, method, started, error=_TIMEOUT_ERROR)
+        if 'result' not in outcome:
+            return _page_result(page, method, started, error=outcome['error'])
+        return outcome['result']
+    
+    @property
+    def ocr_available(self) -> bool:
+        """Um engine de OCR e o renderizador configurado estão instalados"""
+        if self.ocr_engine is None:
+            return False
+        return self.renderer == RENDERER_PDFIUM or convert_from_path is not None
+    
+    def extract_text(self, path: str, pages: List[int]) -> List[Dict[str, Any]]:
+        """
+        Extrai a camada de texto das páginas com os backends configurados
+        
+        Args:
+            path: Caminho do PDF
+            pages: Índices das páginas
+        
+        Returns:
+            Resultados na mesma ordem de `pages`
+        """
+        return self.run(extract_text_page, path, pages, self.text_backends)
+    
+    def ocr(self, path: str, pages: List[int], languages: str = None) -> List[Dict[str, Any]]:
+        """
+        Executa OCR nas páginas com as opções de renderização do extrator
+        
+        Args:
+            path: Caminho do PDF
+            pages: Índices das páginas
+            languages: Idiomas do Tesseract (padrão: os do extrator)
+        
+        Returns:
+            Resultados na mesma ordem de `pages`
+        """
+        return self.run(ocr_page, path, pages, self.dpi, self.grayscale, self.renderer,
+                        self.ocr_engine, languages or self.ocr_languages, self.ocr_profile)
+    
+    def probe_languages(self, path: str, page: int, sample: str = "") -> str:
+        """
+        Idiomas do OCR de um documento: o idioma detectado, se houver um só
+        
+        Usa primeiro a amostra de texto (camada de texto de outras páginas);
+        se ela não bastar, executa um OCR rápido da página em baixa
+        resolução (probe_dpi) com todos os idiomas configurados.
+        
+        Args:
+            path: Caminho do PDF
+            page: Página para o OCR rápido
+            sample: Texto já extraído do documento
+        
+        Returns:
+            Idiomas do Tesseract a usar no documento
+        """
+        if not self.language_probe or "+" not in self.ocr_languages:
+            return self.ocr_languages
+        
+        detected = detect_language(sample, self.ocr_languages)
+        source = "camada de texto"
+        if detected is None:
+            result = self._run_inline(ocr_page, path, page, self.probe_dpi, True, self.renderer,
+                                      self.ocr_engine, self.ocr_languages, self.ocr_profile)
+            if result['error'] is None:
+                detected = detect_language(sample + "\n" + result['text'], self.ocr_languages)
+                source = f"OCR a {self.probe_dpi} DPI da página {page + 1}"
+        
+        if detected is None:
+            return self.ocr_languages
+        
+        print(f"[extraction] Idioma detectado ({source}): OCR com {detected} "
+              f"em vez de {self.ocr_languages}")
+        return detected
+    
+    def windows(self, pages: List[int], window: int = None) -> List[List[int]]:
+        """
+        Divide as páginas em janelas processadas uma de cada vez
+        
+        Apenas uma janela fica em memória por vez, de modo que o consumidor
+        (chunking, embeddings) começa antes do fim do documento.
+        
+        Args:
+            pages: Índices das páginas
+            window: Páginas por janela (padrão: 2x os workers, ou 1 sem pool)
+        
+        Returns:
+            Listas de índices, em ordem
+        """
+        if window is None:
+            window = max(self.workers * 2, self.min_pages) if self.workers > 0 else 1
+        return [pages[i:i + window] for i in range(0, len(pages), window)]
+    
+    def needs_ocr(self, result: Dict[str, Any]) -> bool:
+        """
+        Indica se a camada de texto de uma página é inadequada
+        
+        A página vai para o OCR se a extração falhou, se tem menos de
+        OCR_MIN_CHAR_DENSITY caracteres por polegada² (página escaneada com
+        no máximo um carimbo ou cabeçalho em texto) ou se menos de
+        OCR_MIN_VALID_RATIO dos caracteres são válidos (fonte sem mapeamento).
+        
+        Args:
+            result: Resultado de extract_text_page
+        
+        Returns:
+            True se a página deve ser rasterizada e processada com OCR
+        """
+        if result['error']:
+            return True
+        
+        chars, valid = text_stats(result['text'])
+        if chars == 0:
+            return True
+        
+        area = result.get('area') or _DEFAULT_PAGE_AREA
+        return chars / area < self.ocr_min_density or valid / chars < self.ocr_min_valid_ratio
+    
+    def _run_pool(self, task: Callable[..., Dict[str, Any]], path: str,
+                  pages: List[int], *args) -> List[Dict[str, Any]]:
+        """
+        Executa as páginas no pool compartilhado
+        
+        O prazo de cada página conta a partir de quando ela começa a
+        executar, e não do envio: com outras requisições no pool, páginas
+        na fila não consomem prazo. Uma página em execução por mais de
+        2 x _DEADLINE_SLACK x page_timeout (o alarme do worker não a
+        interrompeu; a folga cobre a espera na fila interna do pool) é
+        registrada como timeout e o pool é substituído (_retire_executor).
+        """
+        executor = self._get_executor()
+        method = METHOD_OCR if task is ocr_page else METHOD_TEXT
+        started = time.perf_counter()
+        futures = {
+            self._submit(executor, task, path, page, self.page_timeout, *args): i
+            for i, page in enumerate(pages)
+        }
+        
+        limit = self.page_timeout * 2 * _DEADLINE_SLACK if self.page_timeout > 0 else None
+        poll = min(_POLL_SECONDS, limit / 4) if limit else None
+        
+        results: List[Optional[Dict[str, Any]]] = [None] * len(pages)
+        running_since: Dict[Any, float] = {}
+        pending = set(futures)
+        stuck = []
+        broken = False
+        
+        while pending:
+            done, pending = wait(pending, timeout=poll, return_when=FIRST_COMPLETED)
+            
+            for future in done:
+                i = futures[future]
+                try:
+                    results[i] = future.result()
+                except BrokenProcessPool:
+                    results[i] = _page_result(pages[i], method, started, error=_BROKEN_POOL_ERROR)
+                    broken = True
+            
+            if limit is None:
+                continue
+            
+            now = time.monotonic()
+            for future in [f for f in pending if f.running()]:
+                if now - running_since.setdefault(future, now) > limit:
+                    pending.discard(future)
+                    stuck.append(future)
+                    i = futures[future]
+                    results[i] = dict(_page_result(pages[i], method, started, error=_TIMEOUT_ERROR),
+                                      timed_out=True)
+        
+        if stuck or broken:
+            self._retire_executor(executor, stuck)
+        
+        return results
+    
+    def close(self) -> None:
+        """Encerra o pool de processos"""
+        with self._lock:
+            executor, self._executor = self._executor, None
+            retiring, self._retiring = self._retiring, []
+        for old in retiring:
+            self._terminate_executor(old)
+        if executor is not None:
+            executor.shutdown(wait=True, cancel_futures=True)
+
+
+# Instância global (criada sob demanda a partir do ambiente)
+_page_extractor: Optional[PageExtractor] = None
+
+
+def get_page_extractor() -> PageExtractor:
+    """
+    Retorna o extrator de páginas compartilhado
+    
+    Returns:
+        Instância de PageExtractor
+    """
+    global _page_extractor
+    
+    if _page_extractor is None:
+        _page_extractor = PageExtractor()
+    return _page_extractor
+
+
+def close_page_extractor() -> None:
+    """Encerra o pool do extrator compartilhado, se iniciado"""
+    if _page_extractor is not None:
+        _page_extractor.close()
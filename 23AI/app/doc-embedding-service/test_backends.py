@@ -0,0 +1,189 @@
+"""
+Disclaimer:
+
+Este código é fornecido como um exemplo open-source de contribuição comunitária para implementação de soluções utilizando a plataforma Oracle.
+É distribuído "AS IS" (como está), sem garantias, responsabilidades ou suporte de qualquer natureza.
+A Oracle Corporation não assume qualquer responsabilidade pelo conteúdo, precisão, funcionalidade ou forma deste material.
+"""
+
+"""
+test_backends.py - Teste de Paridade entre Backends de Embedding
+Compara os embeddings do backend ONNX (fp32 e int8) com o backend PyTorch e,
+se configurado, o substituto local do modelo do banco com VECTOR_EMBEDDING
+"""
+
+import os
+import sys
+import numpy as np
+from types import SimpleNamespace
+
+from embedding_backends import load_sentence_transformer, load_onnx_model, onnx_model_path
+
+# Configuração
+MODEL_NAME = os.environ.get("EMBEDDING_MODEL", "sentence-transformers/all-MiniLM-L6-v2")
+
+# Tolerâncias (similaridade de cosseno mínima entre backends)
+MIN_COSINE_FP32 = float(os.environ.get("PARITY_MIN_COSINE_FP32", "0.9999"))
+MIN_COSINE_INT8 = float(os.environ.get("PARITY_MIN_COSINE_INT8", "0.98"))
+MIN_COSINE_DATABASE = float(os.environ.get("PARITY_MIN_COSINE_DATABASE", "0.9999"))
+
+SENTENCES = [
+    "Como fazer upload de documentos?",
+    "O serviço permite busca semântica em documentos PDF, Word e imagens escaneadas.",
+    "Oracle Autonomous Database 23ai supports vector search natively.",
+    "Contrato de prestação de serviços celebrado entre as partes abaixo qualificadas, "
+    "que se regerá pelas cláusulas e condições seguintes. " * 20,
+    "a",
+]
+
+# Cores para output
+class Colors:
+    GREEN = '\033[92m'
+    RED = '\033[91m'
+    BLUE = '\033[94m'
+    END = '\033[0m'
+
+def print_success(msg):
+    print(f"{Colors.GREEN}✓ {msg}{Colors.END}")
+
+def print_error(msg):
+    print(f"{Colors.RED}✗ {msg}{Colors.END}")
+
+def print_info(msg):
+    print(f"{Colors.BLUE}ℹ {msg}{Colors.END}")
+
+def cosine_rows(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    """Similaridade de cosseno linha a linha"""
+    a = a / np.linalg.norm(a, axis=1, keepdims=True)
+    b = b / np.linalg.norm(b, axis=1, keepdims=True)
+    return np.sum(a * b, axis=1)
+
+def test_parity(reference: np.ndarray, quantized: bool, min_cosine: float) -> bool:
+    """Testa a paridade do backend ONNX contra a referência PyTorch"""
+    label = "int8" if quantized else "fp32"
+    print_info(f"Testando paridade ONNX {label} (cosseno mínimo: {min_cosine})...")
+    
+    try:
+        model = load_onnx_model(MODEL_NAME, quantized=quantized)
+        embeddings = model.encode(SENTENCES, batch_size=2)
+        
+        if embeddings.shape != reference.shape:
+            print_error(f"Shape divergente: {embeddings.shape} != {reference.shape}")
+            return False
+        
+        cosines = cosine_rows(reference, embeddings)
+        max_abs = float(np.max(np.abs(reference - embeddings)))
+        print_info(f"  Cosseno mínimo: {cosines.min():.6f}, diferença absoluta máxima: {max_abs:.6f}")
+        
+        if cosines.min() >= min_cosine:
+            print_success(f"Paridade ONNX {label} OK")
+            return True
+        
+        print_error(f"Paridade ONNX {label} fora da tolerância")
+        return False
+    
+    except Exception as e:
+        print_error(f"Erro no backend ONNX {label}: {e}")
+        return False
+
+def test_registry_onnx_paths() -> bool:
+    """Cada modelo do registro usa o próprio modelo ONNX (EMBEDDING_ONNX_PATH só no padrão)"""
+    from embedding_service import EmbeddingModelRegistry
+    
+    extra_model = "intfloat/multilingual-e5-small"
+    custom_path = os.path.join("models", "custom", "padrao.onnx")
+    previous = {name: os.environ.get(name) for name in ("EMBEDDING_MODEL", "EMBEDDING_ONNX_PATH")}
+    
+    try:
+        os.environ["EMBEDDING_MODEL"] = MODEL_NAME
+        os.environ["EMBEDDING_ONNX_PATH"] = custom_path
+        registry = EmbeddingModelRegistry(
+            SimpleNamespace(model_name=MODEL_NAME),
+            models={"e5": extra_model},
+            collection_models={"contratos": "e5"}
+        )
+        
+        default_path = onnx_model_path(registry.resolve())
+        extra_path = onnx_model_path(registry.resolve(collection="contratos"))
+        
+        if default_path != custom_path:
+            print_error(f"Modelo padrão não usa EMBEDDING_ONNX_PATH: {default_path}")
+            return False
+        
+        if extra_path == default_path or extra_model.replace("/", "__") not in extra_path:
+            print_error(f"Modelo {extra_model} resolvido para {extra_path}")
+            return False
+        
+        print_success("Modelos do registro resolvidos para modelos ONNX diferentes")
+        return True
+    
+    finally:
+        for name, value in previous.items():
+            if value is None:
+                os.environ.pop(name, None)
+            else:
+                os.environ[name] = value
+
+def test_database_standin() -> bool:
+    """Testa o substituto local (EMBEDDING_DB_STANDIN) contra VECTOR_EMBEDDING no banco"""
+    from database import DatabaseManager
+    from database_embedding import InDatabaseEmbeddingService
+    
+    print_info(f"Testando substituto local do modelo do banco (cosseno mínimo: {MIN_COSINE_DATABASE})...")
+    
+    try:
+        db = DatabaseManager()
+        db.connect()
+        standin = InDatabaseEmbeddingService()
+        
+        expected = db.embed_texts(standin.model_name, SENTENCES)
+        embeddings = standin.encode_batch(SENTENCES)
+        
+        cosines = cosine_rows(expected, embeddings)
+        print_info(f"  Cosseno mínimo: {cosines.min():.6f}")
+        
+        if cosines.min() >= MIN_COSINE_DATABASE:
+            print_success(f"Paridade do substituto de {standin.model_name} OK")
+            return True
+        
+        print_error(f"Paridade do substituto de {standin.model_name} fora da tolerância")
+        return False
+    
+    except Exception as e:
+        print_error(f"Erro no teste do modelo do banco: {e}")
+        return False
+
+def main():
+    """Executa os testes de paridade"""
+    print("\n" + "="*60)
+    print("Embedding Backends - Teste de Paridade")
+    print("="*60 + "\n")
+    
+    print_info(f"Modelo: {MODEL_NAME}")
+    registry_paths = test_registry_onnx_paths()
+    
+    reference = load_sentence_transformer(MODEL_NAME).encode(
+        SENTENCES, convert_to_numpy=True, show_progress_bar=False
+    )
+    print()
+    
+    results = {
+        'registry_onnx_paths': registry_paths,
+        'onnx_fp32': test_parity(reference, quantized=False, min_cosine=MIN_COSINE_FP32),
+        'onnx_int8': test_parity(reference, quantized=True, min_cosine=MIN_COSINE_INT8),
+    }
+    
+    # Requer DB_USER/DB_PASSWORD/DB_DSN e o modelo carregado por install-model.sql
+    if os.environ.get("EMBEDDING_DB_STANDIN") and os.environ.get("DB_DSN"):
+        results['database_standin'] = test_database_standin()
+    else:
+        print_info("Substituto do modelo do banco não testado (defina EMBEDDING_DB_STANDIN e DB_DSN)")
+    print()
+    
+    passed = sum(1 for v in results.values() if v)
+    print(f"Total: {passed}/{len(results)} testes passaram")
+    
+    return 0 if passed == len(results) else 1
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,230 @@
+"""
+Disclaimer:
+
+Este código é fornecido como um exemplo open-source de contribuição comunitária para implementação de soluções utilizando a plataforma Oracle.
+É distribuído "AS IS" (como está), sem garantias, responsabilidades ou suporte de qualquer natureza.
+A Oracle Corporation não assume qualquer responsabilidade pelo conteúdo, precisão, funcionalidade ou forma deste material.
+"""
+
+"""
+test_chunking.py - Teste de Equivalência e Benchmark do Chunking
+Compara o chunking por offsets (chunking.py) com a implementação original
+de create_chunks em textos aleatórios, inteiros e divididos em partes, e
+mede o tempo de ambos em textos de vários MB
+"""
+
+import os
+import sys
+import time
+import random
+
+from chunking import BoundaryBuffer, iter_spans, chunk_spans
+
+# Configuração
+TRIALS = int(os.environ.get("CHUNKING_TRIALS", "2000"))
+SEED = int(os.environ.get("CHUNKING_SEED", "0"))
+BENCHMARK_MB = [float(mb) for mb in os.environ.get("CHUNKING_BENCHMARK_MB", "1,5,20").split(",") if mb]
+
+# Alfabeto com as quebras relevantes em alta frequência
+ALPHABET = ["a", "b", "c", "ção", " ", " ", ".", ". ", "\n", "\n\n", "\t", " ", " "]
+
+# Cores para output
+class Colors:
+    GREEN = '\033[92m'
+    RED = '\033[91m'
+    BLUE = '\033[94m'
+    END = '\033[0m'
+
+def print_success(msg):
+    print(f"{Colors.GREEN}✓ {msg}{Colors.END}")
+
+def print_error(msg):
+    print(f"{Colors.RED}✗ {msg}{Colors.END}")
+
+def print_info(msg):
+    print(f"{Colors.BLUE}ℹ {msg}{Colors.END}")
+
+def reference_chunks(text: str, chunk_size: int, chunk_overlap: int):
+    """
+    create_chunks original (find/rfind por chunk e cópia de cada trecho)
+    
+    Returns:
+        Lista de chunks, ou None se o início de um chunk não avançar (caso
+        em que a implementação original repete trechos ou não termina)
+    """
+    chunks = []
+    text_length = len(text)
+    start = 0
+    chunk_index = 0
+    
+    while start < text_length:
+        end = start + chunk_size
+        
+        if end < text_length:
+            search_start = end
+            search_end = min(end + 100, text_length)
+            
+            period_pos = text.find('. ', search_start, search_end)
+            if period_pos != -1:
+                end = period_pos + 1
+            else:
+                newline_pos = text.find('\n', search_start, search_end)
+                if newline_pos != -1:
+                    end = newline_pos
+                else:
+                    space_pos = text.rfind(' ', start, search_end)
+                    if space_pos > start:
+                        end = space_pos
+        
+        chunk_text = text[start:end].strip()
+        
+        if chunk_text:
+            chunks.append({
+                'index': chunk_index,
+                'text': chunk_text,
+                'size': len(chunk_text),
+                'start_pos': start,
+                'end_pos': end
+            })
+            chunk_index += 1
+        
+        if end - chunk_overlap <= start:
+            return None
+        start = end - chunk_overlap
+    
+    return chunks
+
+def offset_chunks(parts, chunk_size: int, chunk_overlap: int):
+    """Chunks do texto das partes unidas por "\\n\\n" a partir dos offsets"""
+    buffer = BoundaryBuffer()
+    chunks = []
+    for index, (start, end) in enumerate(iter_spans(buffer, parts, chunk_size, chunk_overlap)):
+        chunk_text = buffer.slice(start, end).strip()
+        chunks.append({
+            'index': index,
+            'text': chunk_text,
+            'size': len(chunk_text),
+            'start_pos': start,
+            'end_pos': end
+        })
+    return chunks, buffer.end
+
+def random_text(rng: random.Random, length: int) -> str:
+    return "".join(rng.choice(ALPHABET) for _ in range(length))
+
+def split_parts(rng: random.Random, text: str):
+    """Divide o texto em partes aleatórias (incluindo vazias)"""
+    cuts = sorted(rng.randint(0, len(text)) for _ in range(rng.randint(0, 6)))
+    bounds = [0] + cuts + [len(text)]
+    return [text[a:b] for a, b in zip(bounds, bounds[1:])]
+
+def test_equivalence() -> bool:
+    """Mesmos chunks que a implementação original, com o texto inteiro ou em partes"""
+    rng = random.Random(SEED)
+    compared = 0
+    
+    for trial in range(TRIALS):
+        parts = split_parts(rng, random_text(rng, rng.randint(0, 3000)))
+        text = "\n\n".join(part for part in parts if part)
+        chunk_size = rng.randint(1, 400)
+        chunk_overlap = rng.randint(0, chunk_size)
+        
+        expected = reference_chunks(text, chunk_size, chunk_overlap) if text.strip() else []
+        whole, _ = offset_chunks([text], chunk_size, chunk_overlap)
+        streamed, text_length = offset_chunks(parts, chunk_size, chunk_overlap)
+        
+        if streamed != whole or text_length != len(text):
+            print_error(f"Partes divergem do texto inteiro (trial {trial}, "
+                        f"size={chunk_size}, overlap={chunk_overlap})")
+            return False
+        
+        if expected is None:
+            continue
+        
+        compared += 1
+        if whole != expected:
+            print_error(f"Chunks divergem da implementação original (trial {trial}, "
+                        f"size={chunk_size}, overlap={chunk_overlap})")
+            return False
+    
+    print_success(f"Chunks idênticos à implementação original em {compared} textos "
+                  f"({TRIALS} gerados)")
+    return True
+
+def test_progress() -> bool:
+    """Palavras maiores que o chunk: o início sempre avança e todo texto não branco é coberto"""
+    rng = random.Random(SEED + 1)
+    
+    for trial in range(TRIALS // 4):
+        text = " ".join("x" * rng.randint(1, 300) for _ in range(rng.randint(1, 40)))
+        chunk_size = rng.randint(1, 120)
+        chunk_overlap = rng.randint(0, chunk_size + 20)
+        spans = chunk_spans(text, chunk_size, chunk_overlap)
+        
+        starts = [start for start, _ in spans]
+        covered = all(not text[a[1]:b[0]].strip() for a, b in zip(spans, spans[1:]))
+        if starts != sorted(set(starts)) or not covered or spans[-1][1] < len(text):
+            print_error(f"Chunks não avançam ou não cobrem o texto (trial {trial})")
+            return False
+    
+    print_success("Início dos chunks sempre avança e o texto é coberto")
+    return True
+
+def benchmark_text(rng: random.Random, size: int) -> str:
+    words = ["documento", "contrato", "cláusula", "serviço", "parte", "prazo", "valor",
+             "vigência.", "objeto,", "rescisão.\n", "Oracle", "23ai"]
+    text = []
+    length = 0
+    while length < size:
+        word = rng.choice(words)
+        text.append(word)
+        length += len(word) + 1
+    return " ".join(text)
+
+def benchmark() -> None:
+    """Tempo da implementação original e do chunking por offsets"""
+    rng = random.Random(SEED)
+    
+    for mb in BENCHMARK_MB:
+        text = benchmark_text(rng, int(mb * 1024 * 1024))
+        pages = [text[i:i + 3000] for i in range(0, len(text), 3000)]
+        
+        started = time.perf_counter()
+        expected = reference_chunks(text, 500, 50)
+        reference_seconds = time.perf_counter() - started
+        
+        started = time.perf_counter()
+        chunks, _ = offset_chunks([text], 500, 50)
+        whole_seconds = time.perf_counter() - started
+        
+        started = time.perf_counter()
+        offset_chunks(pages, 500, 50)
+        pages_seconds = time.perf_counter() - started
+        
+        same = "idênticos" if chunks == expected else "DIVERGENTES"
+        print_info(f"{mb:g} MB, {len(chunks)} chunks ({same}): original {reference_seconds:.3f}s, "
+                   f"offsets {whole_seconds:.3f}s, offsets em páginas {pages_seconds:.3f}s")
+
+def main():
+    """Executa os testes de equivalência e o benchmark"""
+    print("\n" + "="*60)
+    print("Chunking - Teste de Equivalência e Benchmark")
+    print("="*60 + "\n")
+    
+    results = {
+        'equivalence': test_equivalence(),
+        'progress': test_progress(),
+    }
+    print()
+    
+    if BENCHMARK_MB:
+        benchmark()
+        print()
+    
+    passed = sum(1 for v in results.values() if v)
+    print(f"Total: {passed}/{len(results)} testes passaram")
+    
+    return 0 if passed == len(results) else 1
+
+if __name__ == "__main__":
+    sys.exit(main())
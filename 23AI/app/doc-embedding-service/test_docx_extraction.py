@@ -0,0 +1,239 @@
+"""
+Disclaimer:
+
+Este código é fornecido como um exemplo open-source de contribuição comunitária para implementação de soluções utilizando a plataforma Oracle.
+É distribuído "AS IS" (como está), sem garantias, responsabilidades ou suporte de qualquer natureza.
+A Oracle Corporation não assume qualquer responsabilidade pelo conteúdo, precisão, funcionalidade ou forma deste material.
+"""
+
+"""
+test_docx_extraction.py - Teste da Extração de Word (.docx)
+Monta .docx mínimos (só o word/document.xml) com células mescladas na
+vertical (vMerge) e na horizontal (gridSpan e hMerge), tabelas aninhadas e
+caixas de texto, e verifica o texto emitido por iter_docx_text, em ordem
+"""
+
+import os
+import sys
+import shutil
+import zipfile
+import tempfile
+from io import BytesIO
+
+from docx_extraction import iter_docx_text, DOCUMENT_PART
+
+# Cores para output
+class Colors:
+    GREEN = '\033[92m'
+    RED = '\033[91m'
+    BLUE = '\033[94m'
+    END = '\033[0m'
+
+def print_success(msg):
+    print(f"{Colors.GREEN}✓ {msg}{Colors.END}")
+
+def print_error(msg):
+    print(f"{Colors.RED}✗ {msg}{Colors.END}")
+
+def print_info(msg):
+    print(f"{Colors.BLUE}ℹ {msg}{Colors.END}")
+
+NAMESPACE = "http://schemas.openxmlformats.org/wordprocessingml/2006/main"
+
+def paragraph(*runs: str) -> str:
+    """Parágrafo com um run por texto"""
+    return "<w:p>" + "".join(f'<w:r><w:t xml:space="preserve">{run}</w:t></w:r>' for run in runs) + "</w:p>"
+
+def cell(*content: str, properties: str = "") -> str:
+    """Célula com propriedades (tcPr) e conteúdo (parágrafos ou tabelas)"""
+    tc_pr = f"<w:tcPr>{properties}</w:tcPr>" if properties else ""
+    return f"<w:tc>{tc_pr}{''.join(content) or paragraph()}</w:tc>"
+
+def row(*cells: str) -> str:
+    return "<w:tr>" + "".join(cells) + "</w:tr>"
+
+def table(*rows: str) -> str:
+    return "<w:tbl>" + "".join(rows) + "</w:tbl>"
+
+def docx_bytes(*body: str) -> bytes:
+    """Arquivo .docx em memória com o corpo informado"""
+    xml = (f'<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+           f'<w:document xmlns:w="{NAMESPACE}"><w:body>{"".join(body)}</w:body></w:document>')
+    buffer = BytesIO()
+    with zipfile.ZipFile(buffer, "w", zipfile.ZIP_DEFLATED) as archive:
+        archive.writestr(DOCUMENT_PART, xml)
+    return buffer.getvalue()
+
+def extract(content: bytes):
+    """Textos emitidos e contagens"""
+    stats = {}
+    return list(iter_docx_text(BytesIO(content), stats=stats)), stats
+
+def check(name: str, texts, stats, expected_texts, expected_stats) -> bool:
+    if texts != expected_texts:
+        print_error(f"{name}: texto emitido diverge")
+        print_info(f"  esperado: {expected_texts}")
+        print_info(f"  obtido:   {texts}")
+        return False
+    if stats != expected_stats:
+        print_error(f"{name}: contagens divergem (esperado {expected_stats}, obtido {stats})")
+        return False
+    return True
+
+def test_document_order() -> bool:
+    """Parágrafos e tabelas intercalados saem na ordem do documento"""
+    content = docx_bytes(
+        paragraph("Título ", "do contrato"),
+        paragraph(),
+        table(
+            row(cell(paragraph("Cláusula")), cell(paragraph("Valor"))),
+            row(cell(paragraph("Primeira"), paragraph("linha 2")), cell(paragraph("R$ 10"))),
+        ),
+        paragraph("Assinaturas"),
+    )
+    texts, stats = extract(content)
+    
+    if not check("ordem", texts, stats,
+                 ["Título do contrato", "Cláusula", "Valor", "Primeira\nlinha 2", "R$ 10", "Assinaturas"],
+                 {'paragraphs': 3, 'table_cells': 4, 'merged_cells_skipped': 0}):
+        return False
+    
+    print_success("Parágrafos e células na ordem do documento")
+    return True
+
+def test_vertical_merge() -> bool:
+    """Célula mesclada na vertical (vMerge) aparece uma única vez"""
+    restart = '<w:vMerge w:val="restart"/>'
+    continuation = "<w:vMerge/>"
+    content = docx_bytes(table(
+        row(cell(paragraph("Grupo A"), properties=restart), cell(paragraph("item 1"))),
+        # Continuação sem w:val (padrão "continue"); texto residual ignorado
+        row(cell(paragraph("resíduo"), properties=continuation), cell(paragraph("item 2"))),
+        row(cell(properties='<w:vMerge w:val="continue"/>'), cell(paragraph("item 3"))),
+        row(cell(paragraph("Grupo B")), cell(paragraph("item 4"))),
+    ))
+    texts, stats = extract(content)
+    
+    if not check("vMerge", texts, stats,
+                 ["Grupo A", "item 1", "item 2", "item 3", "Grupo B", "item 4"],
+                 {'paragraphs': 0, 'table_cells': 6, 'merged_cells_skipped': 2}):
+        return False
+    
+    print_success("vMerge: continuações ignoradas, célula emitida uma vez")
+    return True
+
+def test_horizontal_merge() -> bool:
+    """gridSpan é uma única célula; continuações de hMerge são ignoradas"""
+    content = docx_bytes(table(
+        row(cell(paragraph("Cabeçalho largo"), properties='<w:gridSpan w:val="3"/>')),
+        row(cell(paragraph("a")), cell(paragraph("b")), cell(paragraph("c"))),
+        # Mesclagem horizontal legada (hMerge)
+        row(cell(paragraph("Rodapé"), properties='<w:hMerge w:val="restart"/>'),
+            cell(paragraph("resíduo"), properties="<w:hMerge/>"),
+            cell(paragraph("fim"))),
+    ))
+    texts, stats = extract(content)
+    
+    if not check("gridSpan/hMerge", texts, stats,
+                 ["Cabeçalho largo", "a", "b", "c", "Rodapé", "fim"],
+                 {'paragraphs': 0, 'table_cells': 6, 'merged_cells_skipped': 1}):
+        return False
+    
+    print_success("gridSpan e hMerge: célula larga emitida uma vez")
+    return True
+
+def test_nested_tables() -> bool:
+    """Tabela aninhada sai na sua posição dentro da célula"""
+    inner = table(
+        row(cell(paragraph("interna 1")), cell(paragraph("interna 2"))),
+        row(cell(paragraph("mesclada"), properties='<w:vMerge w:val="restart"/>'), cell(paragraph("interna 3"))),
+        row(cell(properties="<w:vMerge/>"), cell(paragraph("interna 4"))),
+    )
+    content = docx_bytes(
+        paragraph("Antes"),
+        table(
+            row(cell(paragraph("texto antes"), inner, paragraph("texto depois")),
+                cell(paragraph("vizinha"))),
+            # Tabela aninhada dentro de uma continuação: ignorada com a célula
+            row(cell(paragraph("Grupo"), properties='<w:vMerge w:val="restart"/>'), cell(paragraph("x"))),
+            row(cell(table(row(cell(paragraph("escondida")))), properties="<w:vMerge/>"),
+                cell(paragraph("y"))),
+        ),
+        paragraph("Depois"),
+    )
+    texts, stats = extract(content)
+    
+    if not check("aninhadas", texts, stats,
+                 ["Antes", "texto antes", "interna 1", "interna 2", "mesclada", "interna 3",
+                  "interna 4", "texto depois", "vizinha", "Grupo", "x", "y", "Depois"],
+                 {'paragraphs': 2, 'table_cells': 10, 'merged_cells_skipped': 2}):
+        return False
+    
+    print_success("Tabelas aninhadas na posição, com mesclagens internas")
+    return True
+
+def test_runs_and_text_boxes() -> bool:
+    """Tabulações e quebras viram texto; caixas de texto são ignoradas"""
+    text_box = ('<w:r><w:pict><w:txbxContent>'
+                f'{paragraph("caixa")}{table(row(cell(paragraph("tabela na caixa"))))}'
+                '</w:txbxContent></w:pict></w:r>')
+    content = docx_bytes(
+        '<w:p><w:r><w:t>Nome</w:t><w:tab/><w:t>Maria</w:t><w:br/><w:t>CPF</w:t></w:r>'
+        f'{text_box}</w:p>',
+        table(row(cell(f'<w:p><w:r><w:t>célula</w:t></w:r>{text_box}</w:p>'))),
+    )
+    texts, stats = extract(content)
+    
+    if not check("runs", texts, stats,
+                 ["Nome\tMaria\nCPF", "célula"],
+                 {'paragraphs': 1, 'table_cells': 1, 'merged_cells_skipped': 0}):
+        return False
+    
+    print_success("Tabulações e quebras preservadas, caixas de texto ignoradas")
+    return True
+
+def test_path_source() -> bool:
+    """Caminho de arquivo e arquivo aberto produzem o mesmo texto"""
+    content = docx_bytes(paragraph("Arquivo"), table(row(cell(paragraph("em disco")))))
+    directory = tempfile.mkdtemp(prefix="docx-")
+    
+    try:
+        path = os.path.join(directory, "documento.docx")
+        with open(path, "wb") as f:
+            f.write(content)
+        
+        if list(iter_docx_text(path)) != extract(content)[0]:
+            print_error("Caminho e arquivo aberto produzem textos diferentes")
+            return False
+        
+        print_success("Caminho de arquivo e arquivo aberto equivalentes")
+        return True
+    
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+
+def main():
+    """Executa os testes da extração de Word"""
+    print("\n" + "="*60)
+    print("Extração de Word (.docx) - Testes")
+    print("="*60 + "\n")
+    
+    print_info("Documentos montados em memória (word/document.xml)")
+    
+    results = {
+        'document_order': test_document_order(),
+        'vertical_merge': test_vertical_merge(),
+        'horizontal_merge': test_horizontal_merge(),
+        'nested_tables': test_nested_tables(),
+        'runs_and_text_boxes': test_runs_and_text_boxes(),
+        'path_source': test_path_source(),
+    }
+    print()
+    
+    passed = sum(1 for v in results.values() if v)
+    print(f"Total: {passed}/{len(results)} testes passaram")
+    
+    return 0 if passed == len(results) else 1
+
+if __name__ == "__main__":
+    sys.exit(main())
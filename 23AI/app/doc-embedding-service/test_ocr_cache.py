@@ -0,0 +1,165 @@
+"""
+Disclaimer:
+
+Este código é fornecido como um exemplo open-source de contribuição comunitária para implementação de soluções utilizando a plataforma Oracle.
+É distribuído "AS IS" (como está), sem garantias, responsabilidades ou suporte de qualquer natureza.
+A Oracle Corporation não assume qualquer responsabilidade pelo conteúdo, precisão, funcionalidade ou forma deste material.
+"""
+
+"""
+test_ocr_cache.py - Teste do Cache de OCR
+Verifica que dois formulários preenchidos quase idênticos (mesmo modelo,
+um dígito diferente) não compartilham a entrada do cache de OCR, e que a
+mesma página é reconhecida uma única vez
+"""
+
+import os
+import sys
+import shutil
+import hashlib
+import tempfile
+import numpy as np
+from PIL import Image, ImageDraw
+
+# Cache de OCR em diretório temporário (antes do primeiro get_ocr_cache)
+CACHE_DIR = tempfile.mkdtemp(prefix="ocr-cache-")
+os.environ["OCR_CACHE_DIR"] = CACHE_DIR
+
+import ocr_engines
+from ocr_engines import ocr_image
+from ocr_preprocessing import preprocess_image, image_hash
+
+# Configuração
+PROFILE = os.environ.get("OCR_CACHE_TEST_PROFILE", "standard")
+DPI = 150
+PAGE_SIZE = (1240, 1754)    # A4 a 150 DPI
+
+# Cores para output
+class Colors:
+    GREEN = '\033[92m'
+    RED = '\033[91m'
+    BLUE = '\033[94m'
+    END = '\033[0m'
+
+def print_success(msg):
+    print(f"{Colors.GREEN}✓ {msg}{Colors.END}")
+
+def print_error(msg):
+    print(f"{Colors.RED}✗ {msg}{Colors.END}")
+
+def print_info(msg):
+    print(f"{Colors.BLUE}ℹ {msg}{Colors.END}")
+
+class RecordingEngine:
+    """Engine que "reconhece" a página pelo hash dos pixels e conta as chamadas"""
+    
+    name = ocr_engines.OCR_ENGINE_PYTESSERACT
+    languages = "por"
+    
+    def __init__(self):
+        self.calls = 0
+    
+    def image_to_string(self, image, timeout: float = 0) -> str:
+        self.calls += 1
+        return f"formulário {hashlib.sha256(image.tobytes()).hexdigest()[:12]}"
+    
+    def close(self) -> None:
+        pass
+
+def filled_form(cpf: str) -> Image.Image:
+    """Formulário padrão (mesmo modelo) preenchido com um CPF"""
+    image = Image.new("L", PAGE_SIZE, 255)
+    draw = ImageDraw.Draw(image)
+    
+    draw.rectangle((80, 80, 1160, 1674), outline=0, width=3)
+    draw.text((120, 120), "FORMULÁRIO DE CADASTRO", fill=0)
+    for row, label in enumerate(["Nome:", "CPF:", "Data:", "Assinatura:"]):
+        y = 240 + row * 120
+        draw.text((120, y), label, fill=0)
+        draw.line((260, y + 14, 1100, y + 14), fill=0, width=1)
+    
+    draw.text((270, 240), "Maria da Silva", fill=0)
+    draw.text((270, 360), cpf, fill=0)
+    draw.text((270, 480), "19/10/2026", fill=0)
+    return image
+
+def dhash(image: Image.Image) -> str:
+    """dHash de 256 bits (hash perceptual, para mostrar que as páginas são quase idênticas)"""
+    small = image.convert("L").resize((17, 16), Image.BOX)
+    pixels = np.asarray(small, dtype=np.int16)
+    return np.packbits((pixels[:, 1:] > pixels[:, :-1]).flatten()).tobytes().hex()
+
+def prepared_hash(image: Image.Image) -> str:
+    prepared = preprocess_image(image, PROFILE, DPI)
+    try:
+        return image_hash(prepared)
+    finally:
+        if prepared is not image:
+            prepared.close()
+
+def test_near_identical_forms() -> bool:
+    """Formulários que diferem em um dígito têm chaves e textos diferentes"""
+    form_a = filled_form("123.456.789-01")
+    form_b = filled_form("123.456.789-07")
+    
+    if dhash(form_a) == dhash(form_b):
+        print_info("Os dois formulários têm o mesmo hash perceptual (dHash de 256 bits)")
+    
+    if prepared_hash(form_a) == prepared_hash(form_b):
+        print_error("Formulários diferentes com a mesma chave de cache")
+        return False
+    
+    engine = RecordingEngine()
+    ocr_engines._engines[(engine.name, engine.languages)] = engine
+    
+    text_a = ocr_image(form_a, engine=engine.name, languages=engine.languages, profile=PROFILE, dpi=DPI)
+    text_b = ocr_image(form_b, engine=engine.name, languages=engine.languages, profile=PROFILE, dpi=DPI)
+    
+    if text_a == text_b or engine.calls != 2:
+        print_error(f"O segundo formulário recebeu o texto do primeiro ({engine.calls} OCRs)")
+        return False
+    
+    print_success("Formulários quase idênticos são reconhecidos separadamente")
+    return True
+
+def test_identical_page_hit() -> bool:
+    """A mesma página, em outro documento, vem do cache"""
+    engine = RecordingEngine()
+    ocr_engines._engines[(engine.name, engine.languages)] = engine
+    
+    first = ocr_image(filled_form("987.654.321-00"), engine=engine.name,
+                      languages=engine.languages, profile=PROFILE, dpi=DPI)
+    second = ocr_image(filled_form("987.654.321-00"), engine=engine.name,
+                       languages=engine.languages, profile=PROFILE, dpi=DPI)
+    
+    if first != second or engine.calls != 1:
+        print_error(f"Página idêntica não reaproveitou o cache ({engine.calls} OCRs)")
+        return False
+    
+    print_success("Página idêntica reconhecida uma única vez")
+    return True
+
+def main():
+    """Executa os testes do cache de OCR"""
+    print("\n" + "="*60)
+    print("Cache de OCR - Testes")
+    print("="*60 + "\n")
+    
+    print_info(f"Perfil {PROFILE}, páginas {PAGE_SIZE[0]}x{PAGE_SIZE[1]} a {DPI} DPI")
+    
+    try:
+        results = {
+            'near_identical_forms': test_near_identical_forms(),
+            'identical_page_hit': test_identical_page_hit(),
+        }
+    finally:
+        shutil.rmtree(CACHE_DIR, ignore_errors=True)
+    print()
+    
+    passed = sum(1 for v in results.values() if v)
+    print(f"Total: {passed}/{len(results)} testes passaram")
+    
+    return 0 if passed == len(results) else 1
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,180 @@
+"""
+Disclaimer:
+
+Este código é fornecido como um exemplo open-source de contribuição comunitária para implementação de soluções utilizando a plataforma Oracle.
+É distribuído "AS IS" (como está), sem garantias, responsabilidades ou suporte de qualquer natureza.
+A Oracle Corporation não assume qualquer responsabilidade pelo conteúdo, precisão, funcionalidade ou forma deste material.
+"""
+
+"""
+test_vector_store.py - Teste da Busca Vetorial Exata
+Compara exact_top_k e o MemoryMappedVectorStore com uma busca de força bruta
+(argsort de todas as similaridades) e verifica a reabertura do armazenamento
+"""
+
+import os
+import sys
+import shutil
+import tempfile
+import numpy as np
+
+from vector_store import normalize_rows, exact_top_k, MemoryMappedVectorStore
+
+# Configuração
+SEED = int(os.environ.get("VECTOR_STORE_SEED", "0"))
+DIMENSION = 48
+ROWS = 1000
+
+# Cores para output
+class Colors:
+    GREEN = '\033[92m'
+    RED = '\033[91m'
+    BLUE = '\033[94m'
+    END = '\033[0m'
+
+def print_success(msg):
+    print(f"{Colors.GREEN}✓ {msg}{Colors.END}")
+
+def print_error(msg):
+    print(f"{Colors.RED}✗ {msg}{Colors.END}")
+
+def print_info(msg):
+    print(f"{Colors.BLUE}ℹ {msg}{Colors.END}")
+
+def brute_force(queries: np.ndarray, matrix: np.ndarray, k: int):
+    """Top-k de referência: ordena todas as similaridades"""
+    scores = normalize_rows(queries) @ normalize_rows(matrix).T
+    order = np.argsort(-scores, axis=1, kind="stable")[:, :k]
+    return np.take_along_axis(scores, order, axis=1), order
+
+def same_results(scores, indices, expected_scores, expected_indices) -> bool:
+    return (indices.shape == expected_indices.shape
+            and np.array_equal(indices, expected_indices)
+            and np.allclose(scores, expected_scores, atol=1e-5))
+
+def test_exact_top_k() -> bool:
+    """exact_top_k em blocos igual ao argsort completo"""
+    rng = np.random.default_rng(SEED)
+    matrix = rng.standard_normal((ROWS, DIMENSION)).astype(np.float32)
+    queries = rng.standard_normal((7, DIMENSION)).astype(np.float32)
+    
+    for k in (1, 5, 64, ROWS, ROWS + 10):
+        for block_rows in (None, 1, 37, 256, ROWS):
+            expected = brute_force(queries, matrix, k)
+            result = exact_top_k(normalize_rows(queries), normalize_rows(matrix), k,
+                                 block_rows=block_rows)
+            if not same_results(*result, *expected):
+                print_error(f"exact_top_k diverge da força bruta (k={k}, block_rows={block_rows})")
+                return False
+    
+    print_success("exact_top_k igual à força bruta para vários k e tamanhos de bloco")
+    return True
+
+def test_store_search() -> bool:
+    """Busca no armazenamento igual à força bruta, com vetores inseridos em partes"""
+    rng = np.random.default_rng(SEED + 1)
+    matrix = rng.standard_normal((ROWS, DIMENSION)).astype(np.float32)
+    queries = rng.standard_normal((5, DIMENSION)).astype(np.float32)
+    path = tempfile.mkdtemp(prefix="vector-store-")
+    
+    try:
+        # Blocos pequenos: a busca percorre o arquivo em vários blocos
+        store = MemoryMappedVectorStore(path, dimension=DIMENSION, block_bytes=DIMENSION * 4 * 100)
+        
+        if store.search(queries[0]) != [[]]:
+            print_error("Armazenamento vazio deveria retornar listas vazias")
+            return False
+        
+        ranges = [store.add(part) for part in np.array_split(matrix, [1, 300, 650])]
+        if ranges != [(0, 1), (1, 300), (300, 650), (650, ROWS)] or len(store) != ROWS:
+            print_error(f"Intervalos de índices inesperados: {ranges}")
+            return False
+        
+        expected_scores, expected_indices = brute_force(queries, matrix, 10)
+        results = store.search(queries, top_k=10)
+        indices = np.array([[r['index'] for r in row] for row in results])
+        similarities = np.array([[r['similarity'] for r in row] for row in results])
+        
+        if not same_results((similarities * 2) - 1, indices, expected_scores, expected_indices):
+            print_error("Busca no armazenamento diverge da força bruta")
+            return False
+        
+        if not np.allclose(store.get(42), normalize_rows(matrix[42])[0], atol=1e-6):
+            print_error("get() não retorna o vetor normalizado")
+            return False
+        
+        print_success("Busca no armazenamento igual à força bruta")
+        return True
+    
+    finally:
+        shutil.rmtree(path, ignore_errors=True)
+
+def test_store_reopen() -> bool:
+    """Armazenamento reaberto mantém dimensão, contagem e resultados"""
+    rng = np.random.default_rng(SEED + 2)
+    matrix = rng.standard_normal((ROWS, DIMENSION)).astype(np.float32)
+    query = rng.standard_normal(DIMENSION).astype(np.float32)
+    path = tempfile.mkdtemp(prefix="vector-store-")
+    
+    try:
+        store = MemoryMappedVectorStore(path, dimension=DIMENSION)
+        store.add(matrix[:600])
+        before = store.search(query, top_k=8)
+        del store
+        
+        reopened = MemoryMappedVectorStore(path)
+        if reopened.dimension != DIMENSION or len(reopened) != 600:
+            print_error(f"Reabertura perdeu metadados: dimensão {reopened.dimension}, "
+                        f"{len(reopened)} vetores")
+            return False
+        
+        if reopened.search(query, top_k=8) != before:
+            print_error("Resultados divergem após reabrir o armazenamento")
+            return False
+        
+        # Inserções após reabrir continuam a numeração
+        if reopened.add(matrix[600:]) != (600, ROWS):
+            print_error("Índices após reabrir não continuam a numeração")
+            return False
+        
+        expected_scores, expected_indices = brute_force(query, matrix, 8)
+        results = reopened.search(query, top_k=8)[0]
+        if [r['index'] for r in results] != expected_indices[0].tolist():
+            print_error("Busca após reabrir e inserir diverge da força bruta")
+            return False
+        
+        try:
+            MemoryMappedVectorStore(path, dimension=DIMENSION + 1)
+            print_error("Dimensão incompatível deveria ser rejeitada")
+            return False
+        except ValueError:
+            pass
+        
+        print_success("Reabertura mantém dimensão, contagem e resultados")
+        return True
+    
+    finally:
+        shutil.rmtree(path, ignore_errors=True)
+
+def main():
+    """Executa os testes da busca vetorial"""
+    print("\n" + "="*60)
+    print("Busca Vetorial Exata - Testes")
+    print("="*60 + "\n")
+    
+    print_info(f"{ROWS} vetores de dimensão {DIMENSION} (seed {SEED})")
+    
+    results = {
+        'exact_top_k': test_exact_top_k(),
+        'store_search': test_store_search(),
+        'store_reopen': test_store_reopen(),
+    }
+    print()
+    
+    passed = sum(1 for v in results.values() if v)
+    print(f"Total: {passed}/{len(results)} testes passaram")
+    
+    return 0 if passed == len(results) else 1
+
+if __name__ == "__main__":
+    sys.exit(main())
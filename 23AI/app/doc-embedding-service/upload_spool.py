@@ -0,0 +1,129 @@
+"""
+Disclaimer:
+
+Este código é fornecido como um exemplo open-source de contribuição comunitária para implementação de soluções utilizando a plataforma Oracle.
+É distribuído "AS IS" (como está), sem garantias, responsabilidades ou suporte de qualquer natureza.
+A Oracle Corporation não assume qualquer responsabilidade pelo conteúdo, precisão, funcionalidade ou forma deste material.
+"""
+
+"""
+upload_spool.py - Uploads Gravados em Disco
+Grava o arquivo enviado em UPLOAD_FOLDER em blocos, calculando o SHA-256
+durante a cópia, e entrega aos extratores o caminho do arquivo ou o arquivo
+aberto, em vez de uma cópia do conteúdo em bytes
+"""
+
+import os
+import hashlib
+import tempfile
+from io import BytesIO
+from contextlib import contextmanager
+from typing import IO, Union
+
+
+# Tamanho dos blocos lidos da requisição
+SPOOL_CHUNK_SIZE = 1024 * 1024
+
+
+class SpooledFile:
+    """
+    Arquivo de upload gravado em disco, com tamanho e SHA-256 já calculados
+    
+    Removido por remove() ou ao sair do bloco `with`.
+    """
+    
+    def __init__(self, path: str, size: int, sha256: str):
+        self.path = path
+        self.size = size
+        self.sha256 = sha256
+    
+    def __len__(self) -> int:
+        return self.size
+    
+    def remove(self) -> None:
+        """Remove o arquivo do disco"""
+        try:
+            os.unlink(self.path)
+        except FileNotFoundError:
+            pass
+    
+    def __enter__(self) -> "SpooledFile":
+        return self
+    
+    def __exit__(self, *exc) -> None:
+        self.remove()
+
+
+# Conteúdo aceito pelos extratores: bytes em memória ou arquivo gravado em disco
+Content = Union[bytes, SpooledFile]
+
+
+def spool_stream(stream: IO[bytes], directory: str = None, suffix: str = "",
+                 chunk_size: int = SPOOL_CHUNK_SIZE) -> SpooledFile:
+    """
+    Grava um stream em disco em blocos, calculando tamanho e SHA-256
+    
+    Args:
+        stream: Stream binário (ex.: FileStorage.stream do Flask)
+        directory: Diretório do arquivo (padrão: UPLOAD_FOLDER; sem acesso,
+            o diretório temporário do sistema)
+        suffix: Sufixo do arquivo (ex.: ".pdf")
+        chunk_size: Tamanho dos blocos lidos
+    
+    Returns:
+        SpooledFile com o caminho, o tamanho e o SHA-256
+    """
+    directory = directory or os.environ.get("UPLOAD_FOLDER") or None
+    if directory:
+        try:
+            os.makedirs(directory, exist_ok=True)
+        except OSError as e:
+            print(f"[upload] AVISO: UPLOAD_FOLDER {directory} inacessível ({e}) - "
+                  f"usando o diretório temporário do sistema")
+            directory = None
+    
+    fd, path = tempfile.mkstemp(prefix="upload-", suffix=suffix, dir=directory)
+    digest = hashlib.sha256()
+    size = 0
+    
+    try:
+        with os.fdopen(fd, "wb") as f:
+            while True:
+                block = stream.read(chunk_size)
+                if not block:
+                    break
+                digest.update(block)
+                f.write(block)
+                size += len(block)
+    except BaseException:
+        os.unlink(path)
+        raise
+    
+    return SpooledFile(path, size, digest.hexdigest())
+
+
+def content_sha256(content: Content) -> str:
+    """SHA-256 do conteúdo (já calculado, no caso de arquivo gravado em disco)"""
+    if isinstance(content, SpooledFile):
+        return content.sha256
+    return hashlib.sha256(content).hexdigest()
+
+
+@contextmanager
+def open_content(content: Content):
+    """
+    Conteúdo como arquivo binário somente leitura
+    
+    Um arquivo gravado em disco é aberto diretamente (lido sob demanda,
+    pelo cache de páginas do sistema); um mmap não serviria aqui, pois
+    zipfile e PIL exigem a interface completa de arquivo (seekable).
+    
+    Yields:
+        Arquivo aberto ou BytesIO sobre os bytes (sem cópia enquanto não
+        houver escrita)
+    """
+    if isinstance(content, SpooledFile):
+        with open(content.path, "rb") as f:
+            yield f
+    else:
+        yield BytesIO(content)
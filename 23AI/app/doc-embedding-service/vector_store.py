@@ -0,0 +1,267 @@
+"""
+Disclaimer:
+
+Este código é fornecido como um exemplo open-source de contribuição comunitária para implementação de soluções utilizando a plataforma Oracle.
+É distribuído "AS IS" (como está), sem garantias, responsabilidades ou suporte de qualquer natureza.
+A Oracle Corporation não assume qualquer responsabilidade pelo conteúdo, precisão, funcionalidade ou forma deste material.
+"""
+
+"""
+vector_store.py - Busca Vetorial Exata em Memória Mapeada
+Armazena vetores float32 pré-normalizados em arquivo memory-mapped e calcula
+top-k exato por produtos matriciais em blocos, para implantações offline/edge
+"""
+
+import os
+import json
+import threading
+import numpy as np
+from typing import List, Dict, Any, Optional, Tuple
+
+
+def normalize_rows(vectors: np.ndarray) -> np.ndarray:
+    """
+    Normaliza vetores (L2) linha a linha em float32
+    
+    Args:
+        vectors: Array 1D ou 2D
+    
+    Returns:
+        Array 2D float32 normalizado (vetores nulos permanecem nulos)
+    """
+    matrix = np.atleast_2d(np.asarray(vectors, dtype=np.float32))
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return matrix / norms
+
+
+def _top_k_columns(scores: np.ndarray, indices: np.ndarray,
+                   k: int) -> Tuple[np.ndarray, np.ndarray]:
+    """Mantém as k colunas de maior score por linha (sem ordenar)"""
+    if scores.shape[1] <= k:
+        return scores, indices
+    
+    top = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+    return np.take_along_axis(scores, top, axis=1), np.take_along_axis(indices, top, axis=1)
+
+
+def exact_top_k(queries: np.ndarray, matrix: np.ndarray, k: int,
+                block_rows: int = None) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Top-k exato por similaridade de cosseno (produto interno de vetores normalizados)
+    
+    Args:
+        queries: Queries normalizadas (shape: [n_queries, dimension])
+        matrix: Vetores normalizados (shape: [n_rows, dimension]), pode ser memmap
+        k: Número de resultados por query
+        block_rows: Linhas por bloco (padrão: matriz inteira)
+    
+    Returns:
+        Tupla (scores, indices) ordenados por score decrescente
+        (shape: [n_queries, min(k, n_rows)])
+    """
+    n_queries = queries.shape[0]
+    n_rows = matrix.shape[0]
+    k = min(k, n_rows)
+    
+    scores = np.empty((n_queries, 0), dtype=np.float32)
+    indices = np.empty((n_queries, 0), dtype=np.int64)
+    
+    if k <= 0:
+        return scores, indices
+    
+    block_rows = block_rows or n_rows
+    
+    for start in range(0, n_rows, block_rows):
+        end = min(start + block_rows, n_rows)
+        block_scores = queries @ np.asarray(matrix[start:end]).T
+        block_indices = np.broadcast_to(
+            np.arange(start, end, dtype=np.int64), block_scores.shape
+        )
+        
+        # Reduz o bloco ao seu top-k e combina com o acumulado
+        block_scores, block_indices = _top_k_columns(block_scores, block_indices, k)
+        scores, indices = _top_k_columns(
+            np.concatenate([scores, block_scores], axis=1),
+            np.concatenate([indices, block_indices], axis=1),
+            k
+        )
+    
+    order = np.argsort(-scores, axis=1, kind="stable")
+    return np.take_along_axis(scores, order, axis=1), np.take_along_axis(indices, order, axis=1)
+
+
+def to_results(scores: np.ndarray, indices: np.ndarray,
+               threshold: float = 0.0) -> List[List[Dict[str, Any]]]:
+    """
+    Converte scores de cosseno em listas de resultados (similaridade em [0, 1])
+    
+    Args:
+        scores: Scores de cosseno ordenados (shape: [n_queries, k])
+        indices: Índices correspondentes
+        threshold: Threshold mínimo de similaridade
+    
+    Returns:
+        Uma lista de dicionários {'index', 'similarity'} por query
+    """
+    similarities = (scores + 1) / 2
+    results = []
+    
+    for row_similarities, row_indices in zip(similarities.tolist(), indices.tolist()):
+        results.append([
+            {'index': index, 'similarity': similarity}
+            for index, similarity in zip(row_indices, row_similarities)
+            if similarity >= threshold
+        ])
+    
+    return results
+
+
+class MemoryMappedVectorStore:
+    """
+    Armazenamento de vetores float32 pré-normalizados em arquivo memory-mapped
+    
+    Os vetores são gravados em disco já normalizados; a busca percorre o
+    arquivo em blocos que cabem em cache, sem carregar a matriz na RAM.
+    O índice de cada vetor é sua posição de inserção.
+    """
+    
+    VECTORS_FILE = "vectors.f32"
+    META_FILE = "meta.json"
+    
+    def __init__(self, path: str, dimension: int = None, block_bytes: int = None):
+        """
+        Abre (ou cria) um armazenamento de vetores
+        
+        Args:
+            path: Diretório do armazenamento
+            dimension: Dimensão dos vetores (obrigatório na criação)
+            block_bytes: Tamanho dos blocos de busca em bytes (padrão: VECTOR_STORE_BLOCK_BYTES)
+        """
+        self.path = path
+        self.block_bytes = block_bytes or int(os.environ.get("VECTOR_STORE_BLOCK_BYTES", str(8 * 1024 * 1024)))
+        self._lock = threading.Lock()
+        self._matrix: Optional[np.memmap] = None
+        
+        os.makedirs(path, exist_ok=True)
+        meta_path = os.path.join(path, self.META_FILE)
+        
+        if os.path.exists(meta_path):
+            with open(meta_path, encoding="utf-8") as f:
+                meta = json.load(f)
+            if dimension is not None and dimension != meta["dimension"]:
+                raise ValueError(
+                    f"Dimensão incompatível: armazenamento tem {meta['dimension']}, informado {dimension}"
+                )
+            self.dimension = int(meta["dimension"])
+            self.count = int(meta["count"])
+        else:
+            if dimension is None:
+                raise ValueError("Dimensão obrigatória para criar um novo armazenamento")
+            self.dimension = int(dimension)
+            self.count = 0
+            open(os.path.join(path, self.VECTORS_FILE), "wb").close()
+            self._write_meta()
+        
+        self._remap()
+    
+    @property
+    def block_rows(self) -> int:
+        """Linhas por bloco de busca"""
+        return max(1, self.block_bytes // (self.dimension * 4))
+    
+    def _write_meta(self) -> None:
+        """Grava metadados (dimensão e contagem)"""
+        meta_path = os.path.join(self.path, self.META_FILE)
+        tmp_path = meta_path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"dimension": self.dimension, "count": self.count, "dtype": "float32"}, f)
+        os.replace(tmp_path, meta_path)
+    
+    def _remap(self) -> None:
+        """Reabre o memory map com a contagem atual"""
+        if self.count == 0:
+            self._matrix = None
+            return
+        
+        self._matrix = np.memmap(
+            os.path.join(self.path, self.VECTORS_FILE),
+            dtype=np.float32,
+            mode="r",
+            shape=(self.count, self.dimension)
+        )
+    
+    def __len__(self) -> int:
+        return self.count
+    
+    def add(self, vectors: np.ndarray) -> Tuple[int, int]:
+        """
+        Adiciona vetores (normalizados antes da gravação)
+        
+        Args:
+            vectors: Array (shape: [n, dimension] ou [dimension])
+        
+        Returns:
+            Intervalo [início, fim) dos índices atribuídos
+        """
+        matrix = normalize_rows(vectors)
+        
+        if matrix.shape[1] != self.dimension:
+            raise ValueError(
+                f"Dimensão incompatível: esperado {self.dimension}, recebido {matrix.shape[1]}"
+            )
+        
+        with self._lock:
+            start = self.count
+            
+            with open(os.path.join(self.path, self.VECTORS_FILE), "ab") as f:
+                f.write(np.ascontiguousarray(matrix).tobytes())
+                f.flush()
+                os.fsync(f.fileno())
+            
+            self.count += matrix.shape[0]
+            self._write_meta()
+            self._remap()
+            
+            return start, self.count
+    
+    def search(self, queries: np.ndarray, top_k: int = 5,
+               threshold: float = 0.0) -> List[List[Dict[str, Any]]]:
+        """
+        Busca exata para uma ou várias queries (produto matriz-matriz)
+        
+        Args:
+            queries: Embedding(s) de query (shape: [dimension] ou [n_queries, dimension])
+            top_k: Número de resultados por query
+            threshold: Threshold mínimo de similaridade [0, 1]
+        
+        Returns:
+            Uma lista de resultados {'index', 'similarity'} por query
+        """
+        query_matrix = normalize_rows(queries)
+        
+        if query_matrix.shape[1] != self.dimension:
+            raise ValueError(
+                f"Dimensão incompatível: esperado {self.dimension}, recebido {query_matrix.shape[1]}"
+            )
+        
+        matrix = self._matrix
+        if matrix is None:
+            return [[] for _ in range(query_matrix.shape[0])]
+        
+        scores, indices = exact_top_k(query_matrix, matrix, top_k, block_rows=self.block_rows)
+        return to_results(scores, indices, threshold)
+    
+    def get(self, index: int) -> np.ndarray:
+        """
+        Retorna o vetor normalizado de um índice
+        
+        Args:
+            index: Índice do vetor
+        
+        Returns:
+            Vetor float32
+        """
+        if self._matrix is None or not 0 <= index < self.count:
+            raise IndexError(f"Índice fora do intervalo: {index}")
+        return np.array(self._matrix[index])